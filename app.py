@@ -6,12 +6,16 @@ import yaml
 import requests
 import json
 import time
+from collections import deque
 from dotenv import load_dotenv
 from flask import Flask, request, jsonify
-from langchain_openai import ChatOpenAI
 from langchain.schema import HumanMessage, SystemMessage
 from utils.metadata_handler import MetadataHandler
 from prompt_manager import PromptManager
+from tool_selector import ToolSelector
+from utils.llm_backends import DecisionRecorder, create_llm, start_stub_server
+from utils.tracing import TRACE_ID_HEADER, TRACEPARENT_HEADER, create_tracer
+from utils.context_packer import count_tokens
 
 
 class DynamicMCPHost:
@@ -56,10 +60,16 @@ class DynamicMCPHost:
     def _initialize_services(self):
         """Initialize all required services."""
         self.llm = None
+        self.llm_stub = None
+        self.decision_recorder = None
+        self.tracer = create_tracer("host", self.config.get("tracing", {}))
         self.metadata_handler = MetadataHandler(self.config["metadata_path"])
         self.cached_metadata = None
         self.last_metadata_update = 0
         self.available_tools = {}
+        self.tool_selector = None
+        self.prompt_log = deque(maxlen=100)
+        self.record_query = self.config.get("tracing", {}).get("record_query", False)
         self.mcp_servers = {
             "motor": self.config["motor_mcp_host"],
             "knowledge": self.config["knowledge_mcp_host"]
@@ -77,23 +87,66 @@ class DynamicMCPHost:
         self.app.route("/metadata", methods=["GET"])(self.get_metadata)
         self.app.route("/refresh", methods=["POST"])(self.refresh_tools)
         self.app.route("/debug/servers", methods=["GET"])(self.debug_servers)
+        self.app.route("/prompt/stats", methods=["GET"])(self.get_prompt_stats)
     
     def initialize(self):
         """Initialize the LLM and discover available tools."""
         self.logger.info("Initializing Dynamic MCP Client...")
         try:
-            self.llm = ChatOpenAI(
-                model="gpt-4o",
-                openai_api_key=os.getenv("OPENAI_API_KEY"),
-                temperature=0.1
-            )
+            self._create_llm()
             self.refresh_metadata_cache()
             self.discover_tools()
+            self._create_tool_selector()
             self.logger.info("✅ Dynamic MCP Client ready!")
         except Exception as e:
             self.logger.error(f"Failed to initialize client: {str(e)}")
             raise
     
+    def _create_llm(self):
+        """Create the chat model for the llm config section, starting the stub server first if it is embedded."""
+        llm_config = self.config.get("llm", {})
+        stub_config = llm_config.get("stub", {})
+        if llm_config.get("backend") == "stub" and stub_config.get("embedded"):
+            self.llm_stub = start_stub_server(stub_config)
+            self.logger.info(f"🤖 Embedded stub LLM server at {self.llm_stub.url}")
+        self.llm = create_llm(self.config, base_url=self.llm_stub.url if self.llm_stub else None)
+        if llm_config.get("record_path"):
+            self.decision_recorder = DecisionRecorder(llm_config["record_path"])
+        self.logger.info(f"✅ LLM backend: {llm_config.get('backend', 'openai')}")
+    
+    def invoke_llm(self, messages, stage="decision"):
+        """Call the LLM, recording the reply for stub replay when llm.record_path is set."""
+        with self.tracer.span(f"llm.{stage}", kind="client", backend=self.config.get("llm", {}).get("backend", "openai")) as span:
+            response = self.llm.invoke(messages)
+            usage = getattr(response, "response_metadata", {}).get("token_usage") or {}
+            if span is not None and usage:
+                span.set_attribute("prompt_tokens", usage.get("prompt_tokens"))
+                span.set_attribute("completion_tokens", usage.get("completion_tokens"))
+        if self.decision_recorder:
+            self.decision_recorder.record(messages, response.content)
+        return response
+    
+    def _create_tool_selector(self):
+        """Set up per-query tool selection from the tool_selection config section."""
+        selection_config = self.config.get("tool_selection", {})
+        if not selection_config.get("enabled", True):
+            return
+        embeddings = None
+        if selection_config.get("use_embeddings", True):
+            try:
+                from utils.embedding_backends import create_embeddings
+                embeddings = create_embeddings()
+            except Exception as e:
+                self.logger.warning(f"⚠️ Embedding model unavailable for tool selection, using BM25: {str(e)}")
+        self.tool_selector = ToolSelector(
+            embeddings,
+            top_n=selection_config.get("top_n", 3),
+            min_score=selection_config.get("min_score", 0.2),
+            rules=selection_config.get("rules", {}),
+            always_include=selection_config.get("always_include", [])
+        )
+        self.tool_selector.index(self.available_tools)
+    
     def debug_servers(self):
         """Debug endpoint to check server connectivity."""
         results = {}
@@ -120,7 +173,8 @@ class DynamicMCPHost:
         
         for server_name, server_url in self.mcp_servers.items():
             try:
-                response = requests.get(f"{server_url}/mcp/tools", timeout=5)
+                with self.tracer.span(f"discover {server_name}", kind="client"):
+                    response = requests.get(f"{server_url}/mcp/tools", timeout=5, headers=self.tracer.inject())
                 if response.status_code == 200:
                     tools_data = response.json()
                     self.available_tools[server_name] = {
@@ -143,8 +197,10 @@ class DynamicMCPHost:
         except Exception as e:
             self.logger.error(f"❌ Error refreshing metadata cache: {str(e)}")
     
-    def get_current_metadata(self):
-        """Get current driving metadata with caching."""
+    def get_current_metadata(self, metadata=None):
+        """Get current driving metadata with caching (or format the given snapshot)."""
+        if metadata is not None:
+            return self.metadata_handler.format_metadata_for_prompt(metadata)
         if time.time() - self.last_metadata_update > 5:  # Refresh cache if older than 5 seconds
             self.refresh_metadata_cache()
         
@@ -152,31 +208,68 @@ class DynamicMCPHost:
             return self.metadata_handler.format_metadata_for_prompt(self.cached_metadata)
         return "Metadata unavailable"
     
-    def create_tools_description(self):
-        """Generate a description of all available tools for the LLM."""
-        tools_desc = "Available MCP Tools:\n\n"
-        
-        for server_name, server_info in self.available_tools.items():
-            tools_desc += f"=== {server_name.upper()} SERVER ===\n"
-            for tool in server_info["tools"]:
-                tools_desc += f"- {tool['name']}: {tool.get('description', 'No description')}\n"
-                if tool.get('parameters'):
-                    params = []
-                    for param_name, param_info in tool['parameters'].get('properties', {}).items():
-                        param_type = param_info.get('type', 'unknown')
-                        param_desc = param_info.get('description', '')
-                        params.append(f"{param_name} ({param_type}): {param_desc}")
-                    if params:
-                        tools_desc += f"  Parameters: {', '.join(params)}\n"
-                tools_desc += "\n"
+    def create_tools_description(self, user_query=None):
+        """Describe the tools relevant to the query for the LLM (all tools when selection is off)."""
+        full_description = self.prompt_manager.format_tools_description(self.available_tools)
+        if not self.tool_selector or not user_query:
+            return full_description, {"tools": "all", "tools_tokens_full": count_tokens(full_description)}
+        selected_tools, names = self.tool_selector.select(user_query, self.available_tools)
+        description = self.prompt_manager.format_tools_description(selected_tools)
+        return description, {
+            "tools": names,
+            "tools_tokens_full": count_tokens(full_description),
+            "tools_tokens_selected": count_tokens(description)
+        }
+    
+    def get_prefetched_knowledge(self):
+        """Get knowledge the knowledge server prefetched for the current vehicle state."""
+        try:
+            with self.tracer.span("knowledge.prefetch_context", kind="client"):
+                response = requests.get(f"{self.mcp_servers['knowledge']}/prefetch/context", timeout=0.5,
+                                        headers=self.tracer.inject())
+            if response.status_code != 200:
+                return ""
+            context = response.json().get("context", {})
+        except Exception as e:
+            self.logger.warning(f"⚠️ Prefetched knowledge unavailable: {str(e)}")
+            return ""
         
-        return tools_desc
+        sections = []
+        for field, entry in context.items():
+            excerpts = "\n".join(f"  - {doc['content'].strip()}" for doc in entry.get("documents", [])[:2])
+            if excerpts:
+                sections.append(f"{field} ({entry.get('query', '')}):\n{excerpts}")
+        return "\n".join(sections)
     
-    def create_system_prompt(self):
-        """Create the system prompt for the LLM with current context."""
-        current_metadata = self.get_current_metadata()
-        tools_description = self.create_tools_description()
-        return self.prompt_manager.get_system_prompt(current_metadata, tools_description)
+    def query_fields(self, user_query):
+        """How a query appears in traces and prompt stats: its length, or the raw text if tracing.record_query is set."""
+        # Driver queries can be personal, so only their length is kept unless configured otherwise
+        if self.record_query:
+            return {"query": user_query}
+        return {"query_chars": len(user_query or "")}
+
+    def create_system_prompt(self, user_query=None, metadata=None):
+        """Create the system prompt segments for the LLM with current context (stable segments first)."""
+        current_metadata = self.get_current_metadata(metadata)
+        with self.tracer.span("tool_selection"):
+            tools_description, selection = self.create_tools_description(user_query)
+        # Prefetched knowledge follows the vehicle state file, not a per-request metadata snapshot
+        knowledge_context = "" if metadata is not None else self.get_prefetched_knowledge()
+        segments = self.prompt_manager.get_system_prompt_segments(current_metadata, tools_description, knowledge_context)
+        
+        prompt_tokens = sum(segment["tokens"] for segment in segments)
+        tools_saved = selection["tools_tokens_full"] - selection.get("tools_tokens_selected", selection["tools_tokens_full"])
+        record = {
+            "time": time.time(),
+            **self.query_fields(user_query),
+            **selection,
+            "prompt_tokens": prompt_tokens,
+            "prompt_tokens_without_selection": prompt_tokens + tools_saved
+        }
+        self.prompt_log.append(record)
+        self.logger.info(f"Prompt tokens: {record['prompt_tokens_without_selection']} -> {prompt_tokens} "
+                         f"(tools: {record['tools']})")
+        return segments
         
     def send_mcp_command(self, server_name, tool_name, args):
         """Send command to specified MCP server."""
@@ -188,22 +281,31 @@ class DynamicMCPHost:
             payload = {"tool": tool_name, "args": args}
             
             self.logger.info(f"Sending to {server_name}: {tool_name} with args {args}")
-            response = requests.post(server_url, json=payload)
+            with self.tracer.span(f"mcp.{server_name}.{tool_name}", kind="client") as span:
+                response = requests.post(server_url, json=payload, headers=self.tracer.inject())
+                if span is not None:
+                    span.set_attribute("status_code", response.status_code)
             return response.status_code, response.json()
         except Exception as e:
             self.logger.error(f"Failed to call MCP server {server_name}: {str(e)}")
             return 500, {"error": f"Failed to reach {server_name} server"}
         
     
-    def process_query(self, user_query):
-        """Process user query using LLM and MCP tools."""
+    def process_query(self, user_query, metadata=None):
+        """Process user query using LLM and MCP tools (metadata replaces the vehicle state file when given)."""
         try:
+            with self.tracer.span("system_prompt"):
+                segments = self.create_system_prompt(user_query, metadata)
+            self.prompt_manager.record_prompt(segments)
             messages = [
-                SystemMessage(content=self.create_system_prompt()),
+                SystemMessage(content=self.prompt_manager.join_segments(segments)),
                 HumanMessage(content=user_query)
             ]
             
-            llm_response = self.llm.invoke(messages)
+            llm_response = self.invoke_llm(messages)
+            self.prompt_manager.record_provider_usage(
+                getattr(llm_response, "response_metadata", {}).get("token_usage")
+            )
             decision_text = llm_response.content.strip()
             
             self.logger.info(f"User Query: {user_query}")
@@ -215,14 +317,14 @@ class DynamicMCPHost:
                 return {
                     "status": "success",
                     "response": decision_text,
-                    "metadata": self.get_current_metadata()
+                    "metadata": self.get_current_metadata(metadata)
                 }, 200
             
             if decision.get("action") == "direct_response":
                 return {
                     "status": "success",
                     "response": decision.get("response"),
-                    "metadata": self.get_current_metadata()
+                    "metadata": self.get_current_metadata(metadata)
                 }, 200
             
             elif "seatCommand" in decision:  # Motor command case
@@ -243,19 +345,19 @@ class DynamicMCPHost:
                         "response": final_response,
                         "tool_used": "motor.seat_adjustment",
                         "tool_result": tool_result,
-                        "metadata": self.get_current_metadata()
+                        "metadata": self.get_current_metadata(metadata)
                     }, 200
                 else:
                     return {
                         "status": "error",
                         "error": f"Tool execution failed: {tool_result}",
-                        "metadata": self.get_current_metadata()
+                        "metadata": self.get_current_metadata(metadata)
                     }, status_code
             
             return {
                 "status": "error",
                 "error": "Invalid action from LLM",
-                "metadata": self.get_current_metadata()
+                "metadata": self.get_current_metadata(metadata)
             }, 400
                 
         except Exception as e:
@@ -272,7 +374,7 @@ class DynamicMCPHost:
             json.dumps(tool_result, indent=2),
             reasoning
         )
-        response = self.llm.invoke([HumanMessage(content=context_prompt)])
+        response = self.invoke_llm([HumanMessage(content=context_prompt)], stage="final_response")
         return response.content.strip()
     
     def query_endpoint(self):
@@ -282,9 +384,22 @@ class DynamicMCPHost:
         
         if not user_query:
             return jsonify({"error": "No query provided"}), 400
+        metadata = data.get("metadata")
+        if metadata is not None and not isinstance(metadata, dict):
+            return jsonify({"error": "metadata must be an object"}), 400
         
-        response, status_code = self.process_query(user_query)
-        return jsonify(response), status_code
+        with self.tracer.span("query", parent=request.headers.get(TRACEPARENT_HEADER), kind="server",
+                              **self.query_fields(user_query)) as span:
+            response, status_code = self.process_query(user_query, metadata)
+            if span is not None:
+                span.set_attribute("status_code", status_code)
+                span.set_attribute("tool_used", response.get("tool_used", "none"))
+                if status_code >= 500:
+                    span.status = "error"
+        flask_response = jsonify(response)
+        if span is not None:
+            flask_response.headers[TRACE_ID_HEADER] = span.trace_id
+        return flask_response, status_code
     
     def get_available_tools(self):
         """Endpoint to get available tools."""
@@ -301,6 +416,14 @@ class DynamicMCPHost:
             "raw_metadata": self.cached_metadata
         })
     
+    def get_prompt_stats(self):
+        """Endpoint to get system prompt prefix reuse and provider cache counters."""
+        return jsonify({
+            "status": "success",
+            "prompt": self.prompt_manager.stats(),
+            "recent_requests": list(self.prompt_log)
+        })
+    
     def refresh_tools(self):
         """Endpoint to refresh tools and metadata."""
         try:
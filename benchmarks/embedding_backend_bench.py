@@ -0,0 +1,102 @@
+"""Compare the PyTorch and ONNX Runtime embedding backends.
+
+Reports load time, single-query latency and batch throughput for each
+backend, and checks that ONNX outputs match PyTorch within a tolerance.
+Each backend loads in its own subprocess so load times include imports.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+import numpy as np
+
+SAMPLE_TEXTS = [
+    "my neck hurts while driving",
+    "what causes pelvis drift on long trips",
+    "best lumbar support position for lower back pain",
+    "is seat ventilation useful when the cabin is very hot",
+    "Prolonged static sitting increases muscular fatigue in the lower back and shoulders.",
+    "The upper back adjuster (UBA) supports the thoracic spine during long highway drives.",
+]
+
+
+def run_child(backend, runs, batch_repeat):
+    start = time.perf_counter()
+    from utils.embedding_backends import create_embeddings
+    embeddings = create_embeddings(backend)
+    load_seconds = time.perf_counter() - start
+
+    embeddings.embed_query("warm up")
+    latencies = []
+    for _ in range(runs):
+        for text in SAMPLE_TEXTS:
+            start = time.perf_counter()
+            embeddings.embed_query(text)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    batch = SAMPLE_TEXTS * batch_repeat
+    start = time.perf_counter()
+    embeddings.embed_documents(batch)
+    batch_seconds = time.perf_counter() - start
+
+    print(json.dumps({
+        "backend": backend,
+        "load_seconds": load_seconds,
+        "query_p50_ms": float(np.percentile(latencies, 50)),
+        "query_p99_ms": float(np.percentile(latencies, 99)),
+        "batch_texts_per_sec": len(batch) / batch_seconds,
+        "vectors": embeddings.embed_documents(SAMPLE_TEXTS)
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends.")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--runs", type=int, default=20, help="Passes over the sample texts for latency.")
+    parser.add_argument("--batch-repeat", type=int, default=50, help="Repeat the sample texts to form the batch.")
+    parser.add_argument("--tolerance", type=float, default=1e-3, help="Max abs difference allowed for fp32 ONNX.")
+    parser.add_argument("--output", type=str, help="Write the results as JSON to this path.")
+    parser.add_argument("--child", type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.runs, args.batch_repeat)
+        return
+
+    report = {}
+    for backend in args.backends:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", backend,
+             "--runs", str(args.runs), "--batch-repeat", str(args.batch_repeat)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        report[backend] = json.loads(output.strip().splitlines()[-1])
+
+    reference = np.asarray(report[args.backends[0]]["vectors"])
+    for backend in args.backends:
+        vectors = np.asarray(report[backend].pop("vectors"))
+        report[backend]["max_abs_diff"] = float(np.abs(vectors - reference).max())
+        report[backend]["min_cosine"] = float((vectors * reference).sum(axis=1).min())
+        report[backend]["within_tolerance"] = (
+            backend.endswith("int8") or report[backend]["max_abs_diff"] <= args.tolerance
+        )
+
+    for backend, stats in report.items():
+        print(f"{backend:>10}: load {stats['load_seconds']:.2f}s, query p50 {stats['query_p50_ms']:.2f} ms, "
+              f"p99 {stats['query_p99_ms']:.2f} ms, batch {stats['batch_texts_per_sec']:.1f} texts/s, "
+              f"max diff {stats['max_abs_diff']:.2e}, min cosine {stats['min_cosine']:.5f}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
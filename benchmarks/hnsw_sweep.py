@@ -0,0 +1,246 @@
+"""Sweep Chroma's HNSW parameters and report recall against exact search, latency, build time and size.
+
+Vectors come from the live Chroma collection (or --synthetic for a random
+clustered corpus). A held-out sample of them is used as queries and removed
+from the indexed set. Exact top-k neighbours come from brute force in NumPy.
+One index is built per (M, construction_ef) pair with hnswlib, the same
+library Chroma uses internally, so the parameters map one to one. Each
+search_ef is then queried one vector at a time. Pareto-optimal rows, where no
+other row has both higher recall and lower p99 latency, are marked with *.
+--apply rebuilds the live collection with the chosen settings.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+import numpy as np
+from utils.ingestor_prepator import CONST
+
+COLLECTION_NAME = "langchain"  # langchain_chroma's default collection
+PAGE_SIZE = 1000
+
+
+def open_client():
+    import chromadb
+    return chromadb.PersistentClient(path=CONST.CHROMA_DB_DIR)
+
+
+def load_collection_vectors():
+    """Embeddings of the live collection and its distance space."""
+    collection = open_client().get_collection(COLLECTION_NAME)
+    vectors = []
+    for offset in range(0, collection.count(), PAGE_SIZE):
+        page = collection.get(include=["embeddings"], limit=PAGE_SIZE, offset=offset)
+        vectors.extend(page["embeddings"])
+    space = (collection.metadata or {}).get("hnsw:space", "l2")
+    return np.asarray(vectors, dtype=np.float32), space
+
+
+def synthetic_vectors(count, dim, clusters=50, seed=0):
+    """Unit vectors scattered around random centres, roughly like sentence embeddings."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim))
+    vectors = centres[rng.integers(0, clusters, size=count)] + 0.5 * rng.normal(size=(count, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def exact_neighbours(data, queries, k, space):
+    """Brute-force top-k row indices in the same distance space as the index."""
+    if space == "l2":
+        distances = (data ** 2).sum(axis=1)[None, :] - 2 * queries @ data.T
+    elif space == "cosine":
+        distances = -(queries / np.linalg.norm(queries, axis=1, keepdims=True)) @ (
+            data / np.linalg.norm(data, axis=1, keepdims=True)).T
+    else:  # "ip"
+        distances = -queries @ data.T
+    top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    return [set(row) for row in top]
+
+
+def directory_size_mb(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total / 2**20
+
+
+def sweep(data, queries, truth, k, space, m_values, construction_efs, search_efs):
+    import hnswlib
+
+    rows = []
+    for m in m_values:
+        for construction_ef in construction_efs:
+            index = hnswlib.Index(space=space, dim=data.shape[1])
+            start = time.perf_counter()
+            index.init_index(max_elements=len(data), M=m, ef_construction=construction_ef, random_seed=100)
+            index.add_items(data, np.arange(len(data)))
+            build_seconds = time.perf_counter() - start
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                index.save_index(os.path.join(tmp_dir, "index.bin"))
+                size_mb = directory_size_mb(tmp_dir)
+
+            for search_ef in search_efs:
+                index.set_ef(max(search_ef, k))
+                latencies, hits = [], 0
+                for query, exact in zip(queries, truth):
+                    start = time.perf_counter()
+                    labels, _ = index.knn_query(query, k=k)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    hits += len(exact & set(labels[0].tolist()))
+                rows.append({
+                    "M": m,
+                    "construction_ef": construction_ef,
+                    "search_ef": search_ef,
+                    f"recall@{k}": hits / (k * len(queries)),
+                    "p50_ms": float(np.percentile(latencies, 50)),
+                    "p99_ms": float(np.percentile(latencies, 99)),
+                    "build_seconds": build_seconds,
+                    "size_mb": size_mb
+                })
+                print(f"  M={m} construction_ef={construction_ef} search_ef={search_ef}: "
+                      f"recall {rows[-1][f'recall@{k}']:.3f}, p99 {rows[-1]['p99_ms']:.3f} ms")
+    return rows
+
+
+def mark_pareto(rows, recall_key):
+    for row in rows:
+        row["pareto"] = not any(
+            other[recall_key] >= row[recall_key] and other["p99_ms"] <= row["p99_ms"]
+            and (other[recall_key] > row[recall_key] or other["p99_ms"] < row["p99_ms"])
+            for other in rows
+        )
+
+
+def recommend(rows, recall_key, min_recall):
+    """Fastest Pareto row reaching min_recall, else the one with the best recall."""
+    candidates = [row for row in rows if row["pareto"] and row[recall_key] >= min_recall]
+    if candidates:
+        return min(candidates, key=lambda row: (row["p99_ms"], row["size_mb"]))
+    return max(rows, key=lambda row: (row[recall_key], -row["p99_ms"]))
+
+
+def notify_index_changed():
+    """Touch the index version marker and ask a running knowledge server to reload now.
+
+    The swap gives the collection a new ID; without this the server keeps
+    querying the deleted one and serving cached answers from it.
+    """
+    with open(CONST.INDEX_VERSION_FILE, "w") as file:
+        file.write(str(time.time()))
+    url = CONST.CONFIG.get("ingestion", {}).get("daemon", {}).get("knowledge_server_url")
+    if not url:
+        return
+    import requests
+    try:
+        response = requests.post(f"{url}/cache/invalidate", timeout=5)
+        print(f"   Knowledge server reload: HTTP {response.status_code}")
+    except requests.RequestException as e:
+        print(f"   Knowledge server not reachable ({type(e).__name__}); it reloads on its next query.")
+
+
+def apply_settings(m, construction_ef, search_ef):
+    """Rebuild the live collection with new HNSW parameters (M and construction_ef are fixed at creation).
+
+    The copy is made under a temporary name and swapped in by renaming, so the
+    original collection is intact until the new one is complete.
+    """
+    client = open_client()
+    source = client.get_collection(COLLECTION_NAME)
+    metadata = {
+        **(source.metadata or {}),
+        "hnsw:M": m,
+        "hnsw:construction_ef": construction_ef,
+        "hnsw:search_ef": search_ef
+    }
+    new_name, old_name = f"{COLLECTION_NAME}_hnsw_new", f"{COLLECTION_NAME}_hnsw_old"
+    existing = [getattr(collection, "name", collection) for collection in client.list_collections()]
+    for name in (new_name, old_name):
+        if name in existing:
+            client.delete_collection(name)
+    target = client.create_collection(new_name, metadata=metadata)
+    for offset in range(0, source.count(), PAGE_SIZE):
+        page = source.get(include=["embeddings", "documents", "metadatas"], limit=PAGE_SIZE, offset=offset)
+        target.add(ids=page["ids"], embeddings=page["embeddings"],
+                   documents=page["documents"], metadatas=page["metadatas"])
+    if target.count() != source.count():
+        raise RuntimeError(f"Copied {target.count()} of {source.count()} chunks, live collection left unchanged")
+
+    source.modify(name=old_name)
+    target.modify(name=COLLECTION_NAME)
+    client.delete_collection(old_name)
+    notify_index_changed()
+    print(f"✅ Rebuilt '{COLLECTION_NAME}' ({target.count()} chunks) with M={m}, "
+          f"construction_ef={construction_ef}, search_ef={search_ef}")
+    print("   Set the same values under vector_store.hnsw in config.yaml so new collections match.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep HNSW parameters for the Chroma collection.")
+    parser.add_argument("--m", type=int, nargs="+", default=[8, 16, 32, 48])
+    parser.add_argument("--construction-ef", type=int, nargs="+", default=[32, 64, 128, 200])
+    parser.add_argument("--search-ef", type=int, nargs="+", default=[10, 20, 40, 64, 100, 200])
+    parser.add_argument("--k", type=int, default=4, help="Neighbours retrieved per query.")
+    parser.add_argument("--queries", type=int, default=200, help="Vectors held out of the index and used as queries.")
+    parser.add_argument("--synthetic", type=int, help="Sweep a synthetic corpus of this many vectors instead of the collection.")
+    parser.add_argument("--dim", type=int, default=384, help="Dimension of synthetic vectors.")
+    parser.add_argument("--min-recall", type=float, default=0.95, help="Recall target for the recommended setting.")
+    parser.add_argument("--apply", action="store_true", help="Rebuild the live collection with the recommended setting.")
+    parser.add_argument("--apply-params", type=int, nargs=3, metavar=("M", "CONSTRUCTION_EF", "SEARCH_EF"),
+                        help="Rebuild the live collection with these settings and skip the sweep.")
+    parser.add_argument("--output", type=str, help="Write the results as JSON to this path.")
+    args = parser.parse_args()
+
+    if args.apply_params:
+        apply_settings(*args.apply_params)
+        return
+
+    if args.synthetic:
+        vectors, space = synthetic_vectors(args.synthetic, args.dim), "l2"
+    else:
+        vectors, space = load_collection_vectors()
+    if len(vectors) <= args.queries + args.k:
+        raise SystemExit(f"Only {len(vectors)} vectors: need more than --queries + --k to sweep")
+
+    rng = np.random.default_rng(0)
+    order = rng.permutation(len(vectors))
+    queries, data = vectors[order[:args.queries]], vectors[order[args.queries:]]
+    truth = exact_neighbours(data, queries, args.k, space)
+    print(f"🔎 Sweeping {len(data)} vectors (dim {data.shape[1]}, {space}) with {len(queries)} held-out queries")
+
+    recall_key = f"recall@{args.k}"
+    rows = sweep(data, queries, truth, args.k, space, args.m, args.construction_ef, args.search_ef)
+    mark_pareto(rows, recall_key)
+    best = recommend(rows, recall_key, args.min_recall)
+
+    print(f"\n{'':2}{'M':>4}{'c_ef':>6}{'s_ef':>6}{recall_key:>11}{'p50 ms':>9}{'p99 ms':>9}{'build s':>9}{'MB':>8}")
+    for row in sorted(rows, key=lambda row: (-row[recall_key], row["p99_ms"])):
+        print(f"{'*' if row['pareto'] else '':2}{row['M']:>4}{row['construction_ef']:>6}{row['search_ef']:>6}"
+              f"{row[recall_key]:>11.3f}{row['p50_ms']:>9.3f}{row['p99_ms']:>9.3f}"
+              f"{row['build_seconds']:>9.2f}{row['size_mb']:>8.1f}")
+    current = CONST.HNSW_METADATA
+    print(f"\nCurrent: M={current['hnsw:M']}, construction_ef={current['hnsw:construction_ef']}, "
+          f"search_ef={current['hnsw:search_ef']}")
+    print(f"Recommended (fastest with {recall_key} >= {args.min_recall}): M={best['M']}, "
+          f"construction_ef={best['construction_ef']}, search_ef={best['search_ef']}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"vectors": len(data), "queries": len(queries), "k": args.k, "space": space,
+                       "rows": rows, "recommended": best}, file, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.apply:
+        if args.synthetic:
+            raise SystemExit("--apply needs a sweep over the live collection, not --synthetic")
+        apply_settings(best["M"], best["construction_ef"], best["search_ef"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Compare vector-only and hybrid (BM25 + vector) retrieval.
+
+Reports BM25 lookup latency and, given a labelled query file, precision@k
+for both modes. Labelled files are JSONL lines such as
+{"query": "what is UBA", "relevant": ["upper back adjuster", "UBA"]}; a
+retrieved chunk counts as relevant when it contains any listed phrase.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "mcp"))
+
+import numpy as np
+from knowledge_mcp_server import retriever
+
+DEFAULT_QUERIES = [
+    {"query": "UBA position for upper back support", "relevant": ["uba"]},
+    {"query": "lumbar support and lower back pain", "relevant": ["lumbar"]},
+    {"query": "pelvis drift during long drives", "relevant": ["pelvis"]},
+    {"query": "seat ventilation above 40 degrees", "relevant": ["ventilation"]},
+]
+
+
+def precision(docs, relevant):
+    if not docs:
+        return 0.0
+    phrases = [phrase.lower() for phrase in relevant]
+    hits = sum(any(phrase in doc.page_content.lower() for phrase in phrases) for doc in docs)
+    return hits / len(docs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hybrid BM25 + vector retrieval.")
+    parser.add_argument("--queries", type=str, help="Labelled JSONL query file.")
+    parser.add_argument("--k", type=int, default=2, help="Documents retrieved per query.")
+    parser.add_argument("--output", type=str, help="Write the results as JSON to this path.")
+    args = parser.parse_args()
+
+    retriever.initialize()
+    if not retriever.lexical_index:
+        print("❌ No BM25 index found; run utils/documents_ingestor.py first.")
+        return
+
+    labelled = DEFAULT_QUERIES
+    if args.queries:
+        with open(args.queries, "r", encoding="utf-8") as file:
+            labelled = [json.loads(line) for line in file if line.strip()]
+
+    lexical_ms = []
+    report = {"k": args.k, "queries": len(labelled), "vector_precision": 0.0, "hybrid_precision": 0.0}
+    for item in labelled:
+        for _ in range(20):
+            start = time.perf_counter()
+            retriever.lexical_index.search(item["query"], k=20)
+            lexical_ms.append((time.perf_counter() - start) * 1000)
+
+        embedding = retriever.embeddings.embed_query(item["query"])
+        vector_docs = retriever.retrieve(item["query"], embedding, k=args.k, search_mode="vector")
+        hybrid_docs = retriever.retrieve(item["query"], embedding, k=args.k, search_mode="hybrid")
+        report["vector_precision"] += precision(vector_docs, item.get("relevant", [])) / len(labelled)
+        report["hybrid_precision"] += precision(hybrid_docs, item.get("relevant", [])) / len(labelled)
+
+    report["bm25_p50_ms"] = float(np.percentile(lexical_ms, 50))
+    report["bm25_p99_ms"] = float(np.percentile(lexical_ms, 99))
+    report["indexed_chunks"] = len(retriever.lexical_index)
+
+    print(f"BM25 lookup over {report['indexed_chunks']} chunks: "
+          f"p50 {report['bm25_p50_ms']:.3f} ms, p99 {report['bm25_p99_ms']:.3f} ms")
+    print(f"precision@{args.k} vector: {report['vector_precision']:.3f}, hybrid: {report['hybrid_precision']:.3f}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Compare peak memory of eager and page-streaming PDF ingestion.
+
+Writes synthetic text PDFs of increasing page counts, then loads and splits
+each one in a fresh subprocess, either eagerly (loader.load() and a full
+chunk list, as before) or through the streaming page pipeline. Peak RSS
+growth over the post-import baseline is reported per size; with streaming
+it should stay flat as the page count grows. No embedding is done.
+"""
+import os
+import sys
+import json
+import argparse
+import resource
+import tempfile
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from utils.synthetic_corpus import write_synthetic_pdf
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def run_child(mode, pdf_path):
+    from utils.documents_ingestor import DocumentIngester
+    baseline = peak_rss_mb()
+    if mode == "eager":
+        pages = DocumentIngester.load_document(pdf_path)
+        chunks = DocumentIngester.split_documents(pages)
+        count = len(chunks)
+    else:
+        count = sum(1 for _ in DocumentIngester.iter_chunks(DocumentIngester.iter_pages(pdf_path)))
+    print(json.dumps({"chunks": count, "baseline_mb": baseline, "peak_mb": peak_rss_mb()}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark peak memory of PDF ingestion.")
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--modes", nargs="+", default=["eager", "stream"])
+    parser.add_argument("--output", type=str, help="Write the results as JSON to this path.")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for pages in args.pages:
+            pdf_path = os.path.join(tmp_dir, f"synthetic_{pages}.pdf")
+            write_synthetic_pdf(pdf_path, pages)
+            report[pages] = {"pdf_mb": os.path.getsize(pdf_path) / 2**20}
+            for mode in args.modes:
+                output = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--child", mode, pdf_path],
+                    capture_output=True, text=True, check=True
+                ).stdout
+                stats = json.loads(output.strip().splitlines()[-1])
+                stats["growth_mb"] = stats["peak_mb"] - stats["baseline_mb"]
+                report[pages][mode] = stats
+
+    print(f"{'pages':>7}{'pdf MB':>8}" + "".join(f"{mode + ' +MB':>14}" for mode in args.modes))
+    for pages, stats in report.items():
+        print(f"{pages:>7}{stats['pdf_mb']:>8.1f}" + "".join(f"{stats[mode]['growth_mb']:>14.1f}" for mode in args.modes))
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Measure how document loading and splitting scales with worker processes.
+
+Runs the ingester's load + split stage (no embedding, no writes) over the
+source documents once per worker count, reports throughput and speedup
+over one worker, and checks that every run produced the same chunk IDs in
+the same order.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from utils.ingestor_prepator import CONST
+from utils.ingest_manifest import chunk_id
+from utils.documents_ingestor import DocumentIngester
+
+
+def run(file_paths, workers):
+    start = time.perf_counter()
+    ids, failed = [], 0
+    for file_path, chunks, error, _ in DocumentIngester.prepare_files(file_paths, workers, stream=False):
+        if error:
+            failed += 1
+            continue
+        ids.extend(chunk_id(os.path.basename(file_path), chunk) for chunk in chunks)
+    return time.perf_counter() - start, ids, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel loading and splitting.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--source-dir", type=str, default=CONST.SOURCE_DOCS_DIR)
+    parser.add_argument("--repeat", type=int, default=1, help="Process the file list this many times per run.")
+    parser.add_argument("--output", type=str, help="Write the results as JSON to this path.")
+    args = parser.parse_args()
+
+    file_paths = sorted(
+        os.path.join(args.source_dir, f) for f in os.listdir(args.source_dir)
+        if os.path.isfile(os.path.join(args.source_dir, f))
+    ) * args.repeat
+    if not file_paths:
+        print(f"❌ No documents found in {args.source_dir}")
+        return
+
+    report = {"files": len(file_paths), "cpu_count": os.cpu_count(), "runs": {}}
+    reference_ids = None
+    for workers in sorted(set(args.workers)):
+        seconds, ids, failed = run(file_paths, workers)
+        if reference_ids is None:
+            reference_ids, baseline = ids, seconds
+        report["runs"][workers] = {
+            "seconds": seconds,
+            "files_per_sec": len(file_paths) / seconds,
+            "chunks": len(ids),
+            "failed": failed,
+            "speedup": baseline / seconds,
+            "deterministic": ids == reference_ids
+        }
+
+    print(f"{'workers':>8}{'seconds':>10}{'files/s':>10}{'chunks':>8}{'speedup':>9}  same output")
+    for workers, stats in report["runs"].items():
+        print(f"{workers:>8}{stats['seconds']:>10.2f}{stats['files_per_sec']:>10.2f}{stats['chunks']:>8}"
+              f"{stats['speedup']:>8.2f}x  {stats['deterministic']}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
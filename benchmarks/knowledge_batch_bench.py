@@ -0,0 +1,99 @@
+"""Compare single-query and batched knowledge retrieval throughput."""
+import os
+import sys
+import json
+import time
+import argparse
+
+# Make the knowledge server and 'utils' importable
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "mcp"))
+
+from knowledge_mcp_server import retriever
+
+SAMPLE_QUERIES = [
+    "my neck hurts while driving",
+    "how do I avoid neck strain",
+    "what causes pelvis drift on long trips",
+    "best lumbar support position for lower back pain",
+    "is seat ventilation useful when the cabin is very hot",
+    "how does fatigue affect sitting posture",
+    "recommended backrest angle for highway driving",
+    "how often should the driver change posture",
+]
+
+
+def load_queries(path):
+    """Load queries from a text file (one per line) or a JSONL file with a 'query' field."""
+    if not path:
+        return list(SAMPLE_QUERIES)
+    queries = []
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            if path.endswith(".jsonl"):
+                queries.append(json.loads(line)["query"])
+            else:
+                queries.append(line)
+    return queries
+
+
+def run_single(queries, k):
+    start = time.perf_counter()
+    for query in queries:
+        embedding = retriever.embeddings.embed_query(query)
+        retriever.vector_store.similarity_search_by_vector(embedding, k=k)
+    return time.perf_counter() - start
+
+
+def run_batch(queries, k, batch_size):
+    start = time.perf_counter()
+    for offset in range(0, len(queries), batch_size):
+        retriever.search_batch(queries[offset:offset + batch_size], k=k)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark get_knowledge vs get_knowledge_batch retrieval.")
+    parser.add_argument("--queries", type=str, help="Query file (.txt one per line, or .jsonl with 'query').")
+    parser.add_argument("--repeat", type=int, default=16, help="Repeat the query set to build a larger workload.")
+    parser.add_argument("--batch-size", type=int, default=64, help="Queries per batched call.")
+    parser.add_argument("--k", type=int, default=2, help="Documents retrieved per query.")
+    parser.add_argument("--output", type=str, help="Write the results as JSON to this path.")
+    args = parser.parse_args()
+
+    retriever.initialize()
+    queries = load_queries(args.queries) * args.repeat
+
+    # Warm up tokenizer and kernels so neither path pays first-call costs
+    run_batch(queries[:args.batch_size], args.k, args.batch_size)
+
+    single_seconds = run_single(queries, args.k)
+    batch_seconds = run_batch(queries, args.k, args.batch_size)
+
+    results = {
+        "queries": len(queries),
+        "k": args.k,
+        "batch_size": args.batch_size,
+        "single_seconds": single_seconds,
+        "batch_seconds": batch_seconds,
+        "single_qps": len(queries) / single_seconds,
+        "batch_qps": len(queries) / batch_seconds,
+        "speedup": single_seconds / batch_seconds
+    }
+
+    print(f"Single-query path: {results['single_qps']:.1f} queries/sec")
+    print(f"Batched path:      {results['batch_qps']:.1f} queries/sec")
+    print(f"Speedup:           {results['speedup']:.2f}x")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Compare the legacy and segmented system prompt layouts against a prefix-caching LLM.
+
+Both layouts are sent to the local stub LLM server (utils/stub_llm_server.py)
+or to any OpenAI-compatible --url, with the vehicle state drifting between
+requests as it does while driving. The legacy layout puts the vehicle state
+and tools before the static instructions, the way system_prompt.jinja2 did.
+For each layout the script reports prompt tokens, cached and uncached
+tokens, and the time to first streamed token.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+import numpy as np
+import requests
+from prompt_manager import PromptManager
+from utils.metadata_handler import MetadataHandler
+from utils.sample_catalog import sample_available_tools, sample_metadata
+from utils.stub_llm_server import StubLLMServer
+
+SAMPLE_QUERIES = [
+    "my neck hurts while driving",
+    "it is too hot in here",
+    "move the seat a bit forward",
+    "what do experts say about pelvis drift",
+]
+
+
+def build_prompts(layout, requests_count):
+    manager = PromptManager()
+    tools_description = manager.format_tools_description(sample_available_tools())
+    for step in range(requests_count):
+        state = MetadataHandler.format_metadata_for_prompt(sample_metadata(step))
+        segments = manager.get_system_prompt_segments(state, tools_description)
+        if layout == "legacy":
+            segments = segments[::-1]  # vehicle state, tools, then instructions
+        yield manager.join_segments(segments), SAMPLE_QUERIES[step % len(SAMPLE_QUERIES)]
+
+
+def stream_request(url, model, system_prompt, query):
+    """Time to first content token and the usage the server reports."""
+    start = time.perf_counter()
+    ttft, usage = None, {}
+    response = requests.post(f"{url}/chat/completions", stream=True, timeout=60, json={
+        "model": model,
+        "stream": True,
+        "stream_options": {"include_usage": True},
+        "messages": [{"role": "system", "content": system_prompt}, {"role": "user", "content": query}]
+    })
+    response.raise_for_status()
+    for line in response.iter_lines():
+        if not line.startswith(b"data: ") or line == b"data: [DONE]":
+            continue
+        chunk = json.loads(line[6:])
+        if ttft is None and any(choice["delta"].get("content") for choice in chunk.get("choices", [])):
+            ttft = time.perf_counter() - start
+        usage = chunk.get("usage") or usage
+    return ttft, time.perf_counter() - start, usage
+
+
+def run_layout(layout, url, model, requests_count, stub=None):
+    if stub:
+        stub.reset_cache()
+    rows = []
+    for system_prompt, query in build_prompts(layout, requests_count):
+        ttft, total, usage = stream_request(url, model, system_prompt, query)
+        cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+        rows.append({"ttft_ms": ttft * 1000, "total_ms": total * 1000,
+                     "prompt_tokens": usage.get("prompt_tokens", 0), "cached_tokens": cached})
+    ttfts = [row["ttft_ms"] for row in rows]
+    prompt_tokens = sum(row["prompt_tokens"] for row in rows)
+    cached_tokens = sum(row["cached_tokens"] for row in rows)
+    return {
+        "requests": len(rows),
+        "prompt_tokens_mean": prompt_tokens / len(rows),
+        "uncached_tokens_mean": (prompt_tokens - cached_tokens) / len(rows),
+        "cache_hit_ratio": cached_tokens / prompt_tokens if prompt_tokens else 0.0,
+        "ttft_p50_ms": float(np.percentile(ttfts, 50)),
+        "ttft_p95_ms": float(np.percentile(ttfts, 95)),
+        "rows": rows
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prompt prefix caching of the system prompt layouts.")
+    parser.add_argument("--requests", type=int, default=40, help="Requests per layout; the vehicle state changes on each.")
+    parser.add_argument("--url", type=str, help="OpenAI-compatible base URL (default: start the local stub server).")
+    parser.add_argument("--model", type=str, default="stub")
+    parser.add_argument("--output", type=str, help="Write the results as JSON to this path.")
+    args = parser.parse_args()
+
+    stub = None if args.url else StubLLMServer().start()
+    url = args.url or stub.url
+    try:
+        report = {layout: run_layout(layout, url, args.model, args.requests, stub) for layout in ("legacy", "segmented")}
+    finally:
+        if stub:
+            stub.stop()
+
+    print(f"{'layout':>10}{'prompt tok':>12}{'uncached':>10}{'cached %':>10}{'TTFT p50':>10}{'TTFT p95':>10}")
+    for layout, stats in report.items():
+        print(f"{layout:>10}{stats['prompt_tokens_mean']:>12.0f}{stats['uncached_tokens_mean']:>10.0f}"
+              f"{stats['cache_hit_ratio']:>10.1%}{stats['ttft_p50_ms']:>9.1f}ms{stats['ttft_p95_ms']:>8.1f}ms")
+    legacy, segmented = report["legacy"], report["segmented"]
+    if legacy["uncached_tokens_mean"]:
+        print(f"Segmented vs legacy: uncached prompt tokens {segmented['uncached_tokens_mean'] / legacy['uncached_tokens_mean'] - 1:+.0%}, "
+              f"TTFT p50 {segmented['ttft_p50_ms'] / legacy['ttft_p50_ms'] - 1:+.0%}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
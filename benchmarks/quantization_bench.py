@@ -0,0 +1,102 @@
+"""Report memory and recall@k of float16/int8 embedding storage against float32.
+
+Stored chunk embeddings are loaded from the NumPy index (or the Chroma
+collection) and re-indexed in memory under each storage dtype. Queries are
+seeded mixtures of stored vectors so the run needs no embedding model.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+import numpy as np
+from utils.ingestor_prepator import CONST
+from utils.vector_backends import NumpyVectorStore, normalize_rows
+
+
+def load_vectors(source):
+    if source == "numpy":
+        store = NumpyVectorStore(CONST.NUMPY_INDEX_DIR, None, dtype=CONST.NUMPY_INDEX_DTYPE)
+        return store._full_vectors()
+    import chromadb
+    client = chromadb.PersistentClient(path=CONST.CHROMA_DB_DIR)
+    collection = client.get_collection("langchain")
+    return np.asarray(collection.get(include=["embeddings"])["embeddings"], dtype=np.float32)
+
+
+def make_queries(vectors, count, seed):
+    rng = np.random.default_rng(seed)
+    pairs = rng.integers(0, vectors.shape[0], size=(count, 2))
+    noise = rng.normal(scale=0.05, size=(count, vectors.shape[1])).astype(np.float32)
+    return normalize_rows(vectors[pairs[:, 0]] + vectors[pairs[:, 1]] + noise)
+
+
+def build_store(vectors, dtype, rescore_factor, index_dir):
+    store = NumpyVectorStore(index_dir, None, dtype=dtype, rescore_factor=rescore_factor)
+    ids = [str(i) for i in range(vectors.shape[0])]
+    store.add_embeddings(ids, vectors, ids=ids)
+    return store
+
+
+def evaluate(store, queries, k):
+    start = time.perf_counter()
+    results = store._query_rows(queries, k)
+    elapsed = time.perf_counter() - start
+    return [[row for row, _ in hits] for hits in results], elapsed * 1000 / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quantized embedding storage.")
+    parser.add_argument("--source", choices=["numpy", "chroma"], default=CONST.VECTOR_BACKEND, help="Where to read stored embeddings from.")
+    parser.add_argument("--queries", type=int, default=500, help="Number of synthetic queries.")
+    parser.add_argument("--k", type=int, default=5, help="Recall cut-off.")
+    parser.add_argument("--rescore-factor", type=int, default=CONST.NUMPY_RESCORE_FACTOR, help="Rescoring candidate multiplier.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, help="Write the results as JSON to this path.")
+    args = parser.parse_args()
+
+    vectors = normalize_rows(load_vectors(args.source))
+    if vectors.shape[0] == 0:
+        print("❌ No stored embeddings found; run utils/documents_ingestor.py first.")
+        return
+    queries = make_queries(vectors, args.queries, args.seed)
+
+    report = {"chunks": int(vectors.shape[0]), "dim": int(vectors.shape[1]), "k": args.k, "variants": {}}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        baseline = build_store(vectors, "float32", 0, os.path.join(tmp_dir, "float32"))
+        truth, _ = evaluate(baseline, queries, args.k)
+        baseline_bytes = baseline.memory_bytes()
+
+        variants = [("float32", 0), ("float16", 0), ("float16", args.rescore_factor),
+                    ("int8", 0), ("int8", args.rescore_factor)]
+        for dtype, rescore_factor in variants:
+            name = dtype if not rescore_factor else f"{dtype}+rescore x{rescore_factor}"
+            store = build_store(vectors, dtype, rescore_factor, os.path.join(tmp_dir, name.replace(" ", "_")))
+            found, per_query_ms = evaluate(store, queries, args.k)
+            recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(found, truth)])
+            report["variants"][name] = {
+                "memory_bytes": store.memory_bytes(),
+                "memory_reduction": 1 - store.memory_bytes() / baseline_bytes,
+                "recall_at_k": float(recall),
+                "recall_drop": float(1 - recall),
+                "per_query_ms": per_query_ms
+            }
+
+    print(f"{'variant':<22}{'memory':>12}{'saved':>8}{'recall@' + str(args.k):>11}{'ms/query':>10}")
+    for name, stats in report["variants"].items():
+        print(f"{name:<22}{stats['memory_bytes'] / 1024:>10.1f}KB{stats['memory_reduction']:>8.0%}"
+              f"{stats['recall_at_k']:>11.4f}{stats['per_query_ms']:>10.3f}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Measure how much per-query tool selection shrinks the tools section of the system prompt.
+
+Runs sample driver queries through ToolSelector over the offline tool
+catalog (utils/sample_catalog.py). For each query it prints the tools kept
+and the token count of the tools description before and after selection.
+"""
+import os
+import sys
+import json
+import argparse
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+import yaml
+from prompt_manager import PromptManager
+from tool_selector import ToolSelector
+from utils.context_packer import count_tokens
+from utils.sample_catalog import sample_available_tools
+
+SAMPLE_QUERIES = [
+    "it is too hot in here",
+    "what do experts say about neck strain",
+    "move the seat a bit forward",
+    "recline the backrest",
+    "I keep sliding down, my pelvis drifts",
+    "turn on a relaxing massage",
+    "why does my lower back hurt after long drives",
+    "I am getting sleepy",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-query tool selection.")
+    parser.add_argument("--embeddings", action="store_true", help="Score with the configured embedding model instead of BM25.")
+    parser.add_argument("--output", type=str, help="Write the results as JSON to this path.")
+    args = parser.parse_args()
+
+    with open(os.path.join(ROOT_DIR, "config.yaml"), "r") as file:
+        selection_config = yaml.safe_load(file).get("tool_selection", {})
+    embeddings = None
+    if args.embeddings:
+        from utils.embedding_backends import create_embeddings
+        embeddings = create_embeddings()
+
+    available_tools = sample_available_tools()
+    selector = ToolSelector(embeddings, top_n=selection_config.get("top_n", 3),
+                            min_score=selection_config.get("min_score", 0.2),
+                            rules=selection_config.get("rules", {}),
+                            always_include=selection_config.get("always_include", []))
+    full_tokens = count_tokens(PromptManager.format_tools_description(available_tools))
+
+    rows = []
+    for query in SAMPLE_QUERIES:
+        selected_tools, names = selector.select(query, available_tools)
+        tokens = count_tokens(PromptManager.format_tools_description(selected_tools))
+        rows.append({"query": query, "tools": names, "tools_tokens_full": full_tokens, "tools_tokens_selected": tokens})
+        print(f"{full_tokens:>5} -> {tokens:>4} tokens  {query!r}: {', '.join(names)}")
+
+    mean_selected = sum(row["tools_tokens_selected"] for row in rows) / len(rows)
+    print(f"Mean tools section: {full_tokens} -> {mean_selected:.0f} tokens ({mean_selected / full_tokens - 1:+.0%})")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"scoring": "embeddings" if embeddings else "bm25", "rows": rows}, file, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Compare the Chroma and NumPy vector backends on latency, RSS and cold start.
+
+Each backend is measured in its own subprocess so memory numbers do not mix.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+import numpy as np
+from utils.ingestor_prepator import CONST
+from utils.embedding_backends import create_embeddings
+from utils.vector_backends import NumpyVectorStore, normalize_rows, top_k_indices
+
+SAMPLE_QUERIES = [
+    "my neck hurts while driving",
+    "what causes pelvis drift on long trips",
+    "best lumbar support position for lower back pain",
+    "is seat ventilation useful when the cabin is very hot",
+    "how does fatigue affect sitting posture",
+    "recommended backrest angle for highway driving",
+    "UBA adjustment for upper back support",
+    "how often should the driver change posture",
+]
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB (Linux /proc, falling back to peak RSS)."""
+    try:
+        with open("/proc/self/status", "r") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def open_store(backend, embeddings):
+    if backend == "numpy":
+        return NumpyVectorStore(CONST.NUMPY_INDEX_DIR, embeddings, dtype=CONST.NUMPY_INDEX_DTYPE,
+                                rescore_factor=CONST.NUMPY_RESCORE_FACTOR)
+    from langchain_chroma import Chroma
+    return Chroma(persist_directory=CONST.CHROMA_DB_DIR, embedding_function=embeddings)
+
+
+def build_numpy_index(embeddings):
+    """Copy the Chroma collection (including stored embeddings) into the NumPy index."""
+    from langchain_chroma import Chroma
+    chroma = Chroma(persist_directory=CONST.CHROMA_DB_DIR, embedding_function=embeddings)
+    data = chroma._collection.get(include=["embeddings", "documents", "metadatas"])
+    store = NumpyVectorStore(CONST.NUMPY_INDEX_DIR, embeddings, dtype=CONST.NUMPY_INDEX_DTYPE,
+                             rescore_factor=CONST.NUMPY_RESCORE_FACTOR)
+    store.delete(store.get()["ids"])
+    store.add_embeddings(data["documents"], data["embeddings"], data["metadatas"], data["ids"])
+    store.persist()
+    print(f"✅ Built NumPy index with {store.count()} chunks in {CONST.NUMPY_INDEX_DIR}")
+
+
+def run_child(backend, k, runs):
+    """Measure one backend and print a JSON result line."""
+    embeddings = create_embeddings()
+    query_vectors = embeddings.embed_documents(SAMPLE_QUERIES)
+
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    store = open_store(backend, embeddings)
+    store.similarity_search_by_vector(query_vectors[0], k=k)
+    cold_start = time.perf_counter() - start
+    rss_after = current_rss_mb()
+
+    latencies = []
+    results = []
+    for run in range(runs):
+        for vector in query_vectors:
+            start = time.perf_counter()
+            docs = store.similarity_search_by_vector(vector, k=k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if run == 0:
+                results.append([doc.page_content for doc in docs])
+
+    exact_match = None
+    if backend == "numpy" and store.count():
+        # Independent float64 brute force over the stored vectors
+        matrix = store._full_vectors().astype(np.float64)
+        scores = matrix @ normalize_rows(query_vectors).astype(np.float64).T
+        exact = [[store.texts[row] for row in top_k_indices(scores[:, col], k)] for col in range(scores.shape[1])]
+        exact_match = exact == results
+
+    print(json.dumps({
+        "backend": backend,
+        "cold_start_ms": cold_start * 1000,
+        "rss_delta_mb": rss_after - rss_before,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "results": results,
+        "exact_match": exact_match
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Chroma vs NumPy vector backends.")
+    parser.add_argument("--build-numpy", action="store_true", help="Rebuild the NumPy index from the Chroma collection first.")
+    parser.add_argument("--k", type=int, default=2, help="Documents retrieved per query.")
+    parser.add_argument("--runs", type=int, default=50, help="Passes over the query set.")
+    parser.add_argument("--output", type=str, help="Write the results as JSON to this path.")
+    parser.add_argument("--child", choices=["chroma", "numpy"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.k, args.runs)
+        return
+
+    if args.build_numpy:
+        build_numpy_index(create_embeddings())
+
+    report = {}
+    for backend in ("chroma", "numpy"):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", backend, "--k", str(args.k), "--runs", str(args.runs)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        report[backend] = json.loads(output.strip().splitlines()[-1])
+
+    chroma_results = report["chroma"].pop("results")
+    numpy_results = report["numpy"].pop("results")
+    overlaps = [len(set(a) & set(b)) / max(len(b), 1) for a, b in zip(chroma_results, numpy_results)]
+    report["chroma_recall_vs_exact"] = sum(overlaps) / max(len(overlaps), 1)
+
+    for backend in ("chroma", "numpy"):
+        stats = report[backend]
+        print(f"{backend:>6}: cold start {stats['cold_start_ms']:.1f} ms, "
+              f"RSS +{stats['rss_delta_mb']:.1f} MB, p50 {stats['p50_ms']:.3f} ms, p99 {stats['p99_ms']:.3f} ms")
+    print(f"NumPy results identical to float64 brute force: {report['numpy']['exact_match']}")
+    print(f"Chroma recall@{args.k} vs exact search: {report['chroma_recall_vs_exact']:.3f}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""Replay a corpus of driver queries against the host's /query endpoint and report latency.
+
+The corpus is JSONL, one query per line: {"query": "...", "metadata": {...}}.
+metadata is optional; when present it is sent with the query and replaces the
+vehicle state file for that request. The load is either open-loop at --rate
+requests per second, with latency measured from each request's scheduled start
+so a slow host cannot hide its queueing delay, or closed-loop with
+--concurrency workers. Save runs with --output and diff two of them with
+--compare old.json new.json.
+"""
+import os
+import json
+import time
+import random
+import argparse
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+import numpy as np
+import requests
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CORPUS = os.path.join(ROOT_DIR, "SeatData", "sample_queries.jsonl")
+COMPARED_METRICS = ["throughput_rps", "latency_p50_ms", "latency_p95_ms", "latency_p99_ms", "latency_max_ms", "error_rate"]
+
+
+def load_corpus(path, query_field="query"):
+    corpus = []
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get(query_field):
+                corpus.append({"query": record[query_field], "metadata": record.get("metadata")})
+    if not corpus:
+        raise ValueError(f"No '{query_field}' entries in {path}")
+    return corpus
+
+
+def decision_type(status_code, body):
+    """What the host did with the query: the tool it used, a direct answer, or an error."""
+    if status_code != 200 or body.get("status") != "success":
+        return "error"
+    return body.get("tool_used") or "direct_response"
+
+
+class LoadTester:
+    def __init__(self, url, corpus, timeout=60.0):
+        self.url = url
+        self.corpus = corpus
+        self.timeout = timeout
+        self.local = threading.local()
+        self.results = []
+        self.lock = threading.Lock()
+
+    def _session(self):
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def send(self, index, scheduled=None):
+        """POST one corpus entry; latency counts from the scheduled start when there is one."""
+        entry = self.corpus[index % len(self.corpus)]
+        payload = {"query": entry["query"]}
+        if entry["metadata"] is not None:
+            payload["metadata"] = entry["metadata"]
+        start = time.perf_counter()
+        result = {"index": index, "query": entry["query"], "queue_ms": max(start - scheduled, 0.0) * 1000 if scheduled else 0.0}
+        try:
+            response = self._session().post(self.url, json=payload, timeout=self.timeout)
+            try:
+                body = response.json()
+            except ValueError:
+                body = {}
+            if not isinstance(body, dict):
+                body = {}
+            result.update(status=response.status_code, decision=decision_type(response.status_code, body),
+                          trace_id=response.headers.get("X-Trace-Id"),
+                          error=None if response.status_code == 200 else f"HTTP {response.status_code}: {str(body.get('error') or '')[:80]}")
+        except requests.RequestException as e:
+            result.update(status=None, decision="error", error=type(e).__name__)
+        finished = time.perf_counter()
+        result["latency_ms"] = (finished - (scheduled or start)) * 1000
+        with self.lock:
+            self.results.append(result)
+
+    def run_open_loop(self, rate, total, poisson=False, seed=0, max_workers=256):
+        """Start requests on a fixed schedule (or Poisson arrivals) regardless of how fast the host answers."""
+        rng = random.Random(seed)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            scheduled = time.perf_counter()
+            for index in range(total):
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self.send, index, scheduled)
+                scheduled += rng.expovariate(rate) if poisson else 1.0 / rate
+
+    def run_closed_loop(self, concurrency, total):
+        """Keep `concurrency` requests in flight until `total` have been sent."""
+        counter = iter(range(total))
+        counter_lock = threading.Lock()
+
+        def worker():
+            while True:
+                with counter_lock:
+                    index = next(counter, None)
+                if index is None:
+                    return
+                self.send(index)
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+
+def percentiles(latencies):
+    if not latencies:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0, "mean_ms": 0.0}
+    values = np.array(latencies)
+    return {
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+        "mean_ms": float(values.mean())
+    }
+
+
+def summarize(results, elapsed, settings):
+    latencies = [result["latency_ms"] for result in results]
+    overall = percentiles(latencies)
+    errors = [result for result in results if result["decision"] == "error"]
+    by_decision = {}
+    for decision in sorted({result["decision"] for result in results}):
+        decision_latencies = [result["latency_ms"] for result in results if result["decision"] == decision]
+        by_decision[decision] = {"count": len(decision_latencies), **percentiles(decision_latencies)}
+    return {
+        "settings": settings,
+        "requests": len(results),
+        "elapsed_seconds": elapsed,
+        "throughput_rps": (len(results) - len(errors)) / elapsed if elapsed else 0.0,
+        **{f"latency_{name}": value for name, value in overall.items()},
+        "queue_p95_ms": float(np.percentile([result["queue_ms"] for result in results], 95)) if results else 0.0,
+        "error_rate": len(errors) / len(results) if results else 0.0,
+        "errors": dict(Counter(result["error"] for result in errors)),
+        "by_decision": by_decision,
+        "slowest": [
+            {"latency_ms": result["latency_ms"], "query": result["query"], "trace_id": result.get("trace_id")}
+            for result in sorted(results, key=lambda result: result["latency_ms"], reverse=True)[:5]
+        ]
+    }
+
+
+def print_report(report):
+    print(f"Requests: {report['requests']} in {report['elapsed_seconds']:.1f}s, "
+          f"throughput {report['throughput_rps']:.2f} req/s, errors {report['error_rate']:.1%}")
+    print(f"Latency: p50 {report['latency_p50_ms']:.0f}ms, p95 {report['latency_p95_ms']:.0f}ms, "
+          f"p99 {report['latency_p99_ms']:.0f}ms, max {report['latency_max_ms']:.0f}ms "
+          f"(queueing p95 {report['queue_p95_ms']:.0f}ms)")
+    print(f"{'decision':>26}{'count':>7}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for decision, stats in report["by_decision"].items():
+        print(f"{decision:>26}{stats['count']:>7}{stats['p50_ms']:>7.0f}ms{stats['p95_ms']:>7.0f}ms{stats['p99_ms']:>7.0f}ms")
+    for error, count in report["errors"].items():
+        print(f"❌ {count} x {error}")
+    traced = [slow for slow in report["slowest"] if slow["trace_id"]]
+    if traced:
+        print("Slowest traces (python utils/tracing.py waterfall <trace_id>):")
+        for slow in traced:
+            print(f"  {slow['trace_id']}  {slow['latency_ms']:.0f}ms  {slow['query'][:60]}")
+
+
+def compare(old_path, new_path):
+    """Print the change of each headline metric between two saved runs."""
+    with open(old_path, "r") as file:
+        old = json.load(file)
+    with open(new_path, "r") as file:
+        new = json.load(file)
+    print(f"{'metric':>30}{'old':>12}{'new':>12}{'change':>10}")
+    for metric in COMPARED_METRICS:
+        change = f"{new[metric] / old[metric] - 1:+.1%}" if old[metric] else "n/a"
+        print(f"{metric:>30}{old[metric]:>12.2f}{new[metric]:>12.2f}{change:>10}")
+    for decision in sorted(set(old["by_decision"]) | set(new["by_decision"])):
+        old_p95 = old["by_decision"].get(decision, {}).get("p95_ms")
+        new_p95 = new["by_decision"].get(decision, {}).get("p95_ms")
+        print(f"{decision + ' p95':>30}{old_p95 or 0:>12.2f}{new_p95 or 0:>12.2f}"
+              f"{f'{new_p95 / old_p95 - 1:+.1%}' if old_p95 and new_p95 else 'n/a':>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the host's /query endpoint by replaying a query corpus.")
+    parser.add_argument("--corpus", type=str, default=DEFAULT_CORPUS, help="JSONL file of queries (and optional metadata).")
+    parser.add_argument("--query-field", type=str, default="query", help="Field of each corpus line that holds the query.")
+    parser.add_argument("--url", type=str, help="Query endpoint (default: the host port from config.yaml).")
+    parser.add_argument("--rate", type=float, help="Open-loop arrival rate in requests per second.")
+    parser.add_argument("--poisson", action="store_true", help="Exponential inter-arrival times instead of a fixed interval.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Closed-loop workers (used when --rate is not given).")
+    parser.add_argument("--requests", type=int, help="Requests to send (default: one pass over the corpus).")
+    parser.add_argument("--warmup", type=int, default=0, help="Requests sent first and left out of the report.")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, help="Write the report as JSON to this path.")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Diff two saved reports instead of running.")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    if not args.url:
+        with open(os.path.join(ROOT_DIR, "config.yaml"), "r") as file:
+            args.url = f"http://localhost:{yaml.safe_load(file)['server']['port']}/query"
+    corpus = load_corpus(args.corpus, args.query_field)
+    total = args.requests or len(corpus)
+
+    tester = LoadTester(args.url, corpus, timeout=args.timeout)
+    if args.warmup:
+        tester.run_closed_loop(min(args.concurrency, args.warmup), args.warmup)
+        tester.results = []
+
+    mode = f"open loop at {args.rate} req/s" if args.rate else f"closed loop with {args.concurrency} workers"
+    print(f"🚀 Sending {total} queries from {os.path.basename(args.corpus)} to {args.url} ({mode})")
+    start = time.perf_counter()
+    if args.rate:
+        tester.run_open_loop(args.rate, total, poisson=args.poisson, seed=args.seed)
+    else:
+        tester.run_closed_loop(args.concurrency, total)
+    elapsed = time.perf_counter() - start
+
+    settings = {"url": args.url, "corpus": args.corpus, "rate": args.rate, "poisson": args.poisson,
+                "concurrency": None if args.rate else args.concurrency, "requests": total}
+    report = summarize(tester.results, elapsed, settings)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({**report, "results": sorted(tester.results, key=lambda result: result["index"])}, file, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
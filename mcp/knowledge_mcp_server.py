@@ -6,17 +6,29 @@ import os
 
 # Add the parent directory of 'utils' to sys.path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import json
 import yaml
+import time
 import logging
+import threading
+from typing import Any, Dict, List, Optional, Union
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
 from fastmcp import FastMCP
 import uvicorn
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
 from utils.ingestor_prepator import CONST
+from utils.embedding_backends import create_embeddings
 from utils.metadata_handler import MetadataHandler
+from utils.semantic_cache import SemanticCache
+from utils.context_packer import ContextPacker
+from utils.prefetch import StatePrefetcher, format_state_value
+from utils.vector_backends import NumpyVectorStore
+from utils.bm25_index import BM25Index, reciprocal_rank_fusion_scores
+from utils.topic_tagger import chroma_where, matches_filter, resolve_filter
+from utils.tracing import add_fastapi_tracing, create_tracer
 from dotenv import load_dotenv
-from langchain.schema import HumanMessage, SystemMessage
+from langchain.schema import Document, HumanMessage, SystemMessage
 
 # Load environment variables
 load_dotenv()
@@ -35,59 +47,353 @@ with open(config_path, 'r') as file:
 config.update({
     "metadata_path": os.path.abspath(config["metadata"]),
 })
+cache_config = config.get("semantic_cache", {})
+retrieval_config = config.get("retrieval", {})
+startup_config = config.get("startup", {})
+prefetch_config = config.get("prefetch", {})
+packing_config = config.get("context_packing", {})
+
+context_packer = ContextPacker(
+    token_budget=packing_config.get("token_budget", 600),
+    max_overlap_chars=packing_config.get("max_overlap_chars", 200)
+)
+
+def distance_to_similarity(distance: float) -> float:
+    """Chroma distance to a cosine similarity (embeddings are unit length, so squared L2 = 2 - 2 cos)."""
+    if CONST.HNSW_METADATA.get("hnsw:space", "l2") == "cosine":
+        return 1.0 - distance
+    return 1.0 - distance / 2.0
 
 app = FastAPI(title="Knowledge MCP Server")
 mcp = FastMCP(app)
+tracer = create_tracer("knowledge", config.get("tracing", {}))
+add_fastapi_tracing(app, tracer)
 
 class KnowledgeRetriever:
     def __init__(self):
+        self.embeddings = None
         self.vector_store = None
+        self.lexical_index = None
         self.metadata_handler = None
+        self.semantic_cache = None
+        self.prefetcher = None
+        self.index_version = None  # marker mtime the loaded indexes match, None before any ingest
         self.initialized = False
+        self.ready = threading.Event()
+        self.startup_started = False
+        self.stages = {}
+        self.startup_error = None
+        
+    def _run_stage(self, name, func):
+        """Run one startup stage and record its status and duration."""
+        self.stages[name] = {"status": "running"}
+        start = time.perf_counter()
+        try:
+            result = func()
+        except Exception:
+            self.stages[name] = {"status": "failed", "duration_ms": round((time.perf_counter() - start) * 1000, 1)}
+            raise
+        self.stages[name] = {"status": "done", "duration_ms": round((time.perf_counter() - start) * 1000, 1)}
+        logging.info("⏱️ Startup stage '%s' took %.1f ms", name, self.stages[name]["duration_ms"])
+        return result
+    
+    def _open_vector_store(self):
+        if CONST.VECTOR_BACKEND == "numpy":
+            return NumpyVectorStore(
+                CONST.NUMPY_INDEX_DIR,
+                self.embeddings,
+                dtype=CONST.NUMPY_INDEX_DTYPE,
+                rescore_factor=CONST.NUMPY_RESCORE_FACTOR
+            )
+        from langchain_chroma import Chroma
+        return Chroma(
+            persist_directory=CONST.CHROMA_DB_DIR,
+            embedding_function=self.embeddings,
+            collection_metadata=CONST.HNSW_METADATA
+        )
         
     def initialize(self):
         """Initialize the vector store and metadata handler"""
         try:
             logging.info("Initializing Knowledge Retriever...")
+            # Read the marker before opening the stores, so an ingest finishing
+            # while they load still counts as a change to reload
+            self.index_version = self.read_index_version()
             
             # Initialize embeddings
-            embeddings = HuggingFaceEmbeddings(
-                model_name=CONST.SELECTED_EMBEDDING_MODEL,
-                cache_folder=CONST.CHROMA_DB_DIR
-            )
+            self.embeddings = self._run_stage("embeddings", create_embeddings)
             
             # Initialize vector store
-            self.vector_store = Chroma(
-                persist_directory=CONST.CHROMA_DB_DIR,
-                embedding_function=embeddings
-            )
+            self.vector_store = self._run_stage("vector_store", self._open_vector_store)
             
             # Initialize metadata handler
-            self.metadata_handler = MetadataHandler(config["metadata_path"])
+            self.metadata_handler = self._run_stage(
+                "metadata", lambda: MetadataHandler(config["metadata_path"])
+            )
+            
+            # Initialize semantic cache
+            if cache_config.get("enabled", True):
+                self.semantic_cache = SemanticCache(
+                    similarity_threshold=cache_config.get("similarity_threshold", 0.92),
+                    max_entries=cache_config.get("max_entries", 512),
+                    ttl_seconds=cache_config.get("ttl_seconds", 600),
+                    dtype=cache_config.get("dtype", "float32"),
+                    version_path=CONST.INDEX_VERSION_FILE
+                )
+            
+            # Initialize lexical index
+            self._run_stage("lexical_index", self.load_lexical_index)
             
             self.initialized = True
             logging.info("✅ Knowledge Retriever initialized successfully!")
             
         except Exception as e:
             logging.error(f"Failed to initialize Knowledge Retriever: {str(e)}")
+            self.startup_error = str(e)
             raise
 
+    def warm_up(self):
+        """Run representative queries so tokenizer and kernel setup is paid before real traffic."""
+        queries = startup_config.get("warmup_queries", [])
+        if not queries:
+            return
+        self.embeddings.embed_documents(queries)
+        for query in queries:
+            query_embedding = self.embeddings.embed_query(query)
+            self.retrieve(query, query_embedding, k=2, search_mode=retrieval_config.get("mode", "vector"))
+
+    def startup(self):
+        """Staged startup: load models and indexes, warm up, then mark the retriever ready."""
+        self.startup_started = True
+        try:
+            self.initialize()
+            self._run_stage("warmup", self.warm_up)
+            if prefetch_config.get("enabled", True):
+                self._run_stage("prefetch", self.start_prefetch)
+            logging.info("✅ Knowledge Retriever ready to serve queries")
+        except Exception as e:
+            logging.error(f"Knowledge Retriever startup failed: {str(e)}")
+            self.startup_error = self.startup_error or str(e)
+        finally:
+            self.ready.set()
+
+    def start_prefetch(self):
+        """Prefetch for the current vehicle state, then follow metadata changes."""
+        self.prefetcher = StatePrefetcher(
+            retrieve_fn=self.prefetch_retrieve,
+            embed_fn=self.embeddings.embed_query,
+            field_queries=prefetch_config.get("field_queries", {}),
+            match_threshold=prefetch_config.get("match_threshold", 0.85),
+            search_mode=retrieval_config.get("mode", "vector")
+        )
+        self.prefetcher.prefetch_all(self.metadata_handler.load_latest_metadata())
+        self.metadata_handler.subscribe(self.prefetcher.on_metadata_change)
+        self.metadata_handler.watch(prefetch_config.get("poll_interval_seconds", 1.0))
+
+    def prefetch_retrieve(self, query: str, field: str, value):
+        """Retrieval for a prefetch query, restricted to the topics its state value implies."""
+        k = prefetch_config.get("k", 4)
+        search_mode = retrieval_config.get("mode", "vector")
+        query_embedding = self.embeddings.embed_query(query)
+        resolved_filter = resolve_filter(f"{field}: {format_state_value(value)}")
+        docs = self.retrieve(query, query_embedding, k=k, search_mode=search_mode, resolved_filter=resolved_filter)
+        if resolved_filter and len(docs) < k:
+            docs = self.retrieve(query, query_embedding, k=k, search_mode=search_mode)
+        return docs
+
+    def wait_until_ready(self, timeout: float = None) -> bool:
+        """Block until startup has finished; False if it failed or timed out.
+
+        Callers that only ran initialize() (scripts, tests) never start the staged
+        startup, so there is nothing to wait for.
+        """
+        if not self.startup_started:
+            return self.initialized
+        if timeout is None:
+            timeout = startup_config.get("ready_timeout_seconds", 60)
+        self.ready.wait(timeout)
+        return self.initialized
+
+    @staticmethod
+    def read_index_version():
+        """mtime of the ingester's index marker, None when nothing has been ingested yet."""
+        if not os.path.exists(CONST.INDEX_VERSION_FILE):
+            return None
+        return os.path.getmtime(CONST.INDEX_VERSION_FILE)
+
+    def refresh_if_reingested(self) -> bool:
+        """Reload on-disk indexes after the ingester has rewritten them; True if they were reloaded."""
+        current_version = self.read_index_version()
+        if current_version is None or current_version == self.index_version:
+            return False
+        # initialize() records the version before opening the stores, so any change
+        # seen here (including the first ingest after an empty start) needs a reload
+        self.index_version = current_version
+        self.reload_vector_store()
+        self.load_lexical_index()
+        if self.prefetcher:
+            self.reprefetch()
+        return True
+
+    def reload_vector_store(self):
+        """Pick up the ingester's writes: reload the NumPy arrays or reopen the Chroma collection.
+
+        Resets and snapshot imports drop and recreate the Chroma collection, so
+        a handle opened before them points at a collection ID that no longer exists.
+        """
+        if isinstance(self.vector_store, NumpyVectorStore):
+            logging.info("♻️ Vector store changed on disk, reloading NumPy index")
+            self.vector_store.load()
+        else:
+            logging.info("♻️ Vector store changed on disk, reopening Chroma collection")
+            self.vector_store = self._open_vector_store()
+
+    def reprefetch(self):
+        """Drop prefetched documents and retrieve them again for the current vehicle state."""
+        self.prefetcher.invalidate()
+        threading.Thread(
+            target=self.prefetcher.prefetch_all,
+            args=(self.metadata_handler.load_latest_metadata(),),
+            name="knowledge-reprefetch",
+            daemon=True
+        ).start()
+
+    def invalidate_caches(self):
+        """Pick up a finished ingest now instead of on the next query, then re-prefetch."""
+        reloaded = self.refresh_if_reingested()
+        if self.semantic_cache:
+            self.semantic_cache.invalidate()
+        if self.prefetcher and not reloaded:
+            self.reprefetch()
+
+    def load_lexical_index(self):
+        """Load the BM25 index persisted by the ingester, if there is one."""
+        if os.path.exists(CONST.BM25_INDEX_PATH):
+            self.lexical_index = BM25Index.load(CONST.BM25_INDEX_PATH)
+            logging.info("Loaded BM25 index with %d chunks", len(self.lexical_index))
+        else:
+            self.lexical_index = None
+
+    def vector_search_with_ids(self, query_embedding, k: int, resolved_filter: Optional[Dict[str, Any]] = None):
+        """Top-k (id, Document) pairs from the vector store, restricted by an optional filter."""
+        if isinstance(self.vector_store, NumpyVectorStore):
+            hits = self.vector_store.search_ids_by_vector(query_embedding, k=k, resolved_filter=resolved_filter)
+            docs = self.vector_store.get(ids=[doc_id for doc_id, _ in hits])
+        else:
+            docs = self.vector_store._collection.query(
+                query_embeddings=[query_embedding],
+                n_results=k,
+                where=chroma_where(resolved_filter),
+                include=["documents", "metadatas"]
+            )
+            docs = {key: docs[key][0] for key in ("ids", "documents", "metadatas")}
+        return [
+            (doc_id, Document(page_content=content, metadata=metadata or {}))
+            for doc_id, content, metadata in zip(docs["ids"], docs["documents"], docs["metadatas"])
+        ]
+
+    def retrieve(self, query: str, query_embedding, k: int = 2, search_mode: str = "vector",
+                 resolved_filter: Optional[Dict[str, Any]] = None):
+        """Retrieve the top-k documents, optionally fusing BM25 and vector rankings."""
+        return [doc for doc, _ in self.retrieve_with_scores(query, query_embedding, k, search_mode, resolved_filter)]
+
+    def retrieve_with_scores(self, query: str, query_embedding, k: int = 2, search_mode: str = "vector",
+                             resolved_filter: Optional[Dict[str, Any]] = None):
+        """Top-k (Document, score) pairs, higher is better: cosine similarity, or the RRF score in hybrid mode."""
+        self.refresh_if_reingested()
+        if search_mode != "hybrid" or not self.lexical_index:
+            if isinstance(self.vector_store, NumpyVectorStore):
+                return self.vector_store.similarity_search_with_score_by_vector(query_embedding, k, resolved_filter)
+            hits = self.vector_store.similarity_search_by_vector_with_relevance_scores(
+                query_embedding, k=k, filter=chroma_where(resolved_filter)
+            )
+            return [(doc, distance_to_similarity(distance)) for doc, distance in hits]
+        
+        candidates = max(k, retrieval_config.get("candidates", 20))
+        vector_hits = self.vector_search_with_ids(query_embedding, candidates, resolved_filter)
+        lexical_hits = self.lexical_index.search(query, k=candidates)
+        fused = reciprocal_rank_fusion_scores(
+            [[doc_id for doc_id, _ in vector_hits], [doc_id for doc_id, _ in lexical_hits]],
+            rrf_k=retrieval_config.get("rrf_k", 60)
+        )
+        fused_ids = [doc_id for doc_id, _ in fused]
+        
+        docs_by_id = dict(vector_hits)
+        missing = [doc_id for doc_id in fused_ids if doc_id not in docs_by_id]
+        if missing:
+            fetched = self.vector_store.get(ids=missing, include=["documents", "metadatas"])
+            for doc_id, content, metadata in zip(fetched["ids"], fetched["documents"], fetched["metadatas"]):
+                docs_by_id[doc_id] = Document(page_content=content, metadata=metadata or {})
+        
+        # Lexical hits are not pre-filtered, so apply the filter to the fused ranking
+        fused_docs = [
+            (docs_by_id[doc_id], score) for doc_id, score in fused
+            if doc_id in docs_by_id and matches_filter(docs_by_id[doc_id].metadata, resolved_filter)
+        ]
+        return fused_docs[:k]
+
+    def search_batch(self, queries: List[str], k: int = 2, resolved_filter: Optional[Dict[str, Any]] = None):
+        """Embed all queries in one forward pass and search them in a single collection query.
+
+        Every hit has a "score", the cosine similarity to its query (higher is
+        better), whichever vector backend is configured.
+        """
+        self.refresh_if_reingested()
+        query_embeddings = self.embeddings.embed_documents(queries)
+        if isinstance(self.vector_store, NumpyVectorStore):
+            return [
+                [
+                    {
+                        "content": doc.page_content,
+                        "metadata": doc.metadata,
+                        "score": score,
+                        "relevance_rank": rank + 1
+                    }
+                    for rank, (doc, score) in enumerate(hits)
+                ]
+                for hits in self.vector_store.search_by_vectors(query_embeddings, k, resolved_filter)
+            ]
+        
+        results = self.vector_store._collection.query(
+            query_embeddings=query_embeddings,
+            n_results=k,
+            where=chroma_where(resolved_filter),
+            include=["documents", "metadatas", "distances"]
+        )
+        return [
+            [
+                {
+                    "content": content,
+                    "metadata": metadata or {},
+                    "score": distance_to_similarity(distance),
+                    "relevance_rank": rank + 1
+                }
+                for rank, (content, metadata, distance) in enumerate(zip(documents, metadatas, distances))
+            ]
+            for documents, metadatas, distances in zip(
+                results["documents"], results["metadatas"], results["distances"]
+            )
+        ]
+
 # Initialize the retriever
 retriever = KnowledgeRetriever()
 
 @mcp.tool()
-def get_knowledge(query: str, k: int = 2):
+def get_knowledge(query: str, k: int = 2, search_mode: str = None, filter: Union[str, Dict[str, Any]] = None):
     """
     Retrieve relevant knowledge from the vector database based on the query and generate a response.
     
     Args:
         query: The search query to find relevant documents
         k: Number of documents to retrieve (default: 2)
+        search_mode: "vector" or "hybrid" (BM25 + vector); defaults to the configured mode
+        filter: Restrict the search to a topic/source, e.g. {"topic": "posture", "source": "paper.pdf"}
+            or a vehicle-state hint such as "posture: pelvis drift"
     
     Returns:
         Dictionary containing the generated response, retrieved documents, and metadata
     """
-    if not retriever.initialized:
+    if not retriever.wait_until_ready():
         return {
             "error": "Knowledge retriever not initialized",
             "status": "error"
@@ -96,8 +402,49 @@ def get_knowledge(query: str, k: int = 2):
     try:
         logging.info("🔍 Retrieving knowledge for query: %s", query)
         
-        # Retrieve documents from vector store
-        retrieved_docs = retriever.vector_store.similarity_search(query, k=k)
+        # Get latest metadata
+        metadata = retriever.metadata_handler.load_latest_metadata()
+        formatted_metadata = retriever.metadata_handler.format_metadata_for_prompt(metadata)
+        
+        # Serve paraphrases of earlier queries from the semantic cache
+        with tracer.span("embed_query"):
+            query_embedding = retriever.embeddings.embed_query(query)
+        search_mode = search_mode or retrieval_config.get("mode", "vector")
+        resolved_filter = resolve_filter(filter)
+        filter_key = json.dumps(resolved_filter, sort_keys=True)
+        # The cached answer was generated from the formatted metadata, so all of it is part of the key
+        fingerprint = f"k={k}:{search_mode}:{filter_key}:" + retriever.metadata_handler.prompt_fingerprint(
+            formatted_metadata
+        )
+        if retriever.semantic_cache:
+            cached = retriever.semantic_cache.lookup(query_embedding, fingerprint)
+            if cached:
+                logging.info("⚡ Semantic cache hit (similarity %.3f)", cached["similarity"])
+                return {
+                    **cached["value"],
+                    "query": query,
+                    "driving_metadata": formatted_metadata,
+                    "cache_hit": True,
+                    "cache_similarity": cached["similarity"]
+                }
+        
+        # Reuse documents prefetched for the current vehicle state when the query matches it
+        retrieved_docs, retrieved_scores = None, None
+        if retriever.prefetcher and not resolved_filter:
+            retriever.refresh_if_reingested()
+            retrieved_docs = retriever.prefetcher.lookup(query_embedding, k, search_mode)
+            if retrieved_docs:
+                logging.info("📥 Served from state prefetch")
+        prefetch_hit = bool(retrieved_docs)
+        
+        # Retrieve documents from vector store (and the BM25 index in hybrid mode)
+        if not retrieved_docs:
+            with tracer.span("retrieve", search_mode=search_mode, k=k):
+                hits = retriever.retrieve_with_scores(
+                    query, query_embedding, k=k, search_mode=search_mode, resolved_filter=resolved_filter
+                )
+            retrieved_docs = [doc for doc, _ in hits]
+            retrieved_scores = [score for _, score in hits]
         
         if not retrieved_docs:
             return {
@@ -106,12 +453,17 @@ def get_knowledge(query: str, k: int = 2):
                 "query": query
             }
         
-        # Combine retrieved content
-        retrieved_context = "\n".join(doc.page_content for doc in retrieved_docs)
-        
-        # Get latest metadata
-        metadata = retriever.metadata_handler.load_latest_metadata()
-        formatted_metadata = retriever.metadata_handler.format_metadata_for_prompt(metadata)
+        # Pack retrieved content into the token budget, merging neighbouring chunks
+        if packing_config.get("enabled", True):
+            # Prefetched documents were scored against another query, so they are packed by rank
+            packed = context_packer.pack(retrieved_docs, retrieved_scores)
+            retrieved_context = packed["context"]
+            logging.info("📦 Packed %d chunks into %d tokens (%d saved)",
+                         packed["chunks_in"], packed["tokens_used"], packed["tokens_saved"])
+            context_tokens = {key: packed[key] for key in ("tokens_used", "tokens_naive", "tokens_saved", "spans_out")}
+        else:
+            retrieved_context = "\n".join(doc.page_content for doc in retrieved_docs)
+            context_tokens = None
         
         # Create the final query for the LLM
         final_query = f"""
@@ -125,7 +477,8 @@ def get_knowledge(query: str, k: int = 2):
         """
         
         # Use LLM to generate a response
-        response = retriever.llm.invoke([HumanMessage(content=final_query)])
+        with tracer.span("llm.knowledge_response", kind="client"):
+            response = retriever.llm.invoke([HumanMessage(content=final_query)])
         
         # Format retrieved content for response
         retrieved_content = [
@@ -143,9 +496,15 @@ def get_knowledge(query: str, k: int = 2):
             "response": response.content.strip(),
             "retrieved_documents": retrieved_content,
             "driving_metadata": formatted_metadata,
-            "total_documents": len(retrieved_content)
+            "total_documents": len(retrieved_content),
+            "cache_hit": False,
+            "prefetch_hit": prefetch_hit,
+            "context_tokens": context_tokens
         }
         
+        if retriever.semantic_cache:
+            retriever.semantic_cache.store(query_embedding, fingerprint, result)
+        
         logging.info("✅ Successfully retrieved and generated response")
         return result
         
@@ -156,6 +515,73 @@ def get_knowledge(query: str, k: int = 2):
             "status": "error"
         }
 
+def run_knowledge_batch(queries: List[str], k: int = 2, filter: Union[str, Dict[str, Any], None] = None):
+    """Shared implementation of the batch tool and HTTP route."""
+    if not retriever.wait_until_ready():
+        return {
+            "error": "Knowledge retriever not initialized",
+            "status": "error"
+        }
+    
+    if not queries:
+        return {
+            "status": "error",
+            "message": "No queries provided."
+        }
+    
+    try:
+        logging.info("🔍 Retrieving knowledge for batch of %d queries", len(queries))
+        batch_results = retriever.search_batch(queries, k=k, resolved_filter=resolve_filter(filter))
+        
+        result = {
+            "status": "success",
+            "results": [
+                {
+                    "query": query,
+                    "retrieved_documents": documents,
+                    "total_documents": len(documents)
+                }
+                for query, documents in zip(queries, batch_results)
+            ],
+            "total_queries": len(queries)
+        }
+        
+        logging.info("✅ Successfully retrieved knowledge for %d queries", len(queries))
+        return result
+        
+    except Exception as e:
+        logging.error("❌ Error retrieving knowledge batch: %s", str(e))
+        return {
+            "error": f"Failed to retrieve knowledge batch: {str(e)}",
+            "status": "error"
+        }
+
+@mcp.tool()
+def get_knowledge_batch(queries: List[str], k: int = 2, filter: Union[str, Dict[str, Any]] = None):
+    """
+    Retrieve relevant documents for several queries at once, without generating responses.
+    
+    Args:
+        queries: The search queries, answered in the same order
+        k: Number of documents to retrieve per query (default: 2)
+        filter: Optional topic/source filter applied to every query (see get_knowledge)
+    
+    Returns:
+        Dictionary containing the retrieved documents for each query; each document has
+        content, metadata, relevance_rank and score (cosine similarity, higher is better)
+    """
+    return run_knowledge_batch(queries, k, filter)
+
+class KnowledgeBatchRequest(BaseModel):
+    queries: List[str]
+    k: int = 2
+    filter: Union[str, Dict[str, Any], None] = None
+
+@app.post("/knowledge/batch")
+def knowledge_batch(request: KnowledgeBatchRequest):
+    """HTTP route for batched retrieval"""
+    return run_knowledge_batch(request.queries, request.k, request.filter)
+
 @mcp.tool()
 def get_driving_metadata():
     """
@@ -165,7 +591,7 @@ def get_driving_metadata():
     Returns:
         Dictionary containing current driving metadata
     """
-    if not retriever.initialized:
+    if not retriever.wait_until_ready():
         return {
             "error": "Knowledge retriever not initialized",
             "status": "error"
@@ -193,6 +619,64 @@ def get_driving_metadata():
             "error": f"Failed to retrieve metadata: {str(e)}",
             "status": "error"
         }
+@app.on_event("startup")
+def start_retriever():
+    """Load models and indexes in the background so the port binds immediately"""
+    retriever.startup_started = True  # before the port binds, so early requests wait for readiness
+    threading.Thread(target=retriever.startup, name="knowledge-startup", daemon=True).start()
+
+@app.get("/ready")
+def get_readiness():
+    """Report readiness and the duration of each startup stage"""
+    body = {
+        "ready": retriever.ready.is_set() and retriever.initialized,
+        "stages": retriever.stages,
+        "error": retriever.startup_error
+    }
+    return JSONResponse(content=body, status_code=200 if body["ready"] else 503)
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    """Return semantic cache hit/miss counters"""
+    if not retriever.semantic_cache:
+        return {"enabled": False}
+    return {"enabled": True, **retriever.semantic_cache.stats()}
+
+@app.post("/cache/invalidate")
+def invalidate_cache():
+    """Reload indexes and drop cached results after an ingest (called by the ingest daemon)"""
+    if not retriever.initialized:
+        return JSONResponse(content={"status": "not_ready"}, status_code=503)
+    retriever.invalidate_caches()
+    return {"status": "ok", "index_version": retriever.index_version}
+
+@app.get("/prefetch/context")
+def get_prefetch_context():
+    """Return documents prefetched for the current vehicle state, keyed by metadata field"""
+    if not retriever.prefetcher:
+        return {"enabled": False, "context": {}}
+    return {
+        "enabled": True,
+        "context": {
+            field: {
+                "query": entry["query"],
+                "value": entry["value"],
+                "documents": [
+                    {"content": doc.page_content, "metadata": doc.metadata}
+                    for doc in entry["documents"]
+                ]
+            }
+            for field, entry in retriever.prefetcher.context().items()
+        }
+    }
+
+@app.get("/prefetch/stats")
+def get_prefetch_stats():
+    """Return prefetch hit/miss counters"""
+    if not retriever.prefetcher:
+        return {"enabled": False}
+    return {"enabled": True, **retriever.prefetcher.stats()}
+
 @app.get("/mcp/tools")
 def get_available_tools():
     """Return all available tools with their descriptions and parameters"""
@@ -211,11 +695,44 @@ def get_available_tools():
                         "type": "integer",
                         "description": "Number of documents to retrieve",
                         "default": 2
+                    },
+                    "search_mode": {
+                        "type": "string",
+                        "enum": ["vector", "hybrid"],
+                        "description": "Vector-only or hybrid BM25 + vector retrieval"
+                    },
+                    "filter": {
+                        "type": ["object", "string"],
+                        "description": "Restrict to a topic (posture, thermal, comfort, fatigue) and/or source file, e.g. {\"topic\": \"posture\"} or \"posture: pelvis drift\""
                     }
                 },
                 "required": ["query"]
             }
         },
+        {
+            "name": "get_knowledge_batch",
+            "description": "Retrieve relevant documents for several queries at once, returned in query order",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "queries": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "The search queries to find relevant documents for"
+                    },
+                    "k": {
+                        "type": "integer",
+                        "description": "Number of documents to retrieve per query",
+                        "default": 2
+                    },
+                    "filter": {
+                        "type": ["object", "string"],
+                        "description": "Optional topic/source filter applied to every query"
+                    }
+                },
+                "required": ["queries"]
+            }
+        },
         {
             "name": "get_driving_metadata",
             "description": "Get the current driving metadata without performing document retrieval",
@@ -224,8 +741,6 @@ def get_available_tools():
     ]
     return {"tools": tools_definitions}
 if __name__ == "__main__":
-    # Initialize the retriever before starting the server
-    retriever.initialize()
-    
+    # The retriever starts in the background from the app's startup hook
     # Start the server
     uvicorn.run("knowledge_mcp_server:app", host="0.0.0.0", port=5052, reload=False)
\ No newline at end of file
@@ -1,6 +1,10 @@
 import os
+import sys
 import logging
 from typing import Dict, Any
+
+# Add the repository root to sys.path for the shared utils package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from fastapi import FastAPI
 from fastmcp import FastMCP
 import uvicorn
@@ -11,6 +15,7 @@ from tools_definition import (
     get_ventilation_tool,
     get_pelvis_drift_tool
 )
+from utils.tracing import add_fastapi_tracing, create_tracer
 class MotorControlServer:
     """MCP Server for motor control with thermal and ventilation features."""
     
@@ -23,6 +28,8 @@ class MotorControlServer:
         """Initialize the server with FastAPI and FastMCP."""
         self.app = FastAPI(title="Motor MCP Server")
         self.mcp = FastMCP(self.app)
+        self.tracer = create_tracer("motor")
+        add_fastapi_tracing(self.app, self.tracer)
         self._setup_logging()
         self._register_endpoints()
         
@@ -1,19 +1,113 @@
 import os
+import hashlib
+import threading
 from jinja2 import Environment, FileSystemLoader
+from utils.context_packer import count_tokens
 
 class PromptManager:
     def __init__(self):
         # Set up Jinja2 environment
         template_dir = os.path.join(os.path.dirname(__file__), "prompts")
         self.env = Environment(loader=FileSystemLoader(template_dir))
+        self.lock = threading.Lock()
+        self.last_hashes = []
+        self.prefix_stats = {
+            "requests": 0,
+            "prefix_hits": 0,         # requests whose first segment matched the previous request
+            "prompt_tokens": 0,
+            "reused_prefix_tokens": 0,
+            "provider_cached_tokens": 0
+        }
+
+    @staticmethod
+    def _segment(name, content, static):
+        return {
+            "name": name,
+            "content": content,
+            "static": static,
+            "hash": hashlib.sha256(content.encode("utf-8")).hexdigest()[:16],
+            "tokens": count_tokens(content)
+        }
+
+    @staticmethod
+    def format_tools_description(available_tools):
+        """Describe discovered tools ({server: {"tools": [...]}}) for the LLM."""
+        tools_desc = "Available MCP Tools:\n\n"
         
-    def get_system_prompt(self, current_metadata, tools_description):
-        template = self.env.get_template("system_prompt.jinja2")
-        return template.render(
+        for server_name, server_info in available_tools.items():
+            tools_desc += f"=== {server_name.upper()} SERVER ===\n"
+            for tool in server_info["tools"]:
+                tools_desc += f"- {tool['name']}: {tool.get('description', 'No description')}\n"
+                if tool.get('parameters'):
+                    params = []
+                    for param_name, param_info in tool['parameters'].get('properties', {}).items():
+                        param_type = param_info.get('type', 'unknown')
+                        param_desc = param_info.get('description', '')
+                        params.append(f"{param_name} ({param_type}): {param_desc}")
+                    if params:
+                        tools_desc += f"  Parameters: {', '.join(params)}\n"
+                tools_desc += "\n"
+        
+        return tools_desc
+
+    def get_system_prompt_segments(self, current_metadata, tools_description, knowledge_context=""):
+        """The system prompt as ordered segments, stable ones first.
+
+        Instructions and the tool catalog only change on redeploy or tool
+        discovery, so they lead; the vehicle state and the knowledge prefetched
+        for it change all the time and come last. A state change then leaves the
+        prompt prefix byte-identical and provider-side prefix caches keep hitting.
+        """
+        state = self.env.get_template("system_state.jinja2").render(
             current_metadata=current_metadata,
-            tools_description=tools_description
+            knowledge_context=knowledge_context
         )
-        
+        return [
+            self._segment("instructions", self.env.get_template("system_instructions.jinja2").render(), True),
+            self._segment("tools", tools_description, True),
+            self._segment("vehicle_state", state, False)
+        ]
+
+    @staticmethod
+    def join_segments(segments):
+        return "\n\n".join(segment["content"] for segment in segments if segment["content"])
+
+    def get_system_prompt(self, current_metadata, tools_description, knowledge_context=""):
+        return self.join_segments(
+            self.get_system_prompt_segments(current_metadata, tools_description, knowledge_context)
+        )
+
+    def record_prompt(self, segments):
+        """Track how much of the prompt repeats the previous request's prefix; returns the reused tokens."""
+        hashes = [segment["hash"] for segment in segments]
+        reused = 0
+        with self.lock:
+            for segment, previous in zip(segments, self.last_hashes):
+                if segment["hash"] != previous:
+                    break
+                reused += segment["tokens"]
+            self.prefix_stats["requests"] += 1
+            self.prefix_stats["prefix_hits"] += int(reused > 0)
+            self.prefix_stats["prompt_tokens"] += sum(segment["tokens"] for segment in segments)
+            self.prefix_stats["reused_prefix_tokens"] += reused
+            self.last_hashes = hashes
+        return reused
+
+    def record_provider_usage(self, usage):
+        """Add the cached prompt tokens an OpenAI-compatible provider reported, if any."""
+        details = (usage or {}).get("prompt_tokens_details") or {}
+        with self.lock:
+            self.prefix_stats["provider_cached_tokens"] += details.get("cached_tokens") or 0
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.prefix_stats)
+            stats["segment_hashes"] = list(self.last_hashes)
+        stats["reused_prefix_ratio"] = (
+            stats["reused_prefix_tokens"] / stats["prompt_tokens"] if stats["prompt_tokens"] else 0.0
+        )
+        return stats
+
     def get_final_response_prompt(self, user_query, tool_result, reasoning):
         template = self.env.get_template("final_response.jinja2")
         return template.render(
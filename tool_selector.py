@@ -0,0 +1,143 @@
+import re
+import json
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from utils.bm25_index import BM25Index
+
+# name -> placeholder names used when a family of tools is collapsed into one entry
+FAMILY_PLACEHOLDERS = {"move": ("motor", "direction")}
+FAMILY_PATTERN = re.compile(r"^(?P<prefix>[a-z]+)_(?P<target>[a-z]+)_(?P<variant>[a-z]+)$")
+
+
+def collapse_families(tools: List[Dict], min_size: int = 3) -> List[Dict]:
+    """Replace tools like move_<motor>_<direction> that share one schema with a single parameterized entry."""
+    groups: Dict[Tuple[str, str], List[Tuple[Dict, re.Match]]] = {}
+    for tool in tools:
+        match = FAMILY_PATTERN.match(tool["name"])
+        if match:
+            key = (match["prefix"], json.dumps(tool.get("parameters", {}), sort_keys=True))
+            groups.setdefault(key, []).append((tool, match))
+
+    collapsed, emitted = [], set()
+    for tool in tools:
+        match = FAMILY_PATTERN.match(tool["name"])
+        key = (match["prefix"], json.dumps(tool.get("parameters", {}), sort_keys=True)) if match else None
+        if key is None or len(groups[key]) < min_size:
+            collapsed.append(tool)
+            continue
+        if key in emitted:
+            continue
+        emitted.add(key)
+        target_name, variant_name = FAMILY_PLACEHOLDERS.get(key[0], ("target", "variant"))
+        variants: Dict[str, List[str]] = {}
+        for _, member in groups[key]:
+            variants.setdefault(member["target"], []).append(member["variant"])
+        combinations = ", ".join(f"{target} {'|'.join(values)}" for target, values in variants.items())
+        collapsed.append({
+            "name": f"{key[0]}_<{target_name}>_<{variant_name}>",
+            "description": f"{tool.get('description', key[0]).split(' ')[0]} a {target_name} one step; "
+                           f"one tool per {target_name}/{variant_name}: {combinations}",
+            "parameters": tool.get("parameters", {}),
+            "members": [member_tool["name"] for member_tool, _ in groups[key]]
+        })
+    return collapsed
+
+
+class ToolSelector:
+    """Picks the tools relevant to a query so the prompt does not carry the whole catalog.
+
+    Tool descriptions are embedded once per discovered catalog; each query is
+    scored by cosine similarity (BM25 when no embedding model is available).
+    Keyword rules force a tool in regardless of score, and families of
+    near-identical tools are collapsed into one parameterized entry first.
+    When nothing scores above min_score and no rule fires, the whole catalog
+    is kept rather than leaving the model without tools.
+    """
+
+    def __init__(self, embeddings=None, top_n: int = 3, min_score: float = 0.2,
+                 rules: Optional[Dict[str, List[str]]] = None, always_include: Optional[List[str]] = None,
+                 family_min_size: int = 3):
+        self.embeddings = embeddings
+        self.top_n = top_n
+        self.min_score = min_score
+        self.rules = {
+            name: [re.compile(r"\b" + re.escape(keyword.lower())) for keyword in keywords]
+            for name, keywords in (rules or {}).items()
+        }
+        self.always_include = set(always_include or [])
+        self.family_min_size = family_min_size
+        self.catalog_hash = None
+        self.entries: List[Tuple[str, Dict]] = []  # (server, tool) in catalog order
+        self.matrix = None
+        self.lexical_index = None
+
+    @staticmethod
+    def _tool_text(tool: Dict) -> str:
+        params = ", ".join(tool.get("parameters", {}).get("properties", {}))
+        return f"{tool['name'].replace('_', ' ')}: {tool.get('description', '')} ({params})"
+
+    def index(self, available_tools: Dict):
+        """Collapse and embed the catalog; skipped when it has not changed since the last call."""
+        catalog_hash = hashlib.sha256(json.dumps(available_tools, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        if catalog_hash == self.catalog_hash:
+            return
+        self.entries = [
+            (server_name, tool)
+            for server_name, server_info in available_tools.items()
+            for tool in collapse_families(server_info.get("tools", []), self.family_min_size)
+        ]
+        texts = [self._tool_text(tool) for _, tool in self.entries]
+        self.matrix, self.lexical_index = None, None
+        if self.embeddings is not None and texts:
+            try:
+                vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+                self.matrix = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            except Exception as e:
+                logging.warning(f"⚠️ Could not embed tool descriptions, using keyword scoring: {str(e)}")
+        if self.matrix is None:
+            self.lexical_index = BM25Index()
+            for position, text in enumerate(texts):
+                self.lexical_index.add(str(position), text)
+        self.catalog_hash = catalog_hash
+
+    def _scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.entries), dtype=np.float32)
+        if self.matrix is not None:
+            vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+            scores = self.matrix @ (vector / max(np.linalg.norm(vector), 1e-12))
+        elif self.lexical_index is not None:
+            hits = self.lexical_index.search(query, k=len(self.entries))
+            top = max((score for _, score in hits), default=0.0) or 1.0
+            for position, score in hits:
+                scores[int(position)] = score / top
+        return scores
+
+    def _forced(self, query: str, tool: Dict) -> bool:
+        names = {tool["name"], *tool.get("members", [])}
+        if names & self.always_include:
+            return True
+        lowered = query.lower()
+        return any(pattern.search(lowered) for name in names for pattern in self.rules.get(name, []))
+
+    def select(self, query: str, available_tools: Dict) -> Tuple[Dict, List[str]]:
+        """The pruned catalog (same shape as available_tools, catalog order kept) and the selected names."""
+        self.index(available_tools)
+        scores = self._scores(query)
+        forced = [position for position, (_, tool) in enumerate(self.entries) if self._forced(query, tool)]
+        ranked = [
+            int(position) for position in np.argsort(-scores, kind="stable")
+            if position not in forced and scores[position] > self.min_score
+        ]
+        chosen = set(forced + ranked[:max(self.top_n - len(forced), 0)])
+        if not chosen:
+            chosen = set(range(len(self.entries)))
+
+        selected: Dict[str, Dict] = {}
+        for position, (server_name, tool) in enumerate(self.entries):
+            if position in chosen:
+                server = selected.setdefault(server_name, {**available_tools[server_name], "tools": []})
+                server["tools"].append({key: value for key, value in tool.items() if key != "members"})
+        return selected, [tool["name"] for position, (_, tool) in enumerate(self.entries) if position in chosen]
@@ -0,0 +1,98 @@
+import os
+import re
+import json
+import math
+import heapq
+from collections import Counter, defaultdict
+from operator import itemgetter
+from typing import Dict, List, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)?")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "i", "in", "is", "it",
+    "my", "of", "on", "or", "that", "the", "this", "to", "was", "what", "when", "while", "with"
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word/number tokens, keeping decimals like '42.5' intact."""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def reciprocal_rank_fusion_scores(rankings: List[List[str]], rrf_k: int = 60) -> List[Tuple[str, float]]:
+    """(id, fused score) pairs, best first; ids ranked high in any list float to the top."""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] += 1.0 / (rrf_k + rank + 1)
+    return sorted(scores.items(), key=itemgetter(1), reverse=True)
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], rrf_k: int = 60) -> List[str]:
+    """Fuse several ranked id lists into one ranking."""
+    return [doc_id for doc_id, _ in reciprocal_rank_fusion_scores(rankings, rrf_k)]
+
+
+class BM25Index:
+    """Okapi BM25 over chunk texts, held as an in-memory inverted index."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_ids: List[str] = []
+        self.doc_lengths: List[int] = []
+        self.postings: Dict[str, List[List[int]]] = {}
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def add(self, doc_id: str, text: str):
+        doc = len(self.doc_ids)
+        tokens = tokenize(text)
+        self.doc_ids.append(doc_id)
+        self.doc_lengths.append(len(tokens))
+        for term, tf in Counter(tokens).items():
+            self.postings.setdefault(term, []).append([doc, tf])
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Top-k (doc_id, score) pairs for the query."""
+        if not self.doc_ids:
+            return []
+        total_docs = len(self.doc_ids)
+        avg_length = sum(self.doc_lengths) / total_docs or 1.0
+        scores: Dict[int, float] = defaultdict(float)
+
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+            for doc, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc] / avg_length)
+                scores[doc] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        best = heapq.nlargest(k, scores.items(), key=itemgetter(1))
+        return [(self.doc_ids[doc], score) for doc, score in best]
+
+    def save(self, path: str):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({
+                "k1": self.k1,
+                "b": self.b,
+                "doc_ids": self.doc_ids,
+                "doc_lengths": self.doc_lengths,
+                "postings": self.postings
+            }, file, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        index = cls(k1=data["k1"], b=data["b"])
+        index.doc_ids = data["doc_ids"]
+        index.doc_lengths = data["doc_lengths"]
+        index.postings = data["postings"]
+        return index
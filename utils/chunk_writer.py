@@ -0,0 +1,81 @@
+import time
+import logging
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from langchain.schema import Document
+
+from utils.vector_backends import NumpyVectorStore
+
+
+class ChunkWriter:
+    """Embeds a stream of (id, chunk) pairs in fixed-size batches and upserts each batch immediately.
+
+    Only one batch of texts and vectors is held at a time, so memory stays
+    flat however many chunks flow through.
+    """
+
+    def __init__(self, vector_store, embeddings, batch_size: int = 8):
+        self.vector_store = vector_store
+        self.embeddings = embeddings
+        self.batch_size = max(1, batch_size)
+        self.chunks_written = 0
+        self.batch_times: List[float] = []
+        self.write_seconds = 0.0
+        self.started_at = None
+
+    def upsert(self, ids: List[str], texts: List[str], vectors, metadatas: List[Dict]):
+        """Write pre-computed vectors without embedding."""
+        if isinstance(self.vector_store, NumpyVectorStore):
+            self.vector_store.add_embeddings(texts, vectors, metadatas, ids)
+        else:
+            self.vector_store._collection.upsert(ids=ids, embeddings=vectors, documents=texts, metadatas=metadatas)
+
+    def _flush(self, batch: List[Tuple[str, Document]]):
+        ids = [doc_id for doc_id, _ in batch]
+        texts = [chunk.page_content for _, chunk in batch]
+        metadatas = [chunk.metadata for _, chunk in batch]
+
+        start = time.perf_counter()
+        vectors = self.embeddings.embed_documents(texts)
+        embedded = time.perf_counter()
+        self.upsert(ids, texts, vectors, metadatas)
+        self.write_seconds += time.perf_counter() - embedded
+
+        self.batch_times.append(embedded - start)
+        self.chunks_written += len(batch)
+        logging.debug(f"Embedded batch of {len(batch)} chunks in {(embedded - start) * 1000:.1f} ms")
+
+    def write(self, chunks: Iterable[Tuple[str, Document]]) -> int:
+        """Consume the stream; returns the number of chunks written."""
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+        written = self.chunks_written
+        batch = []
+        for item in chunks:
+            batch.append(item)
+            if len(batch) == self.batch_size:
+                self._flush(batch)
+                batch = []
+        if batch:
+            self._flush(batch)
+        return self.chunks_written - written
+
+    def stats(self) -> Dict[str, float]:
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        batch_ms = np.asarray(self.batch_times) * 1000
+        return {
+            "chunks": self.chunks_written,
+            "batches": len(self.batch_times),
+            "batch_size": self.batch_size,
+            "chunks_per_sec": self.chunks_written / elapsed if elapsed else 0.0,
+            "batch_embed_ms_mean": float(batch_ms.mean()) if len(batch_ms) else 0.0,
+            "batch_embed_ms_p95": float(np.percentile(batch_ms, 95)) if len(batch_ms) else 0.0,
+            "write_seconds": self.write_seconds
+        }
+
+    def summary(self) -> str:
+        stats = self.stats()
+        return (f"{stats['chunks']} chunks in {stats['batches']} batches of {stats['batch_size']}, "
+                f"{stats['chunks_per_sec']:.1f} chunks/s, embed {stats['batch_embed_ms_mean']:.1f} ms/batch "
+                f"(p95 {stats['batch_embed_ms_p95']:.1f} ms)")
@@ -0,0 +1,137 @@
+from typing import Any, Dict, List, Optional
+
+from langchain.schema import Document
+
+_ENCODING = None
+
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken when installed, else the ~4 characters per token estimate."""
+    global _ENCODING
+    if _ENCODING is None:
+        try:
+            import tiktoken
+            _ENCODING = tiktoken.get_encoding("cl100k_base")
+        except ImportError:
+            _ENCODING = False
+    if _ENCODING:
+        return len(_ENCODING.encode(text))
+    return (len(text) + 3) // 4
+
+
+def overlap_length(left: str, right: str, max_chars: int) -> int:
+    """Length of the longest suffix of left that is also a prefix of right (up to max_chars)."""
+    for size in range(min(len(left), len(right), max_chars), 0, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+class ContextPacker:
+    """Packs retrieved chunks into a token budget.
+
+    Chunks from the same source and page that are adjacent in the original
+    text are merged into one span with the splitter overlap removed. Spans
+    are then chosen greedily by retrieval score per token until the budget
+    is spent.
+    """
+
+    def __init__(self, token_budget: int = 600, max_overlap_chars: int = 200, min_overlap_chars: int = 20):
+        self.token_budget = token_budget
+        self.max_overlap_chars = max_overlap_chars
+        self.min_overlap_chars = min_overlap_chars
+
+    @staticmethod
+    def _span_key(document: Document):
+        return (document.metadata.get("source"), document.metadata.get("page"))
+
+    def _join(self, left: Dict[str, Any], right: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Text and start index of the two chunks merged, or None if they are not contiguous."""
+        left_start, right_start = left["start_index"], right["start_index"]
+        if left_start is not None and right_start is not None:
+            if right_start < left_start:
+                left, right = right, left
+                left_start, right_start = right_start, left_start
+            left_end = left_start + len(left["text"])
+            if right_start > left_end:
+                return None
+            return {"text": left["text"] + right["text"][left_end - right_start:], "start_index": left_start}
+        for first, second in ((left, right), (right, left)):
+            overlap = overlap_length(first["text"], second["text"], self.max_overlap_chars)
+            if overlap >= self.min_overlap_chars:
+                return {"text": first["text"] + second["text"][overlap:], "start_index": first["start_index"]}
+        return None
+
+    def merge_spans(self, documents: List[Document], scores: List[float]) -> List[Dict[str, Any]]:
+        """Group chunks into contiguous spans; each span keeps its best score and rank."""
+        groups: Dict[Any, List[Dict[str, Any]]] = {}
+        for rank, (document, score) in enumerate(zip(documents, scores)):
+            groups.setdefault(self._span_key(document), []).append({
+                "text": document.page_content,
+                "start_index": document.metadata.get("start_index"),
+                "metadata": document.metadata,
+                "score": score,
+                "rank": rank
+            })
+
+        spans = []
+        for chunks in groups.values():
+            if all(chunk["start_index"] is not None for chunk in chunks):
+                chunks.sort(key=lambda chunk: chunk["start_index"])
+            current = dict(chunks[0], chunks=1)
+            for chunk in chunks[1:]:
+                merged = self._join(current, chunk)
+                if merged is None:
+                    spans.append(current)
+                    current = dict(chunk, chunks=1)
+                    continue
+                current.update(
+                    merged,
+                    score=max(current["score"], chunk["score"]),
+                    rank=min(current["rank"], chunk["rank"]),
+                    chunks=current["chunks"] + 1
+                )
+            spans.append(current)
+        return spans
+
+    def pack(self, documents: List[Document], scores: Optional[List[float]] = None,
+             token_budget: Optional[int] = None) -> Dict[str, Any]:
+        """Build the context string for the given ranked documents.
+
+        Without explicit scores, rank r is scored 1 / (r + 1).
+        """
+        token_budget = token_budget or self.token_budget
+        if scores is None:
+            scores = [1.0 / (rank + 1) for rank in range(len(documents))]
+        naive_tokens = count_tokens("\n".join(doc.page_content for doc in documents))
+
+        spans = self.merge_spans(documents, scores)
+        for span in spans:
+            span["tokens"] = count_tokens(span["text"])
+
+        selected, used = [], 0
+        for span in sorted(spans, key=lambda span: span["score"] / max(span["tokens"], 1), reverse=True):
+            if used + span["tokens"] <= token_budget:
+                selected.append(span)
+                used += span["tokens"]
+        if not selected and spans:
+            # Nothing fits whole: keep the head of the best-ranked span
+            best = min(spans, key=lambda span: span["rank"])
+            keep_chars = len(best["text"]) * token_budget // max(best["tokens"], 1)
+            best = dict(best, text=best["text"][:keep_chars])
+            best["tokens"] = count_tokens(best["text"])
+            selected, used = [best], best["tokens"]
+        selected.sort(key=lambda span: span["rank"])
+
+        return {
+            "context": "\n\n".join(span["text"] for span in selected),
+            "spans": [
+                {"metadata": span["metadata"], "chunks": span["chunks"], "tokens": span["tokens"], "score": span["score"]}
+                for span in selected
+            ],
+            "tokens_used": used,
+            "tokens_naive": naive_tokens,
+            "tokens_saved": max(naive_tokens - used, 0),
+            "chunks_in": len(documents),
+            "spans_out": len(selected)
+        }
@@ -0,0 +1,146 @@
+import os
+import re
+import json
+import zlib
+import hashlib
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+MERSENNE_PRIME = (1 << 31) - 1
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text.lower()).strip()
+
+
+def shingles(text: str, size: int) -> Set[int]:
+    """CRC32 of each word n-gram (stable across processes, unlike hash())."""
+    words = text.split()
+    if len(words) < size:
+        return {zlib.crc32(text.encode("utf-8"))}
+    return {
+        zlib.crc32(" ".join(words[start:start + size]).encode("utf-8"))
+        for start in range(len(words) - size + 1)
+    }
+
+
+class NearDuplicateIndex:
+    """Corpus-wide exact and near-duplicate detection for chunks.
+
+    Exact duplicates are caught by a hash of the normalized text. Near
+    duplicates use MinHash signatures over word shingles with LSH banding:
+    chunks sharing any band bucket are candidates, and a candidate counts as
+    a duplicate when the estimated Jaccard similarity reaches the threshold.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 32, threshold: float = 0.8, shingle_size: int = 5, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self.perm_a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.perm_b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+        self.exact: Dict[str, str] = {}
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.hashes: Dict[str, str] = {}
+        self.buckets: Dict[str, Set[str]] = {}
+
+    def signature(self, text: str) -> np.ndarray:
+        values = np.fromiter(shingles(text, self.shingle_size), dtype=np.uint64)
+        # (a * x + b) mod p for every permutation and shingle; x < 2^32 and a < 2^31 so nothing overflows
+        hashed = (np.outer(self.perm_a, values) + self.perm_b[:, None]) % MERSENNE_PRIME
+        return hashed.min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> List[str]:
+        return [
+            f"{band}:{signature[band * self.rows:(band + 1) * self.rows].tobytes().hex()}"
+            for band in range(self.bands)
+        ]
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.hashes
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def find_duplicate(self, text: str) -> Optional[Dict]:
+        """The stored chunk this text duplicates, as {"duplicate_of", "kind", "similarity"}, or None."""
+        normalized = normalize_text(text)
+        text_hash = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+        if text_hash in self.exact:
+            return {"duplicate_of": self.exact[text_hash], "kind": "exact", "similarity": 1.0}
+
+        signature = self.signature(normalized)
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates |= self.buckets.get(key, set())
+        best = None
+        for candidate in candidates:
+            similarity = float(np.mean(self.signatures[candidate] == signature))
+            if similarity >= self.threshold and (best is None or similarity > best["similarity"]):
+                best = {"duplicate_of": candidate, "kind": "near", "similarity": similarity}
+        return best
+
+    def add(self, doc_id: str, text: str):
+        normalized = normalize_text(text)
+        self._index(doc_id, hashlib.sha1(normalized.encode("utf-8")).hexdigest(), self.signature(normalized))
+
+    def _index(self, doc_id: str, text_hash: str, signature: np.ndarray):
+        self.exact.setdefault(text_hash, doc_id)
+        self.hashes[doc_id] = text_hash
+        self.signatures[doc_id] = signature
+        for key in self._band_keys(signature):
+            self.buckets.setdefault(key, set()).add(doc_id)
+
+    def remove(self, doc_ids: Iterable[str]) -> Dict[str, tuple]:
+        """Drop fingerprints; returns them as {doc_id: (text_hash, signature)} for restore()."""
+        removed = {}
+        for doc_id in doc_ids:
+            text_hash = self.hashes.pop(doc_id, None)
+            if text_hash is None:
+                continue
+            if self.exact.get(text_hash) == doc_id:
+                del self.exact[text_hash]
+            signature = self.signatures.pop(doc_id)
+            for key in self._band_keys(signature):
+                bucket = self.buckets.get(key)
+                bucket.discard(doc_id)
+                if not bucket:
+                    del self.buckets[key]
+            removed[doc_id] = (text_hash, signature)
+        return removed
+
+    def restore(self, removed: Dict[str, tuple]):
+        for doc_id, (text_hash, signature) in removed.items():
+            self._index(doc_id, text_hash, signature)
+
+    def clear(self):
+        self.exact, self.signatures, self.hashes, self.buckets = {}, {}, {}, {}
+
+    def save(self, path: str):
+        data = {
+            "params": [self.num_perm, self.bands, self.shingle_size],
+            "chunks": {doc_id: [self.hashes[doc_id], self.signatures[doc_id].tolist()] for doc_id in self.hashes}
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str):
+        """Load stored fingerprints; ignored when the MinHash parameters have changed."""
+        self.clear()
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        if data.get("params") != [self.num_perm, self.bands, self.shingle_size]:
+            return
+        for doc_id, (text_hash, signature) in data["chunks"].items():
+            self._index(doc_id, text_hash, np.asarray(signature, dtype=np.uint64))
@@ -4,20 +4,34 @@ import os
 # Add the parent directory of 'utils' to sys.path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import json
+import time
 import logging
 import traceback
+import numpy as np
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import Chroma
 from utils.ingestor_prepator import CONST
+from utils.embedding_backends import create_embeddings
+from utils.vector_backends import NumpyVectorStore
+from utils.bm25_index import BM25Index
+from utils.topic_tagger import chunk_tags
+from utils.ingest_manifest import IngestManifest, chunk_id
+from utils.chunk_writer import ChunkWriter
+from utils.streaming_splitter import stream_split
+from utils.dedup import NearDuplicateIndex
+from utils.index_snapshot import IndexSnapshot, write_snapshot
 import argparse
 import warnings
+from concurrent.futures import ProcessPoolExecutor
 import chromadb
 from chromadb.config import Settings
 
+STORE_PAGE_SIZE = 1000  # chunks read or written per call when walking the whole collection
+
 
 class DocumentIngester:
-    def __init__(self , config=None):
+    def __init__(self , config=None, force=False):
         """Initialize the DocumentIngester with configurations and setup."""
         os.environ["TRANSFORMERS_NO_TF"] = "1"
         warnings.filterwarnings("ignore")
@@ -28,21 +42,56 @@ class DocumentIngester:
                             format="%(asctime)s - %(levelname)s - %(message)s")
 
         try:
-            print("Initializing embeddings model...")
-            self.embeddings = HuggingFaceEmbeddings(model_name=CONST.SELECTED_EMBEDDING_MODEL)
+            print(f"Initializing embeddings model ({CONST.EMBEDDING_BACKEND})...")
+            self.embeddings = create_embeddings()
             print("Embeddings model initialized successfully.")
 
-            print("Connecting to vector store...")
-            self.vector_store = Chroma(
-                persist_directory=CONST.CHROMA_DB_DIR,
-                embedding_function=self.embeddings
-            )
+            print(f"Connecting to vector store ({CONST.VECTOR_BACKEND})...")
+            if CONST.VECTOR_BACKEND == "numpy":
+                self.vector_store = NumpyVectorStore(
+                    CONST.NUMPY_INDEX_DIR,
+                    self.embeddings,
+                    dtype=CONST.NUMPY_INDEX_DTYPE,
+                    rescore_factor=CONST.NUMPY_RESCORE_FACTOR
+                )
+            else:
+                self.vector_store = Chroma(
+                    persist_directory=CONST.CHROMA_DB_DIR,
+                    embedding_function=self.embeddings,
+                    collection_metadata=CONST.HNSW_METADATA
+                )
             print("Vector store connected successfully.")
+            self.writer = ChunkWriter(self.vector_store, self.embeddings, CONST.BATCH_SIZE)
+
+            self.manifest = IngestManifest(
+                CONST.INGEST_MANIFEST_PATH,
+                f"{CONST.SELECTED_EMBEDDING_MODEL}:{CONST.EMBEDDING_BACKEND}"
+            )
+            self.reembed_all = force or self.manifest.model_changed
+            if force:
+                self.manifest.clear()
+
+            self.dedup = None
+            self.duplicates = []
+            self.deleted_chunk_ids = set()
+            self.file_stats = {}
+            self.last_report = None
+            self.last_error = None
+            if CONST.DEDUP_CONFIG.get("enabled", True):
+                self.dedup = NearDuplicateIndex(
+                    num_perm=CONST.DEDUP_CONFIG.get("num_perm", 128),
+                    bands=CONST.DEDUP_CONFIG.get("bands", 32),
+                    threshold=CONST.DEDUP_CONFIG.get("threshold", 0.8),
+                    shingle_size=CONST.DEDUP_CONFIG.get("shingle_size", 5)
+                )
+                if not force:
+                    self.dedup.load(CONST.DEDUP_INDEX_PATH)
         except Exception as e:
             print(f"❌ Error during initialization: {e}")
             raise
 
-    def load_document(self, file_path):
+    @staticmethod
+    def load_document(file_path):
         """Loads a document using an appropriate loader based on file extension."""
         ext = file_path.split(".")[-1].lower()
         try:
@@ -58,76 +107,175 @@ class DocumentIngester:
            
         return None
 
-    def split_documents(self, documents):
+    @staticmethod
+    def iter_pages(file_path):
+        """Yield a document's pages one at a time (lazy_load), without materializing the whole file."""
+        ext = file_path.split(".")[-1].lower()
+        if ext not in CONST.DOCUMENT_LOADERS:
+            raise ValueError(f"No loader found for extension: {ext}")
+        loader = CONST.DOCUMENT_LOADERS[ext](file_path)
+        if hasattr(loader, "lazy_load"):
+            yield from loader.lazy_load()
+        else:
+            yield from loader.load()
+
+    @staticmethod
+    def make_text_splitter():
+        return RecursiveCharacterTextSplitter(
+            chunk_size=800,                      # finer chunks = better isolation
+            chunk_overlap=75,                    # small overlap to maintain context
+            separators=["\n\n", "\n", ".", " "]  # prioritize semantic splits (headers, paragraphs, sentences)
+        )
+
+    @staticmethod
+    def iter_chunks(pages):
+        """Split pages incrementally, carrying text across page boundaries, and tag each chunk."""
+        # start_index lets the knowledge server merge neighbouring chunks
+        for chunk in stream_split(pages, DocumentIngester.make_text_splitter()):
+            chunk.metadata.update(chunk_tags(chunk.page_content, chunk.metadata))
+            yield chunk
+
+    @staticmethod
+    def split_documents(documents):
         """Split markdown-structured documents using RecursiveCharacterTextSplitter with semantic-aware separators."""
         try:
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=800,                      # finer chunks = better isolation
-                chunk_overlap=75,                    # small overlap to maintain context
-                separators=["\n\n", "\n", ".", " "]  # prioritize semantic splits (headers, paragraphs, sentences)
-            )
-
-            all_chunks = []
-
-            for doc in documents:
-                chunks = text_splitter.split_documents([doc])
-                for chunk in chunks:
-                    chunk.metadata.update(doc.metadata)
-                all_chunks.extend(chunks)
-
-            return all_chunks
+            return list(DocumentIngester.iter_chunks(documents))
 
         except Exception as e:
             print(f"❌ Error splitting documents: {e}")
-            if self.debug:
-                traceback.print_exc()
+            logging.error(f"Error splitting documents: {traceback.format_exc()}")
             return []
 
-    def process_file(self, file_path):
-        """Processes and embeds a single file."""
+    @staticmethod
+    def prepare_files(file_paths, workers=1, stream=True):
+        """Yield (file_path, chunks, error, stats) in input order, loading and splitting across worker processes.
+
+        With one worker and stream=True, chunks and stats are None and
+        process_file streams the file page by page, so memory does not grow
+        with document size; load errors then surface while the chunks are
+        consumed. Worker processes return whole chunk lists, trading memory
+        for parallelism, with the parse and split timings they measured.
+        """
+        if workers <= 1 or len(file_paths) <= 1:
+            for file_path in file_paths:
+                if stream:
+                    yield file_path, None, None, None
+                else:
+                    yield prepare_file(file_path)
+            return
+        print(f"Loading and splitting {len(file_paths)} files with {workers} worker processes...")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(prepare_file, file_paths)
+
+    def process_file(self, file_path, stale_ids=None, chunks=None, prepared_stats=None):
+        """Processes and embeds a single file, replacing the chunks it produced last time.
+
+        prepared_stats are the parse and split timings of chunks that
+        prepare_file already produced, possibly in another process.
+        """
+        ids, removed_fingerprints = [], {}
+        file_name = os.path.basename(file_path)
+        stats = {"pages": None, "chunks": 0, "parse_seconds": None, "split_seconds": None, "dedup_seconds": 0.0}
+        embed_before, write_before = sum(self.writer.batch_times), self.writer.write_seconds
+        start = time.perf_counter()
         try:
-            logging.info(f"Processing {file_path}...")
-            print(f"🔄 Attempting to load: {file_path}")
-
-            documents = self.load_document(file_path)
-            if not documents:
-                print(f"❌ Failed to load document: {file_path}")
-                return
+            streaming = chunks is None
+            if streaming:
+                print(f"🔄 Streaming: {file_path}")
+                stats.update(pages=0, parse_seconds=0.0)
+                chunks = self.iter_chunks(timed_iter(self.iter_pages(file_path), stats, "parse_seconds", "pages"))
+            if prepared_stats:
+                stats.update(prepared_stats)
+            else:
+                chunks = timed_iter(chunks, stats, "split_seconds", "chunks")
 
-            print(f"✅ Successfully loaded {file_path} - {len(documents)} pages")
+            stale_ids = set(stale_ids or [])
+            # Chunks whose ID is already stored have identical text, so they are not re-embedded
+            reusable = set() if self.reembed_all else stale_ids
+            ids, seen, depends_on = [], set(), set()
+            if self.dedup is not None:
+                # A file is never a duplicate of its own previous version
+                removed_fingerprints = self.dedup.remove(stale_ids)
 
-            chunks = self.split_documents(documents)
-            if not chunks:
+            def new_chunks():
+                for chunk in chunks:
+                    doc_id = chunk_id(file_name, chunk)
+                    if doc_id in seen:
+                        continue  # identical chunk within a file; keep the first
+                    dedup_start = time.perf_counter()
+                    if self.dedup is not None and doc_id not in reusable:
+                        duplicate = self.dedup.find_duplicate(chunk.page_content)
+                        if duplicate:
+                            depends_on.add(duplicate["duplicate_of"])
+                            self.duplicates.append({
+                                "file": file_name,
+                                "page": chunk.metadata.get("page"),
+                                "chunk_id": doc_id,
+                                **duplicate,
+                                "preview": chunk.page_content[:80]
+                            })
+                            stats["dedup_seconds"] += time.perf_counter() - dedup_start
+                            continue
+                    seen.add(doc_id)
+                    ids.append(doc_id)
+                    if self.dedup is not None:
+                        self.dedup.add(doc_id, chunk.page_content)
+                    stats["dedup_seconds"] += time.perf_counter() - dedup_start
+                    if doc_id not in reusable:
+                        yield doc_id, chunk
+
+            duplicates_before = len(self.duplicates)
+            written = self.writer.write(new_chunks())
+            dropped = len(self.duplicates) - duplicates_before
+            if not ids and not dropped:
                 print(f"❌ No chunks generated for {file_path}")
-                return
-
-            print(f"✅ Successfully split {file_path} into {len(chunks)} chunks")
-
-            print(f"Adding {len(chunks)} chunks to vector store...")
-            # Create vector store from documents
-            vector_store = Chroma.from_documents(
-                documents=chunks,
-                embedding=self.embeddings,
-                persist_directory=CONST.CHROMA_DB_DIR,
-                collection_metadata={"hnsw:M": 32, "hnsw:construction_ef": 64}  
+                return False
+            print(f"Added {written} chunks to vector store ({len(ids) - written} unchanged, {dropped} duplicates dropped).")
+
+            obsolete = sorted(stale_ids - seen)
+            if obsolete:
+                print(f"Removing {len(obsolete)} outdated chunks...")
+                self.vector_store.delete(obsolete)
+                self.deleted_chunk_ids.update(obsolete)
+            self.vector_store.persist()
+            self.manifest.record(file_name, file_path, ids, duplicate_of=sorted(depends_on - seen))
+            self.manifest.save()
+
+            # Streaming interleaves stages: split time is measured around the chunk
+            # iterator, which includes pulling pages, so parse time is taken out of it
+            if streaming:
+                stats["split_seconds"] -= stats["parse_seconds"]
+            stats.update(
+                embedded=written,
+                embed_seconds=sum(self.writer.batch_times) - embed_before,
+                write_seconds=self.writer.write_seconds - write_before,
+                # Work done up front in prepare_file counts towards the file's total
+                total_seconds=time.perf_counter() - start + (prepared_stats or {}).get("prepare_seconds", 0.0)
             )
-            vector_store.persist()
+            self.file_stats[file_name] = stats
 
             print(f"✅ Successfully processed {file_path} and stored embeddings.")
             logging.info(f"Successfully processed {file_path}")
+            return True
 
         except Exception as e:
             logging.error(f"❌ Error processing {file_path}: {e}")
             print(f"❌ Error processing {file_path}: {e}")
+            if self.dedup is not None:
+                self.dedup.remove(ids)
+                self.dedup.restore(removed_fingerprints)
+        return False
            
 
-    def ingest_documents(self):
+    def ingest_documents(self, workers=None):
         """Ingests all documents from the source directory."""
+        self.last_error = None
         try:
             print(f"Looking for documents in: {CONST.SOURCE_DOCS_DIR}")
 
             if not os.path.exists(CONST.SOURCE_DOCS_DIR):
                 print(f"❌ Source directory does not exist: {CONST.SOURCE_DOCS_DIR}")
+                self.last_error = f"Source directory does not exist: {CONST.SOURCE_DOCS_DIR}"
                 return
 
             files = [
@@ -136,32 +284,268 @@ class DocumentIngester:
                 if os.path.isfile(os.path.join(CONST.SOURCE_DOCS_DIR, f))
             ]
 
-            if not files:
+            if not files and not self.manifest.files:
                 print(f"📂 No documents found in the source directory: {CONST.SOURCE_DOCS_DIR}")
                 logging.warning("No documents found in the source directory.")
                 return
 
             print(f"Found {len(files)} files to process: {[os.path.basename(f) for f in files]}")
-
+            start = time.perf_counter()
+            self.writer = ChunkWriter(self.vector_store, self.embeddings, CONST.BATCH_SIZE)
+            self.duplicates = []
+            self.deleted_chunk_ids = set()
+            self.file_stats = {}
+
+            if self.manifest.model_changed:
+                print("⚠️ Embedding model changed since the last ingest, re-embedding every file.")
+            changed, unchanged = [], []
             for file_path in files:
-                self.process_file(file_path)
-
-            print("✅ Document ingestion completed!")
+                if self.manifest.is_unchanged(os.path.basename(file_path), file_path):
+                    unchanged.append(file_path)
+                else:
+                    changed.append(file_path)
+
+            current_names = {os.path.basename(f) for f in files}
+            removed = [name for name in self.manifest.files if name not in current_names]
+            for file_name in removed:
+                stale_ids = self.manifest.forget(file_name)
+                print(f"🗑️ {file_name} was removed, deleting its {len(stale_ids)} chunks...")
+                if stale_ids:
+                    self.vector_store.delete(stale_ids)
+                    self.deleted_chunk_ids.update(stale_ids)
+                    if self.dedup is not None:
+                        self.dedup.remove(stale_ids)
+
+            legacy_ids = self.legacy_chunk_ids() if changed else {}
+            failed = []
+            for file_path, chunks, error, prepared_stats in self.prepare_files(changed, resolve_workers(workers)):
+                if error:
+                    # The file keeps its previous chunks and is retried on the next run
+                    failed.append(file_path)
+                    continue
+                stale_ids = self.manifest.chunk_ids(os.path.basename(file_path)) + legacy_ids.get(file_path, [])
+                if not self.process_file(file_path, stale_ids, chunks, prepared_stats):
+                    failed.append(file_path)
+            self.reingest_dependents(files, changed, unchanged, failed)
+
+            if changed or removed:
+                self.vector_store.persist()
+                self.build_lexical_index()
+                self.mark_index_updated()
+            if self.reembed_all and failed:
+                # Still embedded with the old model or settings, so retry them next run
+                self.manifest.mark_stale([os.path.basename(f) for f in failed])
+            self.manifest.save()
+            if self.dedup is not None:
+                self.dedup.save(CONST.DEDUP_INDEX_PATH)
+            if not failed:
+                # --force and model changes apply to one run; later runs (--watch) reuse embeddings again
+                self.reembed_all = False
+
+            elapsed = time.perf_counter() - start
+            summary = (f"{len(changed) - len(failed)} processed, {len(failed)} failed, {len(unchanged)} unchanged, "
+                       f"{len(removed)} removed in {elapsed:.1f}s")
+            print(f"✅ Document ingestion completed! {summary}")
+            logging.info(f"Ingestion completed: {summary}")
+            if self.writer.chunks_written:
+                print(f"📈 Embedding writer: {self.writer.summary()}")
+                logging.info(f"Embedding writer: {self.writer.summary()}")
+            if self.duplicates:
+                exact = sum(1 for duplicate in self.duplicates if duplicate["kind"] == "exact")
+                print(f"🧹 Dropped {len(self.duplicates)} duplicate chunks ({exact} exact, {len(self.duplicates) - exact} near)")
+                logging.info(f"Dropped {len(self.duplicates)} duplicate chunks ({exact} exact)")
+
+            self.write_report({
+                "files": {
+                    "processed": [os.path.basename(f) for f in changed if f not in failed],
+                    "failed": [os.path.basename(f) for f in failed],
+                    "unchanged": [os.path.basename(f) for f in unchanged],
+                    "removed": removed
+                },
+                "elapsed_seconds": elapsed,
+                "stages": self.file_stats,
+                "writer": self.writer.stats(),
+                "duplicates": self.duplicates
+            })
 
         except Exception as e:
             print(f"❌ Error during ingestion: {e}")
             logging.error(f"Error during ingestion: {e}")
+            self.last_error = str(e)
            
 
-    def list_documents(self):
-        """Lists all stored documents in ChromaDB."""
+    def reingest_dependents(self, files, changed, unchanged, failed):
+        """Re-ingest files whose dropped duplicates pointed at chunks deleted in this run.
+
+        Their copy of the content was never stored, so without this it would
+        vanish from the index along with the original.
+        """
+        by_name = {os.path.basename(file_path): file_path for file_path in files}
+        for _ in range(len(files)):
+            dependents = [
+                name for name in self.manifest.dependents(self.deleted_chunk_ids)
+                if name in by_name and by_name[name] not in failed
+            ]
+            self.deleted_chunk_ids = set()
+            if not dependents:
+                return
+            self.manifest.mark_stale(dependents)
+            for name in dependents:
+                file_path = by_name[name]
+                print(f"♻️ Re-ingesting {name}: chunks it was deduplicated against were removed")
+                if file_path in unchanged:
+                    unchanged.remove(file_path)
+                if file_path not in changed:
+                    changed.append(file_path)
+                if not self.process_file(file_path, self.manifest.chunk_ids(name)):
+                    failed.append(file_path)
+
+    def write_report(self, report):
+        """Write the machine-readable report of the last ingest run."""
+        report = {"finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"), **report}
+        self.last_report = report
+        with open(CONST.INGEST_REPORT_PATH, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2, default=str)
+        print(f"📝 Ingest report written to {CONST.INGEST_REPORT_PATH}")
+
+    def legacy_chunk_ids(self):
+        """IDs of stored chunks not owned by any manifest entry, grouped by source path."""
+        owned = {doc_id for entry in self.manifest.files.values() for doc_id in entry["chunk_ids"]}
+        legacy = {}
+        for page in self.iter_stored(["metadatas"]):
+            for doc_id, metadata in zip(page["ids"], page["metadatas"]):
+                if doc_id not in owned:
+                    legacy.setdefault((metadata or {}).get("source"), []).append(doc_id)
+        return legacy
+
+    def build_lexical_index(self):
+        """Rebuild and persist the BM25 inverted index over every stored chunk."""
+        index = BM25Index()
+        for page in self.iter_stored(["documents"]):
+            for doc_id, text in zip(page["ids"], page["documents"]):
+                index.add(doc_id, text)
+        index.save(CONST.BM25_INDEX_PATH)
+        print(f"✅ BM25 index built over {len(index)} chunks.")
+        logging.info(f"Built BM25 index over {len(index)} chunks")
+
+    def mark_index_updated(self):
+        """Touch the index version marker so the knowledge server drops cached results."""
+        with open(CONST.INDEX_VERSION_FILE, "w") as file:
+            file.write(str(time.time()))
+
+    def iter_stored(self, include, page_size=STORE_PAGE_SIZE):
+        """Yield the stored chunks a page at a time (offset/limit) instead of loading the whole collection."""
+        offset = 0
+        while True:
+            page = self.vector_store.get(include=include, limit=page_size, offset=offset)
+            if not page["ids"]:
+                return
+            yield page
+            offset += len(page["ids"])
+
+    @staticmethod
+    def snapshot_sidecars():
+        """Files that travel with a snapshot so an imported index needs no rebuild."""
+        return {
+            "bm25_index.json": CONST.BM25_INDEX_PATH,
+            "ingest_manifest.json": CONST.INGEST_MANIFEST_PATH,
+            "dedup_index.json": CONST.DEDUP_INDEX_PATH
+        }
+
+    def export_snapshot(self, path):
+        """Write every stored chunk with its embedding to a single portable snapshot file."""
+        start = time.perf_counter()
+        snapshot = write_snapshot(
+            path,
+            self.iter_stored(["embeddings", "documents", "metadatas"]),
+            self.manifest.embedding_model,
+            self.snapshot_sidecars()
+        )
+        size_mb = os.path.getsize(path) / 2**20
+        print(f"📦 Exported {snapshot['count']} chunks ({snapshot['dim']}-d, {size_mb:.1f} MB) "
+              f"to {path} in {time.perf_counter() - start:.1f}s")
+        logging.info(f"Exported snapshot of {snapshot['count']} chunks to {path}")
+
+    def import_snapshot(self, path):
+        """Replace the index with a snapshot's chunks and embeddings; nothing is re-embedded."""
+        start = time.perf_counter()
+        snapshot = IndexSnapshot(path)
+        if snapshot.embedding_model != self.manifest.embedding_model:
+            raise ValueError(f"Snapshot was built with {snapshot.embedding_model}, "
+                             f"but {self.manifest.embedding_model} is configured")
+        embeddings = snapshot.embeddings()
+        chunks = snapshot.chunks()
+        print(f"📦 Opened snapshot of {len(chunks['ids'])} chunks in {(time.perf_counter() - start) * 1000:.0f} ms "
+              f"(checksums verified, embeddings memory-mapped)")
+
+        self.reset_store()
+        # The NumPy store rebuilds its matrix on every add, so it takes the snapshot in one call
+        is_numpy = isinstance(self.vector_store, NumpyVectorStore)
+        batch_size = (len(chunks["ids"]) or 1) if is_numpy else STORE_PAGE_SIZE
+        for offset in range(0, len(chunks["ids"]), batch_size):
+            rows = slice(offset, offset + batch_size)
+            vectors = np.asarray(embeddings[rows])
+            self.writer.upsert(chunks["ids"][rows], chunks["texts"][rows],
+                               vectors if is_numpy else vectors.tolist(), chunks["metadatas"][rows])
+        self.vector_store.persist()
+
+        restored = snapshot.sidecars()
+        for name, target_path in self.snapshot_sidecars().items():
+            if name in restored:
+                snapshot.extract_sidecar(name, target_path)
+        # Without a sidecar the local file describes the replaced index, so start empty
+        if "ingest_manifest.json" in restored:
+            self.manifest.load()
+        else:
+            self.manifest.clear()
+            self.manifest.save()
+        if self.dedup is not None:
+            if "dedup_index.json" in restored:
+                self.dedup.load(CONST.DEDUP_INDEX_PATH)
+            else:
+                self.dedup.clear()
+                self.dedup.save(CONST.DEDUP_INDEX_PATH)
+        if "bm25_index.json" not in restored:
+            self.build_lexical_index()
+        self.mark_index_updated()
+        print(f"✅ Imported {len(chunks['ids'])} chunks from {path} in {time.perf_counter() - start:.1f}s")
+        logging.info(f"Imported snapshot of {len(chunks['ids'])} chunks from {path}")
+
+    def store_count(self):
+        if isinstance(self.vector_store, NumpyVectorStore):
+            return self.vector_store.count()
+        return self.vector_store._collection.count()
+
+    def reset_store(self):
+        """Empty the index by dropping and recreating the collection with its current settings.
+
+        Unlike deleting every ID, this costs the same however many chunks are stored.
+        """
+        if isinstance(self.vector_store, NumpyVectorStore):
+            self.vector_store.reset()
+            return
+        collection_metadata = self.vector_store._collection.metadata or CONST.HNSW_METADATA
+        self.vector_store.delete_collection()
+        self.vector_store = Chroma(
+            persist_directory=CONST.CHROMA_DB_DIR,
+            embedding_function=self.embeddings,
+            collection_metadata=collection_metadata
+        )
+        self.writer.vector_store = self.vector_store
+        # The recreated collection has a new ID; bumping the index version makes a
+        # running knowledge server reopen it now rather than fail until the rebuild ends
+        self.mark_index_updated()
+
+    def list_documents(self, page_size=STORE_PAGE_SIZE):
+        """Lists stored documents page by page, so the collection is never loaded at once."""
         try:
-            docs = self.vector_store.get(include=["metadatas"])
-            if not docs["metadatas"]:
+            listed = 0
+            for page in self.iter_stored(["metadatas"], page_size):
+                for doc_id, meta in zip(page["ids"], page["metadatas"]):
+                    listed += 1
+                    print(f"📄 {listed}: {doc_id} {meta}")
+            if not listed:
                 print("📂 No documents found in ChromaDB.")
-                return
-            for idx, meta in enumerate(docs["metadatas"]):
-                print(f"📄 {idx + 1}: {meta}")
         except Exception as e:
             print(f"❌ Error listing documents: {e}")
            
@@ -170,10 +554,57 @@ class DocumentIngester:
         try:
             self.vector_store.delete([doc_id])
             self.vector_store.persist()
+            self.manifest.forget_chunk(doc_id)
+            self.manifest.save()
+            if self.dedup is not None:
+                self.dedup.remove([doc_id])
+                self.dedup.save(CONST.DEDUP_INDEX_PATH)
+            self.build_lexical_index()
+            self.mark_index_updated()
             print(f"🗑️ Successfully deleted document with ID: {doc_id}")
         except Exception as e:
             print(f"❌ Error deleting document {doc_id}: {e}")
-            
+
+    def delete_documents_where(self, where, page_size=STORE_PAGE_SIZE):
+        """Deletes the chunks whose metadata matches where, one page at a time with progress."""
+        try:
+            deleted, previous, dependents = 0, None, set()
+            while True:
+                # Matches are deleted as they are read, so every page starts at offset 0
+                doc_ids = self.vector_store.get(where=where, include=[], limit=page_size)["ids"]
+                if not doc_ids:
+                    break
+                if doc_ids == previous:
+                    raise RuntimeError("chunks were not removed from the vector store")
+                self.vector_store.delete(doc_ids)
+                self.manifest.forget_chunks(doc_ids)
+                dependents.update(self.manifest.dependents(doc_ids))
+                if self.dedup is not None:
+                    self.dedup.remove(doc_ids)
+                deleted += len(doc_ids)
+                previous = doc_ids
+                print(f"🗑️ Deleted {len(doc_ids)} chunks ({deleted} so far)")
+
+            if not deleted:
+                print(f"📂 No documents match {where}.")
+                return
+            self.vector_store.persist()
+            if dependents:
+                # Their duplicate chunks were dropped in favour of the deleted ones
+                self.manifest.mark_stale(dependents)
+                print(f"♻️ {len(dependents)} files deduplicated against the deleted chunks will be re-ingested on the next run: "
+                      f"{', '.join(sorted(dependents))}")
+            self.manifest.save()
+            if self.dedup is not None:
+                self.dedup.save(CONST.DEDUP_INDEX_PATH)
+            self.build_lexical_index()
+            self.mark_index_updated()
+            print(f"✅ Deleted {deleted} chunks matching {where}.")
+            logging.info(f"Deleted {deleted} chunks matching {where}")
+        except Exception as e:
+            print(f"❌ Error deleting documents matching {where}: {e}")
+            logging.error(f"Error deleting documents matching {where}: {e}")
+
 
     def delete_all_documents(self):
         """Deletes all stored documents from ChromaDB."""
@@ -183,21 +614,23 @@ class DocumentIngester:
                 return
 
             try:
-                # Get all document IDs from the collection
-                collection = self.vector_store._collection
-                docs = collection.get()
-                doc_ids = docs["ids"]
-                
-                print(f"Found {len(doc_ids)} documents in the database.")
+                count = self.store_count()
+                print(f"Found {count} documents in the database.")
 
-                if not doc_ids:
+                if not count:
                     print("📂 No documents found in ChromaDB to delete.")
                     return
 
-                # Delete all documents
-                print(f"🗑️ Deleting {len(doc_ids)} documents...")
-                self.vector_store.delete(doc_ids)
-                self.vector_store.persist()
+                # Drop and recreate the collection rather than deleting every ID
+                print(f"🗑️ Deleting {count} documents...")
+                self.reset_store()
+                self.manifest.clear()
+                self.manifest.save()
+                if self.dedup is not None:
+                    self.dedup.clear()
+                    self.dedup.save(CONST.DEDUP_INDEX_PATH)
+                self.build_lexical_index()
+                self.mark_index_updated()
                 print("✅ All documents have been deleted from ChromaDB.")
                 
             except Exception as e:
@@ -211,27 +644,151 @@ class DocumentIngester:
                 traceback.print_exc()
           
 
+def timed_iter(iterable, stats, seconds_key, count_key):
+    """Yield from iterable, adding the time spent producing items to stats[seconds_key]."""
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            stats[seconds_key] = (stats[seconds_key] or 0.0) + time.perf_counter() - start
+            return
+        stats[seconds_key] = (stats[seconds_key] or 0.0) + time.perf_counter() - start
+        stats[count_key] += 1
+        yield item
+
+
+def prepare_file(file_path):
+    """Load and split one file; runs in a worker process, so errors are returned rather than raised.
+
+    Returns (file_path, chunks, error, stats) where stats holds the page and
+    chunk counts and the parse and split time measured in this process.
+    """
+    stats = {"pages": 0, "chunks": 0, "parse_seconds": 0.0, "split_seconds": 0.0}
+    start = time.perf_counter()
+    try:
+        logging.info(f"Processing {file_path}...")
+        print(f"🔄 Attempting to load: {file_path}")
+
+        pages = timed_iter(DocumentIngester.iter_pages(file_path), stats, "parse_seconds", "pages")
+        chunks = list(timed_iter(DocumentIngester.iter_chunks(pages), stats, "split_seconds", "chunks"))
+        # Pulling chunks also pulls pages, so parse time is taken out of split time
+        stats["split_seconds"] -= stats["parse_seconds"]
+        stats["prepare_seconds"] = time.perf_counter() - start
+        if not chunks:
+            print(f"❌ No chunks generated for {file_path}")
+            return file_path, None, "no chunks generated", stats
+
+        print(f"✅ Successfully split {file_path} into {len(chunks)} chunks")
+        return file_path, chunks, None, stats
+    except Exception as e:
+        logging.error(f"❌ Error preparing {file_path}: {e}")
+        print(f"❌ Error preparing {file_path}: {e}")
+        return file_path, None, str(e), stats
+
+
+def parse_where(conditions):
+    """Metadata filter from KEY=VALUE strings; values are read as JSON when possible (page=3 is an int)."""
+    where = {}
+    for condition in conditions:
+        key, _, value = condition.partition("=")
+        try:
+            where[key] = json.loads(value)
+        except ValueError:
+            where[key] = value
+    if len(where) > 1:
+        return {"$and": [{key: value} for key, value in where.items()]}
+    return where
+
+
+def resolve_workers(workers, default=None):
+    """Worker process count: None means the configured default, 0 or less one per CPU core."""
+    if workers is None:
+        return CONST.INGEST_WORKERS if default is None else default
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def run_ingest_benchmark(args):
+    """Run the --benchmark mode; returns 1 when a regression against the baseline is found."""
+    from utils.ingest_benchmark import compare, print_report, run_benchmark
+
+    report = run_benchmark(files=args.bench_files, pages=args.bench_pages, workers=resolve_workers(args.workers, default=1))
+    comparison = None
+    if args.baseline and os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            comparison = compare(report, json.load(file), args.tolerance)
+        report["comparison"] = {"baseline": args.baseline, "tolerance": args.tolerance, "metrics": comparison}
+
+    print_report(report, comparison)
+    with open(args.bench_output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"📝 Benchmark report written to {args.bench_output}")
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"📌 Saved as baseline: {args.baseline}")
+
+    return 1 if comparison and any(row["regressed"] for row in comparison) else 0
+
+
 def main():
     parser = argparse.ArgumentParser(description="Manage ChromaDB documents.")
     parser.add_argument("--list-docs", action="store_true", help="List all stored documents in ChromaDB.")
     parser.add_argument("--delete-doc", type=str, help="Delete a specific document by ID.")
     parser.add_argument("--delete-all", action="store_true", help="Delete all documents from ChromaDB.")
+    parser.add_argument("--delete-where", type=str, nargs="+", metavar="KEY=VALUE",
+                        help="Delete the chunks whose metadata matches, e.g. source_name=manual.pdf.")
+    parser.add_argument("--page-size", type=int, default=STORE_PAGE_SIZE, help="Chunks read per page when listing or deleting.")
+    parser.add_argument("--workers", type=int, help="Processes used to load and split files, 0 for one per CPU core (default: ingestion.workers in config.yaml).")
+    parser.add_argument("--force", action="store_true", help="Ignore the ingest manifest and re-embed every file.")
     parser.add_argument("--debug", action="store_true", help="Enable debug mode with detailed error information.")
+    parser.add_argument("--export-snapshot", type=str, metavar="PATH", help="Write the index (embeddings, chunks, metadata) to a portable snapshot file.")
+    parser.add_argument("--import-snapshot", type=str, metavar="PATH", help="Replace the index with a snapshot file, without re-embedding.")
+    parser.add_argument("--watch", action="store_true", help="Run as a daemon that ingests new or changed files in the source folder.")
+    parser.add_argument("--benchmark", action="store_true", help="Ingest a synthetic PDF corpus into a temporary index and report per-stage timings.")
+    parser.add_argument("--bench-files", type=int, default=4, help="Synthetic PDFs in the benchmark corpus.")
+    parser.add_argument("--bench-pages", type=int, default=50, help="Pages per synthetic PDF.")
+    parser.add_argument("--bench-output", type=str, default=os.path.join(CONST.LOGS_DIR, "ingest_benchmark.json"),
+                        help="Where to write the benchmark JSON report.")
+    parser.add_argument("--baseline", type=str, help="Benchmark report to compare against.")
+    parser.add_argument("--save-baseline", action="store_true", help="Also write this benchmark report to the --baseline path.")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Relative change counted as a regression.")
     args = parser.parse_args()
 
+    if args.benchmark:
+        sys.exit(run_ingest_benchmark(args))
+
     try:
         print("Initializing DocumentIngester...")
-        ingester = DocumentIngester()  
+        ingester = DocumentIngester(force=args.force)
         print("Initialization complete.")
 
         if args.list_docs:
-            ingester.list_documents()
+            ingester.list_documents(args.page_size)
         elif args.delete_doc:
             ingester.delete_document_by_id(args.delete_doc)
+        elif args.delete_where:
+            ingester.delete_documents_where(parse_where(args.delete_where), args.page_size)
         elif args.delete_all:
             ingester.delete_all_documents()
+        elif args.export_snapshot:
+            ingester.export_snapshot(args.export_snapshot)
+        elif args.import_snapshot:
+            ingester.import_snapshot(args.import_snapshot)
+        elif args.watch:
+            from utils.ingest_daemon import IngestDaemon
+            daemon_config = CONST.CONFIG.get('ingestion', {}).get('daemon', {})
+            IngestDaemon(
+                ingester,
+                CONST.SOURCE_DOCS_DIR,
+                debounce_seconds=daemon_config.get('debounce_seconds', 2.0),
+                poll_interval=daemon_config.get('poll_interval_seconds', 5.0),
+                knowledge_server_url=daemon_config.get('knowledge_server_url'),
+                metrics_port=daemon_config.get('metrics_port')
+            ).run()
         else:
-            ingester.ingest_documents()
+            ingester.ingest_documents(workers=args.workers)
     except Exception as e:
         print(f"❌ Critical error: {e}")
         if args.debug:
@@ -0,0 +1,139 @@
+import sys
+import os
+
+# Add the parent directory of 'utils' to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shutil
+import logging
+import argparse
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from utils.ingestor_prepator import CONST
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_QUANTIZED_MODEL_FILE = "model.int8.onnx"
+ONNX_INPUT_NAMES = ["input_ids", "attention_mask", "token_type_ids"]
+
+
+def resolve_model_dir(model_name: str, cache_folder: str) -> str:
+    """Path of the locally cached Hugging Face snapshot (fetched once if missing)."""
+    from huggingface_hub import snapshot_download
+    return snapshot_download(repo_id=model_name, cache_dir=cache_folder)
+
+
+def export_onnx(model_name: str, cache_folder: str, output_dir: str, quantize: bool = False) -> str:
+    """Export the sentence-transformer encoder to ONNX, optionally with dynamic int8 quantization."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    model_dir = resolve_model_dir(model_name, cache_folder)
+    model = AutoModel.from_pretrained(model_dir)
+    model.eval()
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    sample = tokenizer(["export sample sentence"], return_tensors="pt")
+
+    onnx_path = os.path.join(output_dir, ONNX_MODEL_FILE)
+    print(f"Exporting {model_name} to {onnx_path}...")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in ONNX_INPUT_NAMES),
+            onnx_path,
+            input_names=ONNX_INPUT_NAMES,
+            output_names=["last_hidden_state", "pooler_output"],
+            dynamic_axes={name: {0: "batch", 1: "sequence"} for name in ONNX_INPUT_NAMES + ["last_hidden_state"]},
+            opset_version=14
+        )
+    shutil.copy(os.path.join(model_dir, "tokenizer.json"), os.path.join(output_dir, "tokenizer.json"))
+    print("✅ ONNX export completed.")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantized_path = os.path.join(output_dir, ONNX_QUANTIZED_MODEL_FILE)
+        print(f"Quantizing to {quantized_path}...")
+        quantize_dynamic(onnx_path, quantized_path, weight_type=QuantType.QInt8)
+        print("✅ Dynamic int8 quantization completed.")
+        return quantized_path
+    return onnx_path
+
+
+class OnnxEmbeddings(Embeddings):
+    """Sentence-transformer embeddings (mean pooling + L2 norm) served by ONNX Runtime on CPU."""
+
+    def __init__(self, model_name: str, cache_folder: str, onnx_dir: str, quantized: bool = False,
+                 batch_size: int = 32, max_length: int = 256):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        model_file = ONNX_QUANTIZED_MODEL_FILE if quantized else ONNX_MODEL_FILE
+        model_path = os.path.join(onnx_dir, model_file)
+        if not os.path.exists(model_path):
+            logging.info(f"No ONNX model at {model_path}, exporting it once...")
+            export_onnx(model_name, cache_folder, onnx_dir, quantize=quantized)
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.session_inputs = {node.name for node in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(onnx_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+        self.batch_size = batch_size
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64)
+        }
+        inputs = {name: value for name, value in inputs.items() if name in self.session_inputs}
+        hidden = self.session.run(["last_hidden_state"], inputs)[0]
+
+        # Mean pooling over real tokens, then unit length (matches the model's Pooling + Normalize modules)
+        mask = inputs["attention_mask"][:, :, None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = [
+            self._embed_batch(texts[start:start + self.batch_size])
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        return np.vstack(vectors).tolist() if vectors else []
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed_batch([text])[0].tolist()
+
+
+def create_embeddings(backend: str = None):
+    """Build the embedding model for the configured backend ("torch", "onnx" or "onnx-int8")."""
+    backend = backend or CONST.EMBEDDING_BACKEND
+    if backend in ("onnx", "onnx-int8"):
+        return OnnxEmbeddings(
+            CONST.SELECTED_EMBEDDING_MODEL,
+            cache_folder=CONST.EMBEDDING_CACHE_DIR,
+            onnx_dir=CONST.ONNX_MODEL_DIR,
+            quantized=backend == "onnx-int8"
+        )
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(
+        model_name=CONST.SELECTED_EMBEDDING_MODEL,
+        cache_folder=CONST.EMBEDDING_CACHE_DIR
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX.")
+    parser.add_argument("--quantize", action="store_true", help="Also write a dynamically int8-quantized model.")
+    args = parser.parse_args()
+    export_onnx(CONST.SELECTED_EMBEDDING_MODEL, CONST.EMBEDDING_CACHE_DIR, CONST.ONNX_MODEL_DIR, quantize=args.quantize)
+
+
+if __name__ == "__main__":
+    main()
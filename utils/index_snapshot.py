@@ -0,0 +1,149 @@
+import os
+import io
+import json
+import time
+import hashlib
+import tarfile
+import tempfile
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+SNAPSHOT_FORMAT_VERSION = 1
+MANIFEST_MEMBER = "manifest.json"
+EMBEDDINGS_MEMBER = "embeddings.npy"
+CHUNKS_MEMBER = "chunks.json"
+SIDECAR_PREFIX = "sidecars/"
+HASH_BLOCK_BYTES = 1 << 20
+
+
+def _sha256(stream) -> str:
+    digest = hashlib.sha256()
+    for block in iter(lambda: stream.read(HASH_BLOCK_BYTES), b""):
+        digest.update(block)
+    return digest.hexdigest()
+
+
+def write_snapshot(path: str, pages: Iterable[Dict], embedding_model: str,
+                   sidecars: Optional[Dict[str, str]] = None) -> Dict:
+    """Write a snapshot from Chroma-style pages ({"ids", "embeddings", "documents", "metadatas"}).
+
+    The artifact is an uncompressed tar so the embedding matrix can be
+    memory-mapped in place on import. Sidecars are extra files (name -> path),
+    such as the BM25 index, stored verbatim. Returns the snapshot manifest.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        raw_path = os.path.join(tmp_dir, "embeddings.raw")
+        ids, texts, metadatas, dim = [], [], [], 0
+        with open(raw_path, "wb") as raw:
+            for page in pages:
+                if not page["ids"]:
+                    continue
+                vectors = np.ascontiguousarray(page["embeddings"], dtype=np.float32)
+                dim = vectors.shape[1]
+                raw.write(vectors.tobytes())
+                ids.extend(page["ids"])
+                texts.extend(page["documents"])
+                metadatas.extend(page["metadatas"])
+
+        # Prepend the .npy header to the rows streamed out above
+        embeddings_path = os.path.join(tmp_dir, EMBEDDINGS_MEMBER)
+        with open(embeddings_path, "wb") as file, open(raw_path, "rb") as raw:
+            header = {"descr": np.lib.format.dtype_to_descr(np.dtype(np.float32)),
+                      "fortran_order": False, "shape": (len(ids), dim)}
+            np.lib.format.write_array_header_1_0(file, header)
+            while block := raw.read(HASH_BLOCK_BYTES):
+                file.write(block)
+        os.remove(raw_path)
+
+        chunks_path = os.path.join(tmp_dir, CHUNKS_MEMBER)
+        with open(chunks_path, "w", encoding="utf-8") as file:
+            json.dump({"ids": ids, "texts": texts, "metadatas": metadatas}, file)
+
+        members = {EMBEDDINGS_MEMBER: embeddings_path, CHUNKS_MEMBER: chunks_path}
+        for name, sidecar_path in (sidecars or {}).items():
+            if os.path.exists(sidecar_path):
+                members[SIDECAR_PREFIX + name] = sidecar_path
+
+        checksums = {}
+        for name, member_path in members.items():
+            with open(member_path, "rb") as file:
+                checksums[name] = _sha256(file)
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "embedding_model": embedding_model,
+            "count": len(ids),
+            "dim": dim,
+            "checksums": checksums
+        }
+
+        tmp_path = path + ".tmp"
+        with tarfile.open(tmp_path, "w") as tar:
+            manifest_bytes = json.dumps(manifest, indent=2).encode("utf-8")
+            info = tarfile.TarInfo(MANIFEST_MEMBER)
+            info.size, info.mtime = len(manifest_bytes), int(time.time())
+            tar.addfile(info, io.BytesIO(manifest_bytes))
+            for name, member_path in members.items():
+                tar.add(member_path, arcname=name)
+        os.replace(tmp_path, path)
+    return manifest
+
+
+class IndexSnapshot:
+    """Read side of a snapshot: verified on open, embeddings memory-mapped straight from the tar."""
+
+    def __init__(self, path: str, verify: bool = True):
+        self.path = path
+        with tarfile.open(path, "r:") as tar:
+            self.members = {member.name: member for member in tar.getmembers()}
+            if MANIFEST_MEMBER not in self.members:
+                raise ValueError(f"{path} is not an index snapshot (no {MANIFEST_MEMBER})")
+            self.manifest = json.load(tar.extractfile(MANIFEST_MEMBER))
+            if self.manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+                raise ValueError(f"Unsupported snapshot format version {self.manifest.get('format_version')}")
+            if verify:
+                self._verify(tar)
+
+    def _verify(self, tar):
+        for name, expected in self.manifest["checksums"].items():
+            if name not in self.members:
+                raise ValueError(f"Snapshot is missing {name}")
+            if _sha256(tar.extractfile(name)) != expected:
+                raise ValueError(f"Checksum mismatch for {name}, the snapshot is corrupt")
+
+    @property
+    def embedding_model(self) -> str:
+        return self.manifest["embedding_model"]
+
+    def embeddings(self) -> np.ndarray:
+        """The (count, dim) float32 matrix, memory-mapped read-only at its offset inside the tar."""
+        if not self.manifest["count"]:
+            return np.zeros((0, self.manifest["dim"]), dtype=np.float32)
+        member = self.members[EMBEDDINGS_MEMBER]
+        with open(self.path, "rb") as file:
+            file.seek(member.offset_data)
+            np.lib.format.read_magic(file)
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+            data_offset = file.tell()
+        return np.memmap(self.path, dtype=dtype, mode="r", offset=data_offset, shape=shape,
+                         order="F" if fortran_order else "C")
+
+    def chunks(self) -> Dict:
+        """Columnar {"ids", "texts", "metadatas"}."""
+        with tarfile.open(self.path, "r:") as tar:
+            return json.load(tar.extractfile(CHUNKS_MEMBER))
+
+    def sidecars(self) -> Dict[str, str]:
+        return {
+            name[len(SIDECAR_PREFIX):]: name
+            for name in self.members if name.startswith(SIDECAR_PREFIX)
+        }
+
+    def extract_sidecar(self, name: str, target_path: str):
+        with tarfile.open(self.path, "r:") as tar:
+            data = tar.extractfile(SIDECAR_PREFIX + name).read()
+        tmp_path = target_path + ".tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, target_path)
@@ -0,0 +1,146 @@
+import os
+import sys
+import json
+import time
+import logging
+import platform
+import tempfile
+from typing import Dict, List, Optional
+
+from utils.ingestor_prepator import CONST
+from utils.synthetic_corpus import write_synthetic_corpus
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Metrics compared against a baseline: name -> True when higher is better
+COMPARED_METRICS = {
+    "pages_per_sec": True,
+    "chunks_per_sec": True,
+    "embeddings_per_sec": True,
+    "elapsed_seconds": False,
+    "peak_rss_mb": False
+}
+
+# Paths redirected into the temporary directory so the real index is never touched
+ISOLATED_PATHS = {
+    "SOURCE_DOCS_DIR": "source_documents",
+    "CHROMA_DB_DIR": "vector_db",
+    "NUMPY_INDEX_DIR": "vector_db/numpy_index",
+    "INDEX_VERSION_FILE": "vector_db/index_version",
+    "BM25_INDEX_PATH": "vector_db/bm25_index.json",
+    "INGEST_MANIFEST_PATH": "vector_db/ingest_manifest.json",
+    "DEDUP_INDEX_PATH": "vector_db/dedup_index.json",
+    "INGEST_REPORT_PATH": "ingest_report.json",
+    "LOGS_DIR": "logs"
+}
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def summarize(ingest_report: Dict) -> Dict:
+    """Totals per stage and throughput figures from an ingest report."""
+    stages = ingest_report["stages"].values()
+    totals = {
+        key: sum(stats[key] or 0.0 for stats in stages)
+        for key in ("pages", "chunks", "embedded", "parse_seconds", "split_seconds",
+                    "dedup_seconds", "embed_seconds", "write_seconds", "total_seconds")
+    }
+    elapsed = ingest_report["elapsed_seconds"]
+    return {
+        "elapsed_seconds": elapsed,
+        "totals": totals,
+        "pages_per_sec": totals["pages"] / elapsed if elapsed else 0.0,
+        "chunks_per_sec": totals["chunks"] / elapsed if elapsed else 0.0,
+        "embeddings_per_sec": totals["embedded"] / totals["embed_seconds"] if totals["embed_seconds"] else 0.0,
+        "stage_share": {
+            key.replace("_seconds", ""): totals[key] / totals["total_seconds"] if totals["total_seconds"] else 0.0
+            for key in ("parse_seconds", "split_seconds", "dedup_seconds", "embed_seconds", "write_seconds")
+        }
+    }
+
+
+def run_benchmark(files: int = 4, pages: int = 50, seed: int = 0, workers: int = 1) -> Dict:
+    """Ingest a synthetic PDF corpus into a throwaway index and return the benchmark report."""
+    from utils.documents_ingestor import DocumentIngester
+
+    original = {name: getattr(CONST, name) for name in ISOLATED_PATHS}
+    # The ingester logs to LOGS_DIR/ingest.log through the root logger; detach any
+    # handler already writing to the real log so the run stays in the temporary directory
+    root_logger = logging.getLogger()
+    original_handlers = root_logger.handlers[:]
+    root_logger.handlers = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, relative in ISOLATED_PATHS.items():
+            setattr(CONST, name, os.path.join(tmp_dir, relative))
+        os.makedirs(CONST.CHROMA_DB_DIR, exist_ok=True)
+        try:
+            write_synthetic_corpus(CONST.SOURCE_DOCS_DIR, files, pages, seed=seed)
+            ingester = DocumentIngester(force=True)
+            ingester.ingest_documents(workers=workers)
+            with open(CONST.INGEST_REPORT_PATH, "r", encoding="utf-8") as file:
+                ingest_report = json.load(file)
+        finally:
+            for name, value in original.items():
+                setattr(CONST, name, value)
+            for handler in root_logger.handlers:
+                handler.close()
+            root_logger.handlers = original_handlers
+
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "corpus": {"files": files, "pages_per_file": pages, "seed": seed},
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "workers": workers,
+            "embedding_model": CONST.SELECTED_EMBEDDING_MODEL,
+            "embedding_backend": CONST.EMBEDDING_BACKEND,
+            "vector_backend": CONST.VECTOR_BACKEND,
+            "batch_size": CONST.BATCH_SIZE
+        },
+        **summarize(ingest_report),
+        "peak_rss_mb": peak_rss_mb(),
+        "files": ingest_report["stages"]
+    }
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float = 0.1) -> List[Dict]:
+    """Per-metric change against the baseline; regressed when worse by more than tolerance."""
+    rows = []
+    for metric, higher_is_better in COMPARED_METRICS.items():
+        current, previous = report.get(metric), baseline.get(metric)
+        if not current or not previous:
+            continue
+        change = (current - previous) / previous
+        worse = -change if higher_is_better else change
+        rows.append({
+            "metric": metric,
+            "baseline": previous,
+            "current": current,
+            "change": change,
+            "regressed": worse > tolerance
+        })
+    return rows
+
+
+def print_report(report: Dict, comparison: Optional[List[Dict]] = None):
+    totals = report["totals"]
+    print(f"📊 Ingested {report['corpus']['files']} files, {totals['pages']:.0f} pages, "
+          f"{totals['chunks']:.0f} chunks in {report['elapsed_seconds']:.2f}s")
+    print(f"   {report['pages_per_sec']:.1f} pages/s, {report['chunks_per_sec']:.1f} chunks/s, "
+          f"{report['embeddings_per_sec']:.1f} embeddings/s, peak RSS {report['peak_rss_mb'] or 0:.0f} MB")
+    print("   time share: " + ", ".join(f"{stage} {share:.0%}" for stage, share in report["stage_share"].items()))
+    if comparison:
+        print(f"{'metric':<22}{'baseline':>12}{'current':>12}{'change':>9}")
+        for row in comparison:
+            flag = "  ❌ regression" if row["regressed"] else ""
+            print(f"{row['metric']:<22}{row['baseline']:>12.2f}{row['current']:>12.2f}{row['change']:>+9.1%}{flag}")
@@ -0,0 +1,226 @@
+import os
+import json
+import time
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+import requests
+
+IGNORED_PREFIXES = (".", "~$")
+IGNORED_SUFFIXES = (".tmp", ".part", ".crdownload")
+
+
+def is_document_path(path: str) -> bool:
+    name = os.path.basename(path)
+    return not name.startswith(IGNORED_PREFIXES) and not name.endswith(IGNORED_SUFFIXES)
+
+
+class IngestDaemon:
+    """Watches the source folder and runs incremental ingests after bursts of file events settle.
+
+    Events come from watchdog (inotify on Linux) when it is installed, else
+    from polling directory mtimes. Every ingest goes through the manifest, so
+    only new or changed files are embedded and deleted files are removed.
+    """
+
+    def __init__(self, ingester, source_dir: str, debounce_seconds: float = 2.0, poll_interval: float = 5.0,
+                 knowledge_server_url: Optional[str] = None, metrics_port: Optional[int] = None):
+        self.ingester = ingester
+        self.source_dir = source_dir
+        self.debounce_seconds = debounce_seconds
+        self.poll_interval = poll_interval
+        self.knowledge_server_url = knowledge_server_url
+        self.metrics_port = metrics_port
+
+        self.pending: Dict[str, float] = {}  # path -> time of its first unprocessed event
+        self.last_event_at = 0.0
+        self.in_progress = 0
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stop_event = threading.Event()
+        self.watcher_kind = None
+        self.observer = None
+        self.metrics_server = None
+        self.metrics: Dict[str, Any] = {
+            "ingests": 0,
+            "files_ingested": 0,
+            "failures": 0,  # failed files plus failed ingest runs
+            "last_ingest_at": None,
+            "last_ingest_seconds": None,
+            "last_freshness_lag_seconds": None,
+            "max_freshness_lag_seconds": 0.0,
+            "last_error": None
+        }
+
+    def on_event(self, path: str):
+        """Queue a created, modified, moved or deleted document."""
+        if not is_document_path(path):
+            return
+        now = time.time()
+        with self.lock:
+            self.pending.setdefault(path, now)
+            self.last_event_at = now
+        self.wakeup.set()
+
+    def queue_depth(self) -> int:
+        with self.lock:
+            return len(self.pending) + self.in_progress
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self.lock:
+            oldest = min(self.pending.values()) if self.pending else None
+            return {
+                **self.metrics,
+                "queue_depth": len(self.pending) + self.in_progress,
+                "oldest_pending_age_seconds": time.time() - oldest if oldest else 0.0,
+                "watcher": self.watcher_kind
+            }
+
+    def _start_watcher(self):
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            logging.warning("watchdog is not installed, polling the source folder instead")
+            self.watcher_kind = "polling"
+            threading.Thread(target=self._poll, name="ingest-poll", daemon=True).start()
+            return
+
+        daemon = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory:
+                    return
+                daemon.on_event(event.src_path)
+                if getattr(event, "dest_path", None):
+                    daemon.on_event(event.dest_path)
+
+        self.watcher_kind = "watchdog"
+        self.observer = Observer()
+        self.observer.schedule(Handler(), self.source_dir, recursive=False)
+        self.observer.start()
+
+    def _snapshot(self) -> Dict[str, tuple]:
+        snapshot = {}
+        for name in os.listdir(self.source_dir):
+            path = os.path.join(self.source_dir, name)
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                snapshot[path] = (stat.st_size, stat.st_mtime)
+        return snapshot
+
+    def _poll(self):
+        previous = self._snapshot()
+        while not self.stop_event.wait(self.poll_interval):
+            current = self._snapshot()
+            for path in set(previous) | set(current):
+                if previous.get(path) != current.get(path):
+                    self.on_event(path)
+            previous = current
+
+    def _notify_knowledge_server(self):
+        if not self.knowledge_server_url:
+            return
+        try:
+            response = requests.post(f"{self.knowledge_server_url}/cache/invalidate", timeout=5)
+            logging.info(f"Knowledge server cache invalidation: {response.status_code}")
+        except Exception as e:
+            logging.warning(f"⚠️ Could not reach knowledge server to invalidate caches: {str(e)}")
+
+    def _ingest_pending(self):
+        with self.lock:
+            batch, self.pending = self.pending, {}
+            self.in_progress = len(batch)
+        print(f"📥 {len(batch)} changed files, ingesting: {[os.path.basename(path) for path in batch]}")
+        start = time.time()
+        completed = False
+        try:
+            self.ingester.last_report = None
+            self.ingester.ingest_documents()
+            # ingest_documents reports its own errors and returns without a report
+            report = self.ingester.last_report
+            if report is None:
+                raise RuntimeError(getattr(self.ingester, "last_error", None) or "ingest finished without a report")
+            self.metrics["files_ingested"] += len(report["files"]["processed"])
+            self.metrics["failures"] += len(report["files"]["failed"])
+            self.metrics["last_error"] = None
+            completed = True
+        except Exception as e:
+            self.metrics["failures"] += 1
+            self.metrics["last_error"] = str(e)
+            logging.error(f"❌ Daemon ingest failed: {str(e)}")
+        finished = time.time()
+        lag = finished - min(batch.values())
+        self.metrics.update(
+            ingests=self.metrics["ingests"] + 1,
+            last_ingest_at=finished,
+            last_ingest_seconds=finished - start,
+            last_freshness_lag_seconds=lag,
+            max_freshness_lag_seconds=max(self.metrics["max_freshness_lag_seconds"], lag)
+        )
+        with self.lock:
+            self.in_progress = 0
+        if completed:
+            self._notify_knowledge_server()
+        logging.info(f"Daemon ingest finished, freshness lag {lag:.1f}s")
+
+    def _serve_metrics(self):
+        daemon = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = json.dumps(daemon.get_metrics()).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.metrics_server = ThreadingHTTPServer(("0.0.0.0", self.metrics_port), MetricsHandler)
+        threading.Thread(target=self.metrics_server.serve_forever, name="ingest-metrics", daemon=True).start()
+        print(f"📈 Daemon metrics at http://localhost:{self.metrics_port}/metrics")
+
+    def run(self):
+        """Catch up once, then ingest after each debounced burst of events until interrupted."""
+        self._start_watcher()
+        if self.metrics_port:
+            self._serve_metrics()
+        print(f"👀 Watching {self.source_dir} ({self.watcher_kind}, debounce {self.debounce_seconds}s)")
+        # Catch up on changes made while the daemon was not running
+        with self.lock:
+            self.pending[self.source_dir] = time.time()
+        self.wakeup.set()
+        try:
+            while not self.stop_event.is_set():
+                self.wakeup.wait(self.poll_interval)
+                self.wakeup.clear()
+                with self.lock:
+                    quiet_for = time.time() - self.last_event_at
+                    has_pending = bool(self.pending)
+                if not has_pending:
+                    continue
+                if quiet_for < self.debounce_seconds:
+                    # More events may follow; look again once the burst has been quiet long enough
+                    self.stop_event.wait(self.debounce_seconds - quiet_for)
+                    continue
+                self._ingest_pending()
+        except KeyboardInterrupt:
+            print("Stopping ingest daemon...")
+        finally:
+            self.stop()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.observer:
+            self.observer.stop()
+        if self.metrics_server:
+            self.metrics_server.shutdown()
@@ -0,0 +1,117 @@
+import os
+import json
+import hashlib
+from typing import Dict, List, Optional
+
+from langchain.schema import Document
+
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def file_sha256(file_path: str) -> str:
+    """Content hash of a file, read in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(file_name: str, chunk: Document) -> str:
+    """Deterministic chunk ID from its file, position and text, so re-ingesting upserts instead of duplicating."""
+    key = "\x1f".join([
+        file_name,
+        str(chunk.metadata.get("page", "")),
+        str(chunk.metadata.get("start_index", "")),
+        chunk.page_content
+    ])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+class IngestManifest:
+    """Persisted record of ingested files: content hash, size, mtime and chunk IDs.
+
+    duplicate_of lists the chunks (usually of other files) that a file's
+    dropped duplicate chunks depend on; when those go away the file is
+    marked stale and re-ingested so its copy of the content is stored.
+    The embedding model (and backend) is stored too; when it changes every
+    file is treated as changed because stored vectors are no longer comparable.
+    """
+
+    def __init__(self, path: str, embedding_model: str):
+        self.path = path
+        self.embedding_model = embedding_model
+        self.files: Dict[str, Dict] = {}
+        self.model_changed = False
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        self.files = data.get("files", {})
+        self.model_changed = bool(self.files) and data.get("embedding_model") != self.embedding_model
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"embedding_model": self.embedding_model, "files": self.files}, file, indent=2)
+        os.replace(tmp_path, self.path)
+        self.model_changed = False
+
+    def is_unchanged(self, file_name: str, file_path: str) -> bool:
+        """True when the file matches its entry; size + mtime are checked before hashing."""
+        entry = self.files.get(file_name)
+        if entry is None or self.model_changed or entry.get("stale"):
+            return False
+        stat = os.stat(file_path)
+        if entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            return True
+        if entry["size"] != stat.st_size or entry["sha256"] != file_sha256(file_path):
+            return False
+        entry["mtime"] = stat.st_mtime  # touched but identical
+        return True
+
+    def chunk_ids(self, file_name: str) -> List[str]:
+        return list(self.files.get(file_name, {}).get("chunk_ids", []))
+
+    def record(self, file_name: str, file_path: str, chunk_ids: List[str], sha256: Optional[str] = None,
+               duplicate_of: Optional[List[str]] = None):
+        stat = os.stat(file_path)
+        self.files[file_name] = {
+            "sha256": sha256 or file_sha256(file_path),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "chunk_ids": chunk_ids,
+            "duplicate_of": duplicate_of or []
+        }
+
+    def dependents(self, doc_ids) -> List[str]:
+        """Files that dropped chunks as duplicates of any of these chunk IDs."""
+        doc_ids = set(doc_ids)
+        return [name for name, entry in self.files.items() if doc_ids.intersection(entry.get("duplicate_of", []))]
+
+    def mark_stale(self, file_names):
+        """Force these files to be re-ingested on the next run."""
+        for file_name in file_names:
+            if file_name in self.files:
+                self.files[file_name]["stale"] = True
+
+    def forget(self, file_name: str) -> List[str]:
+        """Drop a file's entry and return the chunk IDs it owned."""
+        return self.files.pop(file_name, {}).get("chunk_ids", [])
+
+    def forget_chunk(self, doc_id: str):
+        for entry in self.files.values():
+            if doc_id in entry["chunk_ids"]:
+                entry["chunk_ids"].remove(doc_id)
+
+    def forget_chunks(self, doc_ids):
+        doc_ids = set(doc_ids)
+        for entry in self.files.values():
+            entry["chunk_ids"] = [doc_id for doc_id in entry["chunk_ids"] if doc_id not in doc_ids]
+
+    def clear(self):
+        self.files = {}
+        self.model_changed = False
@@ -21,6 +21,9 @@ class Constants:
         self.init_directories()
         self.init_model_settings()
         self.init_chroma_settings()
+        self.init_vector_store_settings()
+        self.init_topic_settings()
+        self.init_ingestion_settings()
         self.init_document_loaders()
     
     def init_directories(self):
@@ -40,11 +43,46 @@ class Constants:
         self.BATCH_SIZE = self.CONFIG['model']['batch_size']
         self.CONTEXT_WINDOW = self.CONFIG['model']['context_window']
         self.SELECTED_EMBEDDING_MODEL = self.CONFIG['model']['embedding_model']
+        self.EMBEDDING_BACKEND = self.CONFIG['model']['embedding_backend']
     
     def init_chroma_settings(self):
         self.CHROMA_SETTINGS = {
             "persist_directory": self.CHROMA_DB_DIR,
         }
+        # Touched after every ingest so readers can drop stale caches
+        self.INDEX_VERSION_FILE = os.path.join(self.CHROMA_DB_DIR, "index_version")
+    
+    def init_vector_store_settings(self):
+        self.VECTOR_BACKEND = self.CONFIG['vector_store']['backend']
+        self.NUMPY_INDEX_DIR = os.path.join(self.CHROMA_DB_DIR, self.CONFIG['vector_store']['numpy_dir'])
+        self.NUMPY_INDEX_DTYPE = self.CONFIG['vector_store']['dtype']
+        self.NUMPY_RESCORE_FACTOR = self.CONFIG['vector_store']['rescore_factor']
+        hnsw = self.CONFIG['vector_store'].get('hnsw', {})
+        self.HNSW_METADATA = {
+            "hnsw:M": hnsw.get('M', 32),
+            "hnsw:construction_ef": hnsw.get('construction_ef', 64),
+            "hnsw:search_ef": hnsw.get('search_ef', 64)
+        }
+        # Hugging Face model cache; kept separate so index locations can move without re-downloading
+        self.EMBEDDING_CACHE_DIR = self.CHROMA_DB_DIR
+        self.ONNX_MODEL_DIR = os.path.join(
+            self.CHROMA_DB_DIR, "onnx", self.SELECTED_EMBEDDING_MODEL.split("/")[-1]
+        )
+        self.BM25_INDEX_PATH = os.path.join(self.CHROMA_DB_DIR, "bm25_index.json")
+        self.INGEST_MANIFEST_PATH = os.path.join(self.CHROMA_DB_DIR, "ingest_manifest.json")
+    
+    def init_topic_settings(self):
+        self.TOPICS = {
+            topic: [keyword.lower() for keyword in keywords]
+            for topic, keywords in self.CONFIG['topics'].items()
+        }
+    
+    def init_ingestion_settings(self):
+        workers = self.CONFIG.get('ingestion', {}).get('workers', 1)
+        self.INGEST_WORKERS = workers if workers > 0 else (os.cpu_count() or 1)
+        self.DEDUP_CONFIG = self.CONFIG.get('ingestion', {}).get('dedup', {})
+        self.DEDUP_INDEX_PATH = os.path.join(self.CHROMA_DB_DIR, "dedup_index.json")
+        self.INGEST_REPORT_PATH = os.path.join(self.LOGS_DIR, "ingest_report.json")
     
     def init_document_loaders(self):
         self.DOCUMENT_LOADERS = {
@@ -0,0 +1,98 @@
+import os
+import json
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from utils.stub_llm_server import StubLLMServer, replay_key
+
+LLM_BACKENDS = ("openai", "local", "stub")
+MESSAGE_ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+
+
+def create_openai_llm(llm_config: Dict, base_url: Optional[str] = None, api_key: Optional[str] = None):
+    """Chat model for any OpenAI-compatible API (OpenAI itself, vLLM, llama.cpp server, the stub)."""
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        model=llm_config.get("model", "gpt-4o"),
+        openai_api_key=api_key or os.getenv("OPENAI_API_KEY"),
+        base_url=base_url or llm_config.get("base_url"),
+        temperature=llm_config.get("temperature", 0.1),
+        timeout=llm_config.get("timeout_seconds", 60),
+        max_retries=llm_config.get("max_retries", 2)
+    )
+
+
+def create_local_llm(model_config: Dict, llm_config: Dict):
+    """Chat model running in-process on CPU: llama.cpp for .gguf files, transformers otherwise."""
+    path = model_config["path"]
+    max_tokens = llm_config.get("max_tokens", 512)
+    if path.endswith(".gguf"):
+        from langchain_community.chat_models import ChatLlamaCpp
+        return ChatLlamaCpp(
+            model_path=path,
+            n_gpu_layers=model_config.get("gpu_layers", 0),
+            n_ctx=model_config.get("context_window", 4096),
+            n_threads=llm_config.get("threads"),
+            temperature=llm_config.get("temperature", 0.1),
+            max_tokens=max_tokens
+        )
+
+    from langchain_community.chat_models import ChatHuggingFace
+    from langchain_community.llms import HuggingFacePipeline
+    if model_config.get("gpu_layers"):
+        logging.info("gpu_layers only applies to llama.cpp models; running the transformers model on CPU.")
+    pipeline = HuggingFacePipeline.from_model_id(
+        model_id=path,
+        task="text-generation",
+        device=-1,
+        model_kwargs={"max_length": model_config.get("context_window", 4096)},
+        pipeline_kwargs={"max_new_tokens": max_tokens, "do_sample": False, "return_full_text": False}
+    )
+    return ChatHuggingFace(llm=pipeline)
+
+
+def create_llm(config: Dict, base_url: Optional[str] = None):
+    """Build the chat model for the configured llm.backend ("openai", "local" or "stub")."""
+    llm_config = config.get("llm", {})
+    backend = llm_config.get("backend", "openai")
+    if backend not in LLM_BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{backend}', expected one of {LLM_BACKENDS}")
+    if backend == "local":
+        return create_local_llm(config.get("model", {}), llm_config)
+    if backend == "stub":
+        stub_config = llm_config.get("stub", {})
+        return create_openai_llm(llm_config, base_url=base_url or stub_config.get("url", "http://127.0.0.1:5060/v1"),
+                                 api_key="stub")
+    return create_openai_llm(llm_config, base_url=base_url)
+
+
+def start_stub_server(stub_config: Dict) -> StubLLMServer:
+    """Run the stub LLM server inside this process, configured from llm.stub."""
+    return StubLLMServer(
+        port=stub_config.get("port", 0),
+        replay_path=stub_config.get("replay_path"),
+        base_latency_ms=stub_config.get("base_latency_ms", 30.0),
+        prefill_ms_per_token=stub_config.get("prefill_ms_per_token", 0.4),
+        token_interval_ms=stub_config.get("token_interval_ms", 15.0),
+        latency_distribution=stub_config.get("latency_distribution", "fixed"),
+        latency_sigma=stub_config.get("latency_sigma", 0.3),
+        seed=stub_config.get("seed", 0)
+    ).start()
+
+
+class DecisionRecorder:
+    """Appends every LLM reply to a JSONL file that the stub server can replay."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def record(self, messages: List, reply: str):
+        kind, key = replay_key([
+            {"role": MESSAGE_ROLES.get(message.type, message.type), "content": message.content}
+            for message in messages
+        ])
+        with self.lock, open(self.path, "a", encoding="utf-8") as file:
+            file.write(json.dumps({"kind": kind, "key": key, "reply": reply}) + "\n")
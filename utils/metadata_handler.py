@@ -1,6 +1,10 @@
 import os
+import copy
+import json
+import hashlib
 import logging
-from typing import Dict, Optional
+import threading
+from typing import Callable, Dict, List, Optional
 import yaml
 
 class MetadataHandler:
@@ -8,6 +12,9 @@ class MetadataHandler:
         self.metadata_path = metadata_path
         self.last_metadata = None
         self.last_modified_time = 0
+        self.subscribers: List[Callable[[Dict, Dict, List[str]], None]] = []
+        self.watch_thread = None
+        self.stop_event = threading.Event()
 
     def load_latest_metadata(self) -> Dict:
         """Load and cache the latest metadata from YAML file."""
@@ -23,6 +30,48 @@ class MetadataHandler:
             logging.error(f"❌ Error loading YAML metadata: {str(e)}")
             return {}
 
+    def subscribe(self, callback: Callable[[Dict, Dict, List[str]], None]):
+        """Register a callback(previous, current, changed_fields) for metadata changes."""
+        self.subscribers.append(callback)
+
+    def watch(self, interval: float = 1.0):
+        """Poll the metadata file in a daemon thread and notify subscribers of changed fields."""
+        if self.watch_thread:
+            return
+
+        def poll():
+            previous = copy.deepcopy(self.load_latest_metadata())
+            while not self.stop_event.wait(interval):
+                current = self.load_latest_metadata()
+                changed = sorted(key for key in set(previous) | set(current) if previous.get(key) != current.get(key))
+                if not changed:
+                    continue
+                logging.info(f"📡 Metadata changed: {', '.join(changed)}")
+                for callback in list(self.subscribers):
+                    try:
+                        callback(previous, current, changed)
+                    except Exception as e:
+                        logging.error(f"❌ Metadata subscriber failed: {str(e)}")
+                previous = copy.deepcopy(current)
+
+        self.watch_thread = threading.Thread(target=poll, name="metadata-watch", daemon=True)
+        self.watch_thread.start()
+
+    def stop_watching(self):
+        self.stop_event.set()
+
+    @staticmethod
+    def fingerprint(metadata: Optional[Dict], fields: List[str]) -> str:
+        """Hash the selected metadata fields into a short stable key."""
+        selected = {field: (metadata or {}).get(field) for field in fields}
+        payload = json.dumps(selected, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def prompt_fingerprint(formatted_metadata: str) -> str:
+        """Short stable key for the metadata text exactly as it appears in a prompt."""
+        return hashlib.sha1(formatted_metadata.encode("utf-8")).hexdigest()[:16]
+
     @staticmethod
     def format_metadata_for_prompt(metadata: Optional[Dict]) -> str:
         """Format YAML metadata into a readable prompt for the LLM."""
@@ -0,0 +1,106 @@
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+
+def format_state_value(value: Any) -> str:
+    """Render a metadata value for a query, e.g. {"value": 42, "unit": "C"} -> "42 C"."""
+    if isinstance(value, dict):
+        return " ".join(str(item) for item in value.values())
+    return str(value)
+
+
+class StatePrefetcher:
+    """Retrieves knowledge ahead of time for vehicle-state fields that just changed.
+
+    One entry is kept per watched field. get_knowledge can serve a user query
+    from an entry whose prefetch query is nearly the same in embedding space
+    and was retrieved with the same search mode.
+    """
+
+    def __init__(self, retrieve_fn: Callable[[str, str, Any], List], embed_fn: Callable[[str], List[float]],
+                 field_queries: Dict[str, str], match_threshold: float = 0.85, search_mode: str = "vector"):
+        self.retrieve_fn = retrieve_fn
+        self.embed_fn = embed_fn
+        self.field_queries = field_queries
+        self.match_threshold = match_threshold
+        self.search_mode = search_mode
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.prefetches = 0
+
+    def prefetch_field(self, field: str, value: Any):
+        """Build the query for one field's new value and retrieve its documents."""
+        if value is None:
+            with self.lock:
+                self.entries.pop(field, None)
+            return
+        query = self.field_queries[field].format(value=format_state_value(value))
+        start = time.perf_counter()
+        embedding = np.asarray(self.embed_fn(query), dtype=np.float32)
+        documents = self.retrieve_fn(query, field, value)
+        with self.lock:
+            self.entries[field] = {
+                "query": query,
+                "value": value,
+                "embedding": embedding / (np.linalg.norm(embedding) or 1.0),
+                "documents": documents,
+                "created_at": time.time()
+            }
+            self.prefetches += 1
+        logging.info(f"📥 Prefetched {len(documents)} documents for {field} in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def prefetch_all(self, metadata: Dict):
+        for field in self.field_queries:
+            self.prefetch_field(field, metadata.get(field))
+
+    def on_metadata_change(self, previous: Dict, current: Dict, changed: List[str]):
+        """MetadataHandler subscriber: refresh entries for the watched fields that changed."""
+        for field in changed:
+            if field in self.field_queries:
+                self.prefetch_field(field, current.get(field))
+
+    def lookup(self, query_embedding, k: int, search_mode: str = None) -> Optional[List]:
+        """Prefetched documents for a query close to one of the prefetch queries, or None."""
+        if search_mode is not None and search_mode != self.search_mode:
+            return None
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        with self.lock:
+            best_entry, best_score = None, self.match_threshold
+            for entry in self.entries.values():
+                score = float(entry["embedding"] @ query)
+                if score >= best_score and len(entry["documents"]) >= k:
+                    best_entry, best_score = entry, score
+            if best_entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return best_entry["documents"][:k]
+
+    def context(self) -> Dict[str, Dict[str, Any]]:
+        """Current prefetched entries without their embeddings."""
+        with self.lock:
+            return {
+                field: {key: value for key, value in entry.items() if key != "embedding"}
+                for field, entry in self.entries.items()
+            }
+
+    def invalidate(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "prefetches": self.prefetches,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
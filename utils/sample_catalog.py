@@ -0,0 +1,88 @@
+import os
+import importlib.util
+from typing import Dict
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Mirrors MotorControlServer.get_available_tools
+MOTOR_DIRECTIONS = {
+    "track": ["forward", "backward"],
+    "height": ["up", "down"],
+    "backrest": ["forward", "backward"],
+    "seattilt": ["up", "down"],
+    "uba": ["forward", "backward"],
+    "headrest": ["forward", "backward"]
+}
+
+
+def _tools_definition():
+    # Loaded by path: the mcp/ folder would otherwise shadow the installed mcp package
+    spec = importlib.util.spec_from_file_location("tools_definition", os.path.join(ROOT_DIR, "mcp", "tools_definition.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _move_tool(motor: str, direction: str) -> Dict:
+    properties = {
+        param: {"type": "integer", "description": f"{param.replace('_', ' ')} ({low}-{high})", "minimum": low, "maximum": high}
+        for param, (low, high) in {"current_value": (0, 100), "step": (10, 10), "new_value": (0, 100)}.items()
+    }
+    properties["step"].update(default=10, enum=[10])
+    return {
+        "name": f"move_{motor}_{direction}",
+        "description": f"Move {motor} {direction}",
+        "parameters": {"type": "object", "properties": properties, "required": ["current_value"]}
+    }
+
+
+def sample_available_tools() -> Dict:
+    """The tool catalog the host discovers from the motor and knowledge servers, built offline for benchmarks."""
+    definitions = _tools_definition()
+    motor_tools = [definitions.get_seat_adjustment_tool(), definitions.get_pelvis_drift_tool()]
+    motor_tools += [_move_tool(motor, direction) for motor, directions in MOTOR_DIRECTIONS.items() for direction in directions]
+    knowledge_tools = [
+        {
+            "name": "get_knowledge",
+            "description": "Retrieve relevant knowledge from the vector database based on the query",
+            "parameters": {"type": "object", "properties": {
+                "query": {"type": "string", "description": "The search query to find relevant documents"},
+                "k": {"type": "integer", "description": "Number of documents to retrieve", "default": 2},
+                "search_mode": {"type": "string", "enum": ["vector", "hybrid"], "description": "Vector-only or hybrid BM25 + vector retrieval"},
+                "filter": {"type": ["object", "string"], "description": "Restrict to a topic (posture, thermal, comfort, fatigue) and/or source file, e.g. {\"topic\": \"posture\"} or \"posture: pelvis drift\""}
+            }, "required": ["query"]}
+        },
+        {
+            "name": "get_knowledge_batch",
+            "description": "Retrieve relevant documents for several queries at once, returned in query order",
+            "parameters": {"type": "object", "properties": {
+                "queries": {"type": "array", "items": {"type": "string"}, "description": "The search queries to find relevant documents for"},
+                "k": {"type": "integer", "description": "Number of documents to retrieve per query", "default": 2},
+                "filter": {"type": ["object", "string"], "description": "Optional topic/source filter applied to every query"}
+            }, "required": ["queries"]}
+        },
+        {
+            "name": "get_driving_metadata",
+            "description": "Get the current driving metadata without performing document retrieval",
+            "parameters": {}
+        }
+    ]
+    return {
+        "motor": {"url": "http://localhost:5051/mcp/execute", "tools": motor_tools},
+        "knowledge": {"url": "http://localhost:5052/mcp/execute", "tools": knowledge_tools}
+    }
+
+
+def sample_metadata(step: int) -> Dict:
+    """A vehicle state that drifts a little on every step, like SeatData/metadata.yaml being rewritten."""
+    return {
+        "motors": {"Track": 60, "Height": 40, "Backrest": 30 + step % 5, "SeatTilt": 3, "Uba": 20, "Headrest": 5},
+        "seatbelt_tightness": 25,
+        "DrivingMode": ["City", "Highway"][step // 10 % 2],
+        "car_speed": ["Low", "Medium", "High"][step % 3],
+        "posture": ["pelvis drift", "upright", "slouching"][step // 4 % 3],
+        "fatigue_level": ["Low", "Medium", "High"][step // 7 % 3],
+        "time_spent": 12 + step,
+        "cabin_tempreature": {"value": 18 + step % 25, "unit": "C"},
+        "ventilation": step % 3
+    }
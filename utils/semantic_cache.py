@@ -0,0 +1,139 @@
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+class SemanticCache:
+    """In-memory cache of past query results, looked up by embedding similarity."""
+
+    def __init__(self, similarity_threshold: float = 0.92, max_entries: int = 512,
+                 ttl_seconds: float = 600, dtype: str = "float32", version_path: Optional[str] = None):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.dtype = np.dtype(dtype)
+        self.version_path = version_path
+        self.lock = threading.Lock()
+
+        self.matrix = None  # (max_entries, dim) of self.dtype, rows are unit vectors
+        self.fingerprints: List[str] = []
+        self.values: List[Any] = []
+        self.created_at: List[float] = []
+        self.last_access: List[float] = []
+        self.index_version = self._read_index_version()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _read_index_version(self) -> float:
+        """Return the modification time of the vector store version marker."""
+        if self.version_path and os.path.exists(self.version_path):
+            return os.path.getmtime(self.version_path)
+        return 0
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _remove(self, idx: int):
+        """Remove an entry by moving the last row into its slot."""
+        last = len(self.values) - 1
+        if idx != last:
+            self.matrix[idx] = self.matrix[last]
+            self.fingerprints[idx] = self.fingerprints[last]
+            self.values[idx] = self.values[last]
+            self.created_at[idx] = self.created_at[last]
+            self.last_access[idx] = self.last_access[last]
+        self.fingerprints.pop()
+        self.values.pop()
+        self.created_at.pop()
+        self.last_access.pop()
+
+    def _expire(self, now: float):
+        for idx in range(len(self.values) - 1, -1, -1):
+            if now - self.created_at[idx] > self.ttl_seconds:
+                self._remove(idx)
+                self.evictions += 1
+
+    def _check_index_version(self):
+        current_version = self._read_index_version()
+        if current_version != self.index_version:
+            logging.info("♻️ Vector store changed, clearing semantic cache")
+            self._clear()
+            self.index_version = current_version
+
+    def _clear(self):
+        self.fingerprints.clear()
+        self.values.clear()
+        self.created_at.clear()
+        self.last_access.clear()
+
+    def lookup(self, embedding, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Return the closest cached entry with a matching fingerprint, or None."""
+        query = self._normalize(embedding)
+        now = time.time()
+        with self.lock:
+            self._check_index_version()
+            self._expire(now)
+
+            count = len(self.values)
+            if count == 0:
+                self.misses += 1
+                return None
+
+            similarities = np.asarray(self.matrix[:count], dtype=np.float32) @ query
+            mask = np.fromiter((fp == fingerprint for fp in self.fingerprints), dtype=bool, count=count)
+            similarities = np.where(mask, similarities, -1.0)
+            best = int(np.argmax(similarities))
+
+            if similarities[best] < self.similarity_threshold:
+                self.misses += 1
+                return None
+
+            self.last_access[best] = now
+            self.hits += 1
+            return {"value": self.values[best], "similarity": float(similarities[best])}
+
+    def store(self, embedding, fingerprint: str, value: Any):
+        """Add an entry, evicting the least recently used one when full."""
+        vector = self._normalize(embedding)
+        now = time.time()
+        with self.lock:
+            self._check_index_version()
+            if self.matrix is None or self.matrix.shape[1] != vector.shape[0]:
+                self.matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=self.dtype)
+                self._clear()
+
+            if len(self.values) >= self.max_entries:
+                self._remove(int(np.argmin(self.last_access)))
+                self.evictions += 1
+
+            idx = len(self.values)
+            self.matrix[idx] = vector
+            self.fingerprints.append(fingerprint)
+            self.values.append(value)
+            self.created_at.append(now)
+            self.last_access.append(now)
+
+    def invalidate(self):
+        """Drop every cached entry."""
+        with self.lock:
+            self._clear()
+            self.index_version = self._read_index_version()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.values),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0
+        }
@@ -0,0 +1,74 @@
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from langchain.schema import Document
+
+PAGE_SEPARATOR = "\n"  # keeps the last word of one page from fusing with the first word of the next
+
+
+def _locate(buffer: str, chunks: List[str]) -> List[int]:
+    """Start offset of each chunk in the buffer (chunks overlap, so each search resumes just past the last hit)."""
+    positions, search_from = [], 0
+    for chunk in chunks:
+        index = buffer.find(chunk, search_from)
+        if index < 0:
+            index = search_from
+        positions.append(index)
+        search_from = index + 1
+    return positions
+
+
+def _origin(segments: List[Tuple[int, Dict, int]], position: int) -> Tuple[Dict, int]:
+    """Page metadata and in-page start index for a buffer offset."""
+    for offset, metadata, page_offset in reversed(segments):
+        if offset <= position:
+            return metadata, page_offset + position - offset
+    offset, metadata, page_offset = segments[0]
+    return metadata, page_offset
+
+
+def _rebase(segments: List[Tuple[int, Dict, int]], position: int) -> List[Tuple[int, Dict, int]]:
+    """Segments describing buffer[position:]."""
+    rebased = []
+    for offset, metadata, page_offset in segments:
+        if offset <= position:
+            rebased = [(0, metadata, page_offset + position - offset)]
+        else:
+            rebased.append((offset - position, metadata, page_offset))
+    return rebased
+
+
+def stream_split(pages: Iterable[Document], splitter) -> Iterator[Document]:
+    """Split pages as they arrive, carrying the unfinished last chunk of each page into the next.
+
+    Only the current page plus one chunk of carry-over is held in memory.
+    Each chunk keeps the metadata of the page it starts on, with
+    ``start_index`` relative to that page, and ``end_page`` set to the page
+    it ends on when pages are numbered.
+    """
+    carry_text, carry_segments = "", []
+
+    def make_chunk(text, position, segments):
+        metadata, start_index = _origin(segments, position)
+        end_metadata, _ = _origin(segments, position + max(len(text) - 1, 0))
+        extra = {"start_index": start_index}
+        if "page" in end_metadata:
+            extra["end_page"] = end_metadata["page"]
+        return Document(page_content=text, metadata={**metadata, **extra})
+
+    for page in pages:
+        separator = PAGE_SEPARATOR if carry_text else ""
+        segments = carry_segments + [(len(carry_text) + len(separator), dict(page.metadata), 0)]
+        buffer = carry_text + separator + page.page_content
+        chunks = splitter.split_text(buffer)
+        if not chunks:
+            continue
+        positions = _locate(buffer, chunks)
+        for text, position in zip(chunks[:-1], positions[:-1]):
+            yield make_chunk(text, position, segments)
+        carry_text = buffer[positions[-1]:]
+        carry_segments = _rebase(segments, positions[-1])
+
+    if carry_text.strip():
+        chunks = splitter.split_text(carry_text)
+        for text, position in zip(chunks, _locate(carry_text, chunks)):
+            yield make_chunk(text, position, carry_segments)
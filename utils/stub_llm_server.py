@@ -0,0 +1,284 @@
+"""Local stand-in for an OpenAI-compatible chat completions server.
+
+It simulates what matters for prompt-layout and latency measurements. Prefill
+time grows with the number of prompt tokens that are not in the prefix cache.
+The prefix cache works like provider-side prompt caching: the longest prefix
+shared with a recent prompt, in fixed-size token blocks above a minimum
+length. Replies are streamed token by token. Usage reports
+prompt_tokens_details.cached_tokens the way OpenAI does.
+
+Replies can be replayed from decisions the host recorded against a real
+model (llm.record_path in config.yaml), and base latency and per-token
+intervals can be drawn from a seeded distribution, so load tests of the
+host are reproducible without network access.
+"""
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import zlib
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.context_packer import count_tokens
+
+DEFAULT_REPLY = json.dumps({
+    "server": "knowledge",
+    "action": "direct_response",
+    "response": "Keep your head against the headrest and take a short break every two hours."
+})
+
+
+LATENCY_DISTRIBUTIONS = ("fixed", "normal", "lognormal")
+
+
+def split_reply_tokens(text: str) -> List[str]:
+    """Word and punctuation pieces (with their leading spaces) streamed as separate deltas."""
+    return re.findall(r"\s*\w+|\s*[^\w\s]", text) or [text]
+
+
+def replay_key(messages: List[Dict]) -> Tuple[str, str]:
+    """(kind, key) of a conversation: tool decisions carry a system prompt, final responses do not."""
+    kind = "decision" if any(message.get("role") == "system" for message in messages) else "final"
+    users = [message.get("content") or "" for message in messages if message.get("role") == "user"]
+    return kind, (users[-1] if users else "").strip()
+
+
+class ReplayLog:
+    """Replies recorded by the host, looked up by the last user message.
+
+    Unknown messages get a recording of the same kind chosen by a stable hash
+    of the message, so a replayed corpus always yields the same replies.
+    """
+
+    def __init__(self, path: str):
+        self.replies: Dict[Tuple[str, str], str] = {}
+        self.by_kind: Dict[str, List[str]] = {}
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                kind = record.get("kind", "decision")
+                self.replies[(kind, record["key"].strip())] = record["reply"]
+                self.by_kind.setdefault(kind, []).append(record["reply"])
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.replies)
+
+    def reply(self, messages: List[Dict]) -> str:
+        kind, key = replay_key(messages)
+        if (kind, key) in self.replies:
+            self.hits += 1
+            return self.replies[(kind, key)]
+        self.misses += 1
+        candidates = self.by_kind.get(kind) or [DEFAULT_REPLY]
+        return candidates[zlib.crc32(key.encode("utf-8")) % len(candidates)]
+
+
+class StubLLMServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, reply_fn: Optional[Callable[[List[Dict]], str]] = None,
+                 base_latency_ms: float = 30.0, prefill_ms_per_token: float = 0.4, cached_prefill_ms_per_token: float = 0.04,
+                 token_interval_ms: float = 15.0, cache_block_tokens: int = 128, min_cached_tokens: int = 1024,
+                 cache_entries: int = 256, replay_path: Optional[str] = None, latency_distribution: str = "fixed",
+                 latency_sigma: float = 0.3, seed: int = 0):
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution '{latency_distribution}', expected one of {LATENCY_DISTRIBUTIONS}")
+        self.host = host
+        self.port = port
+        self.replay = ReplayLog(replay_path) if replay_path else None
+        self.reply_fn = reply_fn or (self.replay.reply if self.replay is not None else (lambda messages: DEFAULT_REPLY))
+        self.latency_distribution = latency_distribution
+        self.latency_sigma = latency_sigma
+        self.rng = random.Random(seed)
+        self.base_latency_ms = base_latency_ms
+        self.prefill_ms_per_token = prefill_ms_per_token
+        self.cached_prefill_ms_per_token = cached_prefill_ms_per_token
+        self.token_interval_ms = token_interval_ms
+        self.cache_block_tokens = cache_block_tokens
+        self.min_cached_tokens = min_cached_tokens
+        self.cache_entries = cache_entries
+        self.prompt_cache: List[str] = []
+        self.lock = threading.Lock()
+        self.server = None
+        self.stats = {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0}
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    @staticmethod
+    def prompt_text(messages: List[Dict]) -> str:
+        return "".join(f"<|{message.get('role')}|>{message.get('content') or ''}" for message in messages)
+
+    def cached_tokens(self, prompt: str) -> int:
+        """Tokens of the longest cached prefix, rounded down to whole cache blocks."""
+        with self.lock:
+            longest = max((len(os.path.commonprefix([prompt, cached])) for cached in self.prompt_cache), default=0)
+            if prompt in self.prompt_cache:
+                self.prompt_cache.remove(prompt)
+            self.prompt_cache.append(prompt)
+            del self.prompt_cache[:-self.cache_entries]
+        tokens = count_tokens(prompt[:longest]) if longest else 0
+        tokens -= tokens % self.cache_block_tokens
+        return tokens if tokens >= self.min_cached_tokens else 0
+
+    def reset_cache(self):
+        with self.lock:
+            self.prompt_cache = []
+
+    def sample_ms(self, mean_ms: float) -> float:
+        """A latency around mean_ms from the configured distribution (lognormal keeps the mean, adds a long tail)."""
+        if self.latency_distribution == "fixed" or mean_ms <= 0:
+            return mean_ms
+        with self.lock:
+            if self.latency_distribution == "normal":
+                value = self.rng.gauss(mean_ms, mean_ms * self.latency_sigma)
+            else:
+                value = mean_ms * self.rng.lognormvariate(-self.latency_sigma ** 2 / 2, self.latency_sigma)
+        return max(value, 0.0)
+
+    def prefill_seconds(self, prompt_tokens: int, cached_tokens: int) -> float:
+        return (self.sample_ms(self.base_latency_ms) + (prompt_tokens - cached_tokens) * self.prefill_ms_per_token
+                + cached_tokens * self.cached_prefill_ms_per_token) / 1000
+
+    def complete(self, body: Dict) -> Dict:
+        messages = body.get("messages", [])
+        prompt = self.prompt_text(messages)
+        prompt_tokens = count_tokens(prompt)
+        cached = self.cached_tokens(prompt)
+        reply = self.reply_fn(messages)
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["prompt_tokens"] += prompt_tokens
+            self.stats["cached_tokens"] += cached
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "model": body.get("model", "stub"),
+            "reply": reply,
+            "prefill_seconds": self.prefill_seconds(prompt_tokens, cached),
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(split_reply_tokens(reply)),
+                "total_tokens": prompt_tokens + len(split_reply_tokens(reply)),
+                "prompt_tokens_details": {"cached_tokens": cached}
+            }
+        }
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send_json(self, status, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/models"):
+                    self._send_json(200, {"object": "list", "data": [{"id": "stub", "object": "model"}]})
+                elif self.path == "/stats":
+                    replay = {"replay_hits": stub.replay.hits, "replay_misses": stub.replay.misses} if stub.replay is not None else {}
+                    self._send_json(200, {**stub.stats, **replay})
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                result = stub.complete(body)
+                time.sleep(result["prefill_seconds"])
+                if body.get("stream"):
+                    self._stream(body, result)
+                else:
+                    time.sleep(sum(stub.sample_ms(stub.token_interval_ms) for _ in range(result["usage"]["completion_tokens"])) / 1000)
+                    self._send_json(200, {
+                        "id": result["id"],
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": result["model"],
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": result["reply"]},
+                                     "finish_reason": "stop"}],
+                        "usage": result["usage"]
+                    })
+
+            def _stream(self, body, result):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+
+                def event(choices, **extra):
+                    chunk = {"id": result["id"], "object": "chat.completion.chunk", "created": int(time.time()),
+                             "model": result["model"], "choices": choices, **extra}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+
+                event([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])
+                for piece in split_reply_tokens(result["reply"]):
+                    event([{"index": 0, "delta": {"content": piece}, "finish_reason": None}])
+                    time.sleep(stub.sample_ms(stub.token_interval_ms) / 1000)
+                event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    event([], usage=result["usage"])
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        """Serve in a background thread; port 0 picks a free port."""
+        self.server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, name="stub-llm", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible stub LLM server.")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5060)
+    parser.add_argument("--base-latency-ms", type=float, default=30.0)
+    parser.add_argument("--prefill-ms-per-token", type=float, default=0.4)
+    parser.add_argument("--token-interval-ms", type=float, default=15.0)
+    parser.add_argument("--replay", type=str, help="JSONL of decisions recorded by the host (llm.record_path) to reply with.")
+    parser.add_argument("--latency-distribution", choices=LATENCY_DISTRIBUTIONS, default="fixed")
+    parser.add_argument("--latency-sigma", type=float, default=0.3, help="Spread of the latency distribution, relative to its mean.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    stub = StubLLMServer(args.host, args.port, base_latency_ms=args.base_latency_ms,
+                         prefill_ms_per_token=args.prefill_ms_per_token,
+                         token_interval_ms=args.token_interval_ms, replay_path=args.replay,
+                         latency_distribution=args.latency_distribution, latency_sigma=args.latency_sigma,
+                         seed=args.seed).start()
+    print(f"🤖 Stub LLM server at {stub.url}" + (f", replaying {len(stub.replay)} recorded replies" if stub.replay is not None else ""))
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import os
+import random
+
+WORDS = ("seat lumbar support posture pelvis drift fatigue driver comfort ventilation heating "
+         "cushion backrest headrest pressure thermal spine muscle vibration massage track").split()
+
+
+def write_synthetic_pdf(path, pages, lines_per_page=60, seed=0):
+    """Minimal uncompressed PDF with one Helvetica text stream per page (reproducible for a given seed)."""
+    rng = random.Random(seed)
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_refs = []
+    for _ in range(pages):
+        lines = [" ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(lines_per_page)]
+        stream = "BT /F1 9 Tf 11 TL 40 800 Td " + " ".join(f"({line}) '" for line in lines) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream".encode("latin-1"))
+        content_ref = len(objects)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_ref} 0 R >>".encode("latin-1")
+        )
+        page_refs.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(page_refs)}] /Count {pages} >>".encode("latin-1")
+
+    with open(path, "wb") as file:
+        file.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(file.tell())
+            file.write(f"{number} 0 obj\n".encode("latin-1") + body + b"\nendobj\n")
+        xref = file.tell()
+        file.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1"))
+        for offset in offsets:
+            file.write(f"{offset:010d} 00000 n \n".encode("latin-1"))
+        file.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1"))
+
+
+def write_synthetic_corpus(directory, files, pages, seed=0):
+    """Write files synthetic PDFs with distinct seeds; returns their paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index in range(files):
+        path = os.path.join(directory, f"synthetic_{index:03d}.pdf")
+        write_synthetic_pdf(path, pages, seed=seed + index)
+        paths.append(path)
+    return paths
@@ -0,0 +1,70 @@
+import os
+from typing import Any, Dict, List, Optional, Union
+
+from utils.ingestor_prepator import CONST
+
+
+def tag_topics(text: str, topics: Optional[Dict[str, List[str]]] = None) -> List[str]:
+    """Topics whose keywords appear in the text, in config order."""
+    topics = topics if topics is not None else CONST.TOPICS
+    lowered = text.lower()
+    return [topic for topic, keywords in topics.items() if any(keyword in lowered for keyword in keywords)]
+
+
+def chunk_tags(text: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Metadata added to each chunk at ingest: source file name and topic flags.
+
+    Vector stores only accept scalar metadata, so topics are stored as one
+    comma-joined string plus a boolean ``topic_<name>`` flag per topic.
+    """
+    topics = tag_topics(text)
+    tags = {
+        "source_name": os.path.basename(str(metadata.get("source", ""))),
+        "topics": ",".join(topics)
+    }
+    tags.update({f"topic_{topic}": True for topic in topics})
+    return tags
+
+
+def resolve_filter(search_filter: Union[str, Dict[str, Any], None]) -> Optional[Dict[str, Any]]:
+    """Normalize a get_knowledge filter into {"topics": [...], "source": name or None}.
+
+    Accepts a dict such as {"topic": "posture", "source": "paper.pdf"} or a
+    free-text vehicle state such as "posture: pelvis drift", whose topics
+    are inferred with the same keyword rules used at ingest.
+    """
+    if not search_filter:
+        return None
+    if isinstance(search_filter, str):
+        topics, source = tag_topics(search_filter), None
+    else:
+        topic = search_filter.get("topic") or search_filter.get("topics") or []
+        topics = [topic] if isinstance(topic, str) else list(topic)
+        source = search_filter.get("source")
+    if not topics and not source:
+        return None
+    return {"topics": topics, "source": os.path.basename(source) if source else None}
+
+
+def matches_filter(metadata: Dict[str, Any], resolved: Optional[Dict[str, Any]]) -> bool:
+    """True when chunk metadata satisfies a resolved filter (any topic, and the source if given)."""
+    if not resolved:
+        return True
+    if resolved["source"] and metadata.get("source_name") != resolved["source"]:
+        return False
+    if resolved["topics"] and not any(metadata.get(f"topic_{topic}") for topic in resolved["topics"]):
+        return False
+    return True
+
+
+def chroma_where(resolved: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Translate a resolved filter into a Chroma ``where`` clause."""
+    if not resolved:
+        return None
+    clauses = []
+    if resolved["topics"]:
+        topic_clauses = [{f"topic_{topic}": True} for topic in resolved["topics"]]
+        clauses.append(topic_clauses[0] if len(topic_clauses) == 1 else {"$or": topic_clauses})
+    if resolved["source"]:
+        clauses.append({"source_name": resolved["source"]})
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
@@ -0,0 +1,370 @@
+"""Lightweight distributed tracing shared by the host, motor and knowledge servers.
+
+A trace starts at the host's /query endpoint and its context travels in the W3C
+traceparent header on every call the host makes to the MCP servers, whose
+FastAPI apps continue it through add_fastapi_tracing. Each service exports its
+finished spans to a JSONL file and/or an OTLP/HTTP collector (Jaeger, the
+OpenTelemetry Collector) as configured in the tracing section of config.yaml.
+
+    python utils/tracing.py list --slowest 10
+    python utils/tracing.py waterfall <trace_id>
+"""
+import os
+import sys
+import json
+import time
+import queue
+import random
+import logging
+import argparse
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Union
+
+import yaml
+import requests
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRACEPARENT_HEADER = "traceparent"
+TRACE_ID_HEADER = "X-Trace-Id"
+OTLP_SPAN_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def parse_traceparent(value: Optional[str]):
+    """(trace_id, span_id) from a traceparent header, or None when missing or malformed."""
+    parts = (value or "").strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    return parts[1], parts[2]
+
+
+class Span:
+    def __init__(self, name: str, service: str, trace_id: str, parent_id: Optional[str] = None,
+                 kind: str = "internal", attributes: Optional[Dict] = None):
+        self.name = name
+        self.service = service
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.status = "ok"
+        self.start_time = time.time()
+        self.duration_ms = None
+        self._start = time.perf_counter()
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def end(self, error: Optional[BaseException] = None):
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+        if error is not None:
+            self.status = "error"
+            self.attributes["error"] = f"{type(error).__name__}: {error}"
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "service": self.service,
+            "kind": self.kind,
+            "start_time": self.start_time,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes
+        }
+
+
+class JsonlExporter:
+    """Appends one JSON line per finished span; every service can share the same file.
+
+    Once the file reaches max_bytes it is rotated to path.1 (older files shift
+    up to path.<backup_count>), so the trace log stays bounded. max_bytes 0
+    disables rotation.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 0, backup_count: int = 1):
+        self.path = path if os.path.isabs(path) else os.path.join(ROOT_DIR, path)
+        self.max_bytes = max_bytes
+        self.backup_count = max(backup_count, 1)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.lock = threading.Lock()
+
+    def _rotate(self):
+        for index in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{index}"):
+                os.replace(f"{self.path}.{index}", f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self.lock:
+            try:
+                if self.max_bytes and os.path.getsize(self.path) + len(line) > self.max_bytes:
+                    self._rotate()
+            except OSError:
+                # Not created yet, or another service rotated it first
+                pass
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(line)
+
+
+class OtlpHttpExporter:
+    """Batches spans in a background thread and posts them as OTLP/HTTP JSON to a local collector."""
+
+    def __init__(self, url: str, service: str, flush_interval: float = 1.0, max_batch: int = 512):
+        self.url = url
+        self.service = service
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.pending = queue.Queue(maxsize=10000)
+        self.warned = False
+        threading.Thread(target=self._run, name="otlp-exporter", daemon=True).start()
+
+    def export(self, span: Span):
+        try:
+            self.pending.put_nowait(span)
+        except queue.Full:
+            pass
+
+    @staticmethod
+    def _attribute(key: str, value) -> Dict:
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+        return {"key": key, "value": {"stringValue": value if isinstance(value, str) else json.dumps(value, default=str)}}
+
+    def _otlp_span(self, span: Span) -> Dict:
+        start_ns = int(span.start_time * 1e9)
+        return {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "parentSpanId": span.parent_id or "",
+            "name": span.name,
+            "kind": OTLP_SPAN_KINDS.get(span.kind, 1),
+            "startTimeUnixNano": str(start_ns),
+            "endTimeUnixNano": str(start_ns + int((span.duration_ms or 0) * 1e6)),
+            "attributes": [self._attribute(key, value) for key, value in span.attributes.items()],
+            "status": {"code": 2 if span.status == "error" else 1}
+        }
+
+    def _run(self):
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch and time.monotonic() < deadline:
+                try:
+                    batch.append(self.pending.get(timeout=max(deadline - time.monotonic(), 0.0)))
+                except queue.Empty:
+                    break
+            try:
+                requests.post(self.url, timeout=5, json={"resourceSpans": [{
+                    "resource": {"attributes": [self._attribute("service.name", self.service)]},
+                    "scopeSpans": [{"scope": {"name": "seat-agent"}, "spans": [self._otlp_span(span) for span in batch]}]
+                }]}).raise_for_status()
+            except Exception as e:
+                if not self.warned:
+                    logging.warning(f"⚠️ Could not export spans to {self.url}: {str(e)}")
+                    self.warned = True
+
+
+class Tracer:
+    def __init__(self, service: str, exporters: Optional[List] = None, enabled: bool = True):
+        self.service = service
+        self.exporters = exporters or []
+        self.enabled = enabled
+
+    @staticmethod
+    def current_span() -> Optional[Span]:
+        return _current_span.get()
+
+    @contextmanager
+    def span(self, name: str, parent: Union[str, Span, None] = None, kind: str = "internal", **attributes) -> Iterator[Optional[Span]]:
+        """Time a block as a child of `parent` (a traceparent header or Span) or of the current span.
+
+        Without either it starts a new trace. Yields None when tracing is disabled.
+        """
+        if not self.enabled:
+            yield None
+            return
+        if isinstance(parent, str) or parent is None:
+            context = parse_traceparent(parent) if parent else None
+            current = _current_span.get()
+            if context is None and current is not None:
+                context = (current.trace_id, current.span_id)
+        else:
+            context = (parent.trace_id, parent.span_id)
+        trace_id, parent_id = context if context else (f"{random.getrandbits(128):032x}", None)
+
+        span = Span(name, self.service, trace_id, parent_id, kind, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.end(e)
+            raise
+        else:
+            span.end()
+        finally:
+            _current_span.reset(token)
+            self._export(span)
+
+    def _export(self, span: Span):
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                logging.warning(f"⚠️ Span export failed: {str(e)}")
+
+    def inject(self, headers: Optional[Dict] = None) -> Dict:
+        """Headers carrying the current span's context to the next service."""
+        headers = dict(headers or {})
+        span = _current_span.get()
+        if span is not None:
+            headers[TRACEPARENT_HEADER] = span.traceparent
+        return headers
+
+
+def load_tracing_config() -> Dict:
+    with open(os.path.join(ROOT_DIR, "config.yaml"), "r") as file:
+        return yaml.safe_load(file).get("tracing", {})
+
+
+def create_tracer(service: str, tracing_config: Optional[Dict] = None) -> Tracer:
+    """Tracer for one service, exporting as configured (reads config.yaml when no config is given)."""
+    tracing_config = load_tracing_config() if tracing_config is None else tracing_config
+    if not tracing_config.get("enabled", False):
+        return Tracer(service, enabled=False)
+    kinds = tracing_config.get("exporter", "jsonl")
+    exporters = []
+    for kind in [kinds] if isinstance(kinds, str) else kinds:
+        if kind == "jsonl":
+            exporters.append(JsonlExporter(
+                tracing_config.get("jsonl_path", "logs/traces.jsonl"),
+                max_bytes=tracing_config.get("max_bytes", 50 * 2**20),
+                backup_count=tracing_config.get("backup_count", 3)
+            ))
+        elif kind == "otlp":
+            exporters.append(OtlpHttpExporter(
+                tracing_config.get("otlp_url", "http://localhost:4318/v1/traces"), service,
+                flush_interval=tracing_config.get("flush_interval_seconds", 1.0)
+            ))
+        elif kind != "none":
+            raise ValueError(f"Unknown trace exporter '{kind}', expected jsonl, otlp or none")
+    return Tracer(service, exporters)
+
+
+def add_fastapi_tracing(app, tracer: Tracer):
+    """Continue incoming traces with one server span per HTTP request."""
+    from fastapi import Request
+
+    @app.middleware("http")
+    async def trace_requests(request: Request, call_next):
+        with tracer.span(f"{request.method} {request.url.path}", parent=request.headers.get(TRACEPARENT_HEADER),
+                         kind="server", path=request.url.path) as span:
+            response = await call_next(request)
+            if span is not None:
+                span.set_attribute("status_code", response.status_code)
+                if response.status_code >= 500:
+                    span.status = "error"
+                response.headers[TRACE_ID_HEADER] = span.trace_id
+            return response
+
+
+def load_spans(path: str, trace_id: Optional[str] = None) -> List[Dict]:
+    spans = []
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                span = json.loads(line)
+                if trace_id is None or span["trace_id"].startswith(trace_id):
+                    spans.append(span)
+    return spans
+
+
+def print_waterfall(spans: List[Dict], width: int = 40):
+    """Print the spans of one trace as an indented tree with bars on a shared time axis."""
+    trace_start = min(span["start_time"] for span in spans)
+    trace_end = max(span["start_time"] + (span["duration_ms"] or 0) / 1000 for span in spans)
+    total_ms = max((trace_end - trace_start) * 1000, 1e-6)
+    span_ids = {span["span_id"] for span in spans}
+    children: Dict[Optional[str], List[Dict]] = {}
+    for span in spans:
+        parent = span["parent_id"] if span["parent_id"] in span_ids else None
+        children.setdefault(parent, []).append(span)
+
+    print(f"Trace {spans[0]['trace_id']}: {len(spans)} spans across "
+          f"{len({span['service'] for span in spans})} services, {total_ms:.1f} ms")
+
+    def walk(parent, depth):
+        for span in sorted(children.get(parent, []), key=lambda item: item["start_time"]):
+            offset_ms = (span["start_time"] - trace_start) * 1000
+            duration_ms = span["duration_ms"] or 0
+            begin = int(offset_ms / total_ms * width)
+            length = max(int(round(duration_ms / total_ms * width)), 1)
+            bar = (" " * begin + "█" * length).ljust(width)[:width]
+            flag = " ❌" if span["status"] == "error" else ""
+            print(f"{offset_ms:>9.1f}ms |{bar}| {duration_ms:>8.1f}ms  {span['service']:<10}{'  ' * depth}{span['name']}{flag}")
+            walk(span["span_id"], depth + 1)
+
+    walk(None, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect traces exported to the JSONL trace file.")
+    parser.add_argument("--file", type=str, help="Trace file (default: tracing.jsonl_path from config.yaml).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    waterfall_parser = subparsers.add_parser("waterfall", help="Print the span waterfall of one trace.")
+    waterfall_parser.add_argument("trace_id", type=str, help="Trace ID, or a unique prefix of it.")
+    list_parser = subparsers.add_parser("list", help="List traces by duration of their root span.")
+    list_parser.add_argument("--slowest", type=int, default=20)
+    args = parser.parse_args()
+
+    path = args.file or load_tracing_config().get("jsonl_path", "logs/traces.jsonl")
+    path = path if os.path.isabs(path) else os.path.join(ROOT_DIR, path)
+    if not os.path.exists(path):
+        print(f"❌ No trace file at {path}")
+        sys.exit(1)
+
+    if args.command == "waterfall":
+        spans = load_spans(path, args.trace_id)
+        trace_ids = {span["trace_id"] for span in spans}
+        if len(trace_ids) != 1:
+            print(f"❌ {len(trace_ids)} traces match '{args.trace_id}'")
+            sys.exit(1)
+        print_waterfall(spans)
+        return
+
+    traces: Dict[str, List[Dict]] = {}
+    for span in load_spans(path):
+        traces.setdefault(span["trace_id"], []).append(span)
+    rows = []
+    for trace_id, spans in traces.items():
+        span_ids = {span["span_id"] for span in spans}
+        roots = [span for span in spans if span["parent_id"] not in span_ids] or spans
+        root = max(roots, key=lambda span: span["duration_ms"] or 0)
+        rows.append((root["duration_ms"] or 0, trace_id, root, len(spans), any(span["status"] == "error" for span in spans)))
+    for duration_ms, trace_id, root, count, failed in sorted(rows, key=lambda row: row[0], reverse=True)[:args.slowest]:
+        started = time.strftime("%H:%M:%S", time.localtime(root["start_time"]))
+        print(f"{trace_id}  {started}  {duration_ms:>9.1f}ms  {count:>3} spans  {root['service']}/{root['name']}"
+              f"{' ❌' if failed else ''}")
+
+
+if __name__ == "__main__":
+    main()
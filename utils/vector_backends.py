@@ -0,0 +1,365 @@
+import os
+import json
+import uuid
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain.schema import Document
+
+EMBEDDINGS_FILE = "embeddings.npy"
+FULL_EMBEDDINGS_FILE = "embeddings_full.npy"
+SCALES_FILE = "scales.npy"
+CHUNKS_FILE = "chunks.json"
+SCORE_BLOCK_ROWS = 4096
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    """Return float32 copies of the vectors scaled to unit length."""
+    matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def quantize(vectors: np.ndarray, dtype) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Convert unit vectors to the storage dtype; int8 codes carry a per-vector scale."""
+    dtype = np.dtype(dtype)
+    if dtype == np.int8:
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.round(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    return vectors.astype(dtype), None
+
+
+def dequantize(matrix: np.ndarray, scales: Optional[np.ndarray]) -> np.ndarray:
+    vectors = np.asarray(matrix, dtype=np.float32)
+    return vectors * scales[:, None] if scales is not None else vectors
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first."""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+class NumpyVectorStore:
+    """Exact-search vector store backed by a memory-mapped .npy embedding matrix.
+
+    Embeddings are stored normalized, so scores are cosine similarities and a
+    single matrix-vector product ranks the whole corpus. With a float16 or
+    int8 dtype the search matrix is quantized and the best candidates are
+    rescored against a float32 copy that stays on disk (memory-mapped).
+    Added embeddings are buffered and folded into the matrix once, on the
+    next persist, search or delete, so batched ingests do not copy the whole
+    matrix per batch.
+    """
+
+    def __init__(self, index_dir: str, embedding_function, dtype: str = "float32",
+                 rescore_factor: int = 4):
+        self.index_dir = index_dir
+        self.embedding_function = embedding_function
+        self.dtype = np.dtype(dtype)
+        self.rescore_factor = rescore_factor
+        self.lock = threading.RLock()
+        os.makedirs(self.index_dir, exist_ok=True)
+        self.load()
+
+    @property
+    def embeddings_path(self) -> str:
+        return os.path.join(self.index_dir, EMBEDDINGS_FILE)
+
+    @property
+    def full_embeddings_path(self) -> str:
+        return os.path.join(self.index_dir, FULL_EMBEDDINGS_FILE)
+
+    @property
+    def scales_path(self) -> str:
+        return os.path.join(self.index_dir, SCALES_FILE)
+
+    @property
+    def chunks_path(self) -> str:
+        return os.path.join(self.index_dir, CHUNKS_FILE)
+
+    def load(self):
+        """(Re)open the persisted index, memory-mapping the embedding matrices."""
+        with self.lock:
+            self.matrix, self.scales, self.full_matrix = None, None, None
+            self.pending_vectors: List[np.ndarray] = []
+            if os.path.exists(self.embeddings_path) and os.path.exists(self.chunks_path):
+                self.matrix = np.load(self.embeddings_path, mmap_mode="r")
+                if self.matrix.dtype == np.int8:
+                    self.scales = np.load(self.scales_path)
+                if self.matrix.dtype != np.float32 and os.path.exists(self.full_embeddings_path):
+                    self.full_matrix = np.load(self.full_embeddings_path, mmap_mode="r")
+                with open(self.chunks_path, "r", encoding="utf-8") as file:
+                    chunks = json.load(file)
+                self.ids = chunks["ids"]
+                self.texts = chunks["texts"]
+                self.metadatas = chunks["metadatas"]
+            else:
+                self.ids, self.texts, self.metadatas = [], [], []
+            self._reindex()
+            logging.info(f"Loaded NumPy index with {len(self.ids)} chunks from {self.index_dir}")
+
+    def _reindex(self):
+        """Rebuild id lookup and the topic/source pre-filter index from chunk metadata."""
+        self.id_to_row = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        topic_rows: Dict[str, List[int]] = {}
+        source_rows: Dict[str, List[int]] = {}
+        for row, metadata in enumerate(self.metadatas):
+            for topic in filter(None, str(metadata.get("topics", "")).split(",")):
+                topic_rows.setdefault(topic, []).append(row)
+            source_rows.setdefault(metadata.get("source_name", ""), []).append(row)
+        self.topic_rows = {topic: np.array(rows, dtype=np.int64) for topic, rows in topic_rows.items()}
+        self.source_rows = {source: np.array(rows, dtype=np.int64) for source, rows in source_rows.items()}
+
+    def candidate_rows(self, resolved_filter: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Sorted rows allowed by a resolved filter, or None when nothing is filtered."""
+        if not resolved_filter:
+            return None
+        empty = np.empty(0, dtype=np.int64)
+        rows = None
+        if resolved_filter["topics"]:
+            rows = np.unique(np.concatenate(
+                [self.topic_rows.get(topic, empty) for topic in resolved_filter["topics"]]
+            ))
+        if resolved_filter["source"]:
+            source = self.source_rows.get(resolved_filter["source"], empty)
+            rows = source if rows is None else np.intersect1d(rows, source)
+        return rows
+
+    def _full_vectors(self) -> np.ndarray:
+        """All embeddings in float32, from the full-precision copy when one exists."""
+        if self.matrix is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        if self.full_matrix is not None:
+            return np.asarray(self.full_matrix, dtype=np.float32)
+        return dequantize(self.matrix, self.scales)
+
+    def _commit_pending(self):
+        """Fold the buffered embeddings into the matrices with a single copy and reindex."""
+        with self.lock:
+            if not self.pending_vectors:
+                return
+            stored = [self._full_vectors()] if self.matrix is not None and self.matrix.shape[0] else []
+            pending, self.pending_vectors = self.pending_vectors, []
+            self._set_vectors(np.vstack(stored + pending))
+            self._reindex()
+
+    def _set_vectors(self, vectors: np.ndarray):
+        """Replace the in-memory matrices with the configured storage format."""
+        self.matrix, self.scales = quantize(vectors, self.dtype)
+        self.full_matrix = None if self.dtype == np.float32 else vectors
+
+    @staticmethod
+    def _write_atomic(path: str, array: Optional[np.ndarray]):
+        if array is None:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as file:
+            np.save(file, np.ascontiguousarray(array))
+        os.replace(tmp_path, path)
+
+    def persist(self):
+        """Write the embedding matrices and chunk file, then re-open them memory-mapped."""
+        with self.lock:
+            self._commit_pending()
+            if not self.ids:
+                # Empty arrays cannot be memory-mapped, so an empty index has no files
+                self.matrix, self.scales, self.full_matrix = None, None, None
+                for path in (self.embeddings_path, self.full_embeddings_path, self.scales_path, self.chunks_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                return
+
+            # Re-derive every stored form so a changed dtype setting takes effect
+            self._set_vectors(self._full_vectors())
+            matrix, scales, full_matrix = self.matrix, self.scales, self.full_matrix
+
+            tmp_chunks = self.chunks_path + ".tmp"
+            with open(tmp_chunks, "w", encoding="utf-8") as file:
+                json.dump({"ids": self.ids, "texts": self.texts, "metadatas": self.metadatas}, file)
+
+            # Release the current maps before replacing the files underneath them
+            self.matrix, self.scales, self.full_matrix = None, None, None
+            self._write_atomic(self.embeddings_path, matrix)
+            self._write_atomic(self.scales_path, scales)
+            self._write_atomic(self.full_embeddings_path, full_matrix)
+            os.replace(tmp_chunks, self.chunks_path)
+            self.load()
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def memory_bytes(self) -> int:
+        """Bytes of the matrices scanned on every query (the rescoring copy is paged in on demand)."""
+        self._commit_pending()
+        if self.matrix is None:
+            return 0
+        return self.matrix.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def add_embeddings(self, texts: List[str], embeddings, metadatas: Optional[List[Dict]] = None,
+                       ids: Optional[List[str]] = None) -> List[str]:
+        """Add pre-computed embeddings; existing ids are replaced. Buffered until the next persist or search."""
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        vectors = normalize_rows(embeddings)
+
+        with self.lock:
+            replaced = [doc_id for doc_id in ids if doc_id in self.id_to_row]
+            if replaced:
+                self.delete(replaced)
+
+            first_row = len(self.ids)
+            self.pending_vectors.append(vectors)
+            self.ids.extend(ids)
+            self.texts.extend(texts)
+            self.metadatas.extend(dict(metadata) for metadata in metadatas)
+            self.id_to_row.update((doc_id, first_row + offset) for offset, doc_id in enumerate(ids))
+        return ids
+
+    def add_documents(self, documents: List[Document], ids: Optional[List[str]] = None) -> List[str]:
+        texts = [doc.page_content for doc in documents]
+        embeddings = self.embedding_function.embed_documents(texts)
+        return self.add_embeddings(texts, embeddings, [doc.metadata for doc in documents], ids)
+
+    def delete(self, ids: List[str]):
+        with self.lock:
+            self._commit_pending()
+            rows = [self.id_to_row[doc_id] for doc_id in ids if doc_id in self.id_to_row]
+            if not rows:
+                return
+            drop = set(rows)
+            keep = [row for row in range(len(self.ids)) if row not in drop]
+            self._set_vectors(self._full_vectors()[keep])
+            self.ids = [self.ids[row] for row in keep]
+            self.texts = [self.texts[row] for row in keep]
+            self.metadatas = [self.metadatas[row] for row in keep]
+            self._reindex()
+
+    def reset(self):
+        """Drop every chunk and the files on disk."""
+        with self.lock:
+            self.ids, self.texts, self.metadatas = [], [], []
+            self.pending_vectors = []
+            self._reindex()
+            self.persist()
+
+    def get(self, ids: Optional[List[str]] = None, include: Optional[List[str]] = None,
+            limit: Optional[int] = None, offset: int = 0, where: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Chroma-style accessor returning ids, documents and metadatas (and embeddings when included).
+
+        ``where`` supports metadata equality, e.g. {"source_name": "manual.pdf"}, optionally under "$and".
+        """
+        with self.lock:
+            self._commit_pending()
+            rows = range(len(self.ids)) if ids is None else [
+                self.id_to_row[doc_id] for doc_id in ids if doc_id in self.id_to_row
+            ]
+            if where:
+                conditions = [item for condition in where.get("$and", [where]) for item in condition.items()]
+                rows = [
+                    row for row in rows
+                    if all(self.metadatas[row].get(key) == value for key, value in conditions)
+                ]
+            rows = rows[offset:offset + limit if limit is not None else None]
+            result = {
+                "ids": [self.ids[row] for row in rows],
+                "documents": [self.texts[row] for row in rows],
+                "metadatas": [self.metadatas[row] for row in rows]
+            }
+            if include and "embeddings" in include:
+                selected = np.asarray(list(rows), dtype=np.int64)
+                if self.matrix is None or not len(selected):
+                    result["embeddings"] = np.zeros((0, 0), dtype=np.float32)
+                elif self.full_matrix is not None:
+                    result["embeddings"] = np.asarray(self.full_matrix[selected], dtype=np.float32)
+                else:
+                    scales = self.scales[selected] if self.scales is not None else None
+                    result["embeddings"] = dequantize(self.matrix[selected], scales)
+            return result
+
+    def _score(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Cosine scores of shape (n_chunks or len(rows), n_queries), computed on the stored form."""
+        if rows is not None:
+            # Pre-filtered candidates: only these rows are read from the map
+            scores = np.asarray(self.matrix[rows], dtype=np.float32) @ queries.T
+            if self.scales is not None:
+                scores *= self.scales[rows, None]
+            return scores
+        if self.matrix.dtype == np.float32:
+            return self.matrix @ queries.T
+        # Upcast in blocks so quantized matrices never materialize in full
+        scores = np.empty((self.matrix.shape[0], queries.shape[0]), dtype=np.float32)
+        for start in range(0, self.matrix.shape[0], SCORE_BLOCK_ROWS):
+            block = np.asarray(self.matrix[start:start + SCORE_BLOCK_ROWS], dtype=np.float32) @ queries.T
+            if self.scales is not None:
+                block *= self.scales[start:start + block.shape[0], None]
+            scores[start:start + block.shape[0]] = block
+        return scores
+
+    def _rescore(self, query: np.ndarray, rows: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """Re-rank candidate rows against the full-precision embeddings."""
+        rows = np.sort(rows)
+        exact = np.asarray(self.full_matrix[rows], dtype=np.float32) @ query
+        return [(int(rows[i]), float(exact[i])) for i in top_k_indices(exact, k)]
+
+    def _query_rows(self, embeddings, k: int, rows: Optional[np.ndarray] = None) -> List[List[Tuple[int, float]]]:
+        """Top-k (row, score) pairs for each query vector, best match first, optionally within rows."""
+        queries = normalize_rows(embeddings)
+        with self.lock:
+            if self.matrix is None or self.matrix.shape[0] == 0 or (rows is not None and len(rows) == 0):
+                return [[] for _ in range(queries.shape[0])]
+            scores = self._score(queries, rows)
+            rescore = self.full_matrix is not None and self.rescore_factor > 0
+            results = []
+            for column in range(queries.shape[0]):
+                local = top_k_indices(scores[:, column], k * self.rescore_factor if rescore else k)
+                global_rows = rows[local] if rows is not None else local
+                if rescore:
+                    results.append(self._rescore(queries[column], global_rows, k))
+                else:
+                    results.append([
+                        (int(row), float(scores[idx, column])) for idx, row in zip(local, global_rows)
+                    ])
+            return results
+
+    def search_by_vectors(self, embeddings, k: int = 2,
+                          resolved_filter: Optional[Dict[str, Any]] = None) -> List[List[Tuple[Document, float]]]:
+        """Top-k documents with cosine scores for each query vector, best match first."""
+        self._commit_pending()
+        return [
+            [
+                (Document(page_content=self.texts[row], metadata=self.metadatas[row]), score)
+                for row, score in hits
+            ]
+            for hits in self._query_rows(embeddings, k, self.candidate_rows(resolved_filter))
+        ]
+
+    def search_ids_by_vector(self, embedding, k: int = 2,
+                             resolved_filter: Optional[Dict[str, Any]] = None) -> List[Tuple[str, float]]:
+        """Top-k (id, score) pairs for a single query vector."""
+        self._commit_pending()
+        hits = self._query_rows([embedding], k, self.candidate_rows(resolved_filter))[0]
+        return [(self.ids[row], score) for row, score in hits]
+
+    def similarity_search_with_score_by_vector(self, embedding, k: int = 2,
+                                               resolved_filter: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+        return self.search_by_vectors([embedding], k=k, resolved_filter=resolved_filter)[0]
+
+    def similarity_search_by_vector(self, embedding, k: int = 2,
+                                    resolved_filter: Optional[Dict[str, Any]] = None) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, resolved_filter)]
+
+    def similarity_search(self, query: str, k: int = 2) -> List[Document]:
+        return self.similarity_search_by_vector(self.embedding_function.embed_query(query), k=k)